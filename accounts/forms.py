@@ -4,6 +4,8 @@ Forms for user authentication and profile management
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import get_user_model
+from payments.banks import get_bank_choices, get_bank_name, get_cached_resolution
+from payments.recipients import deactivate_stale_recipients
 from .models import UserRating
 
 User = get_user_model()
@@ -114,26 +116,15 @@ class UserProfileForm(forms.ModelForm):
 
 class BankDetailsForm(forms.ModelForm):
     """Form for adding bank details"""
+    bank_code = forms.ChoiceField(
+        label='Bank',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    
     class Meta:
         model = User
-        fields = ['bank_name', 'account_number', 'account_name']
+        fields = ['bank_code', 'account_number', 'account_name']
         widgets = {
-            'bank_name': forms.Select(attrs={'class': 'form-control'}, choices=[
-                ('', 'Select Bank'),
-                ('Access Bank', 'Access Bank'),
-                ('GTBank', 'Guaranty Trust Bank'),
-                ('First Bank', 'First Bank of Nigeria'),
-                ('UBA', 'United Bank for Africa'),
-                ('Zenith Bank', 'Zenith Bank'),
-                ('Stanbic IBTC', 'Stanbic IBTC Bank'),
-                ('Sterling Bank', 'Sterling Bank'),
-                ('Polaris Bank', 'Polaris Bank'),
-                ('Fidelity Bank', 'Fidelity Bank'),
-                ('FCMB', 'First City Monument Bank'),
-                ('Kuda', 'Kuda Bank'),
-                ('OPay', 'OPay'),
-                ('PalmPay', 'PalmPay'),
-            ]),
             'account_number': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': '1234567890',
@@ -144,6 +135,40 @@ class BankDetailsForm(forms.ModelForm):
                 'placeholder': 'Account Name'
             }),
         }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Bank directory comes from the cache, never from Paystack directly
+        self.fields['bank_code'].choices = [('', 'Select Bank')] + list(get_bank_choices())
+    
+    def clean_account_number(self):
+        account_number = self.cleaned_data.get('account_number', '')
+        if not (account_number.isdigit() and len(account_number) == 10):
+            raise forms.ValidationError('Enter your 10-digit NUBAN account number.')
+        return account_number
+    
+    def save(self, commit=True):
+        """
+        Use a memoized Paystack resolution when there is one; otherwise the
+        details are left unverified and resolved in the background
+        (payments.tasks.resolve_bank_account).
+        """
+        user = super().save(commit=False)
+        user.bank_name = get_bank_name(user.bank_code)
+        
+        account_name = get_cached_resolution(user.bank_code, user.account_number)
+        if account_name:
+            user.account_name = account_name
+            user.bank_account_verified = True
+        elif self.changed_data:
+            user.bank_account_verified = False
+        
+        if commit:
+            user.save()
+            if {'bank_code', 'account_number'} & set(self.changed_data):
+                # Payouts must not go to a recipient code for the old account
+                deactivate_stale_recipients(user)
+        return user
 
 
 class RatingForm(forms.ModelForm):
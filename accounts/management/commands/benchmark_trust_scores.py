@@ -0,0 +1,57 @@
+"""
+Benchmark the trust-score engine
+Usage:
+    python manage.py benchmark_trust_scores --users 1000000   # synthetic arrays
+    python manage.py benchmark_trust_scores --database        # full run against the DB
+"""
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from accounts.trust import compute_trust_scores, recalculate_trust_scores
+
+
+class Command(BaseCommand):
+    help = 'Report trust-score engine throughput in users scored per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000,
+                            help='Synthetic users for the in-memory benchmark')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--database', action='store_true',
+                            help='Also time a full recalculation against the database')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        n = options['users']
+        rng = np.random.default_rng(options['seed'])
+
+        completed = rng.poisson(8, n)
+        disputed = rng.binomial(completed + 1, 0.05)
+        refunded = rng.binomial(disputed, 0.5)
+        rating_count = rng.binomial(completed, 0.6)
+        rating_sum = rating_count * rng.uniform(1, 5, n)
+        days_inactive = np.where(completed > 0, rng.exponential(90, n), np.nan)
+
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            compute_trust_scores(completed, disputed, refunded, rating_count, rating_sum, days_inactive)
+            timings.append(time.perf_counter() - started)
+
+        best = min(timings)
+        self.stdout.write(
+            f'compute_trust_scores: {n:,} users in {best * 1000:.1f}ms '
+            f'(best of {len(timings)}) → {n / best:,.0f} users/s'
+        )
+
+        if options['database']:
+            started = time.perf_counter()
+            scored = recalculate_trust_scores(only_dirty=False, chunk_size=options['chunk_size'])
+            elapsed = time.perf_counter() - started
+            rate = scored / elapsed if elapsed else 0
+            self.stdout.write(
+                f'recalculate_trust_scores: {scored:,} users in {elapsed:.2f}s → {rate:,.0f} users/s'
+            )
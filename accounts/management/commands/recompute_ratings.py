@@ -0,0 +1,26 @@
+"""
+Rebuild denormalized rating aggregates from UserRating rows
+Usage: python manage.py recompute_ratings [--chunk-size 1000]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.ratings import recompute_rating_aggregates
+from core.db import use_task_statement_timeout
+
+
+class Command(BaseCommand):
+    help = 'Recompute rating count, sum and histogram columns for every user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        use_task_statement_timeout()
+        started = time.perf_counter()
+        updated = recompute_rating_aggregates(chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Updated rating aggregates for {updated} users in {elapsed:.2f}s'
+        ))
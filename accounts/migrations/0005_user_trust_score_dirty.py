@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='trust_score_dirty',
+            field=models.BooleanField(db_index=True, default=False, help_text='Activity changed since the last trust score run'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+# Values the old hard-coded BankDetailsForm stored in bank_name
+OLD_BANK_CODES = {
+    'Access Bank': '044',
+    'GTBank': '058',
+    'First Bank': '011',
+    'UBA': '033',
+    'Zenith Bank': '057',
+    'Stanbic IBTC': '221',
+    'Sterling Bank': '232',
+    'Polaris Bank': '076',
+    'Fidelity Bank': '070',
+    'FCMB': '214',
+    'Kuda': '50211',
+    'OPay': '999992',
+    'PalmPay': '999991',
+}
+
+
+def backfill_bank_codes(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    for bank_name, code in OLD_BANK_CODES.items():
+        User.objects.filter(bank_name=bank_name).update(bank_code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_trust_score_dirty'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='bank_account_verified',
+            field=models.BooleanField(default=False, help_text='Account name confirmed with Paystack for the current bank details'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='bank_code',
+            field=models.CharField(blank=True, help_text='Paystack bank code', max_length=20),
+        ),
+        migrations.RunPython(backfill_bank_codes, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,9 @@ Custom User Model for SafeRelease Nigeria
 Supports both clients and service providers
 """
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
 from django.core.validators import RegexValidator
 from cloudinary.models import CloudinaryField
 
@@ -51,6 +53,11 @@ class User(AbstractUser):
     bank_name = models.CharField(max_length=100, blank=True)
     account_number = models.CharField(max_length=10, blank=True)
     account_name = models.CharField(max_length=100, blank=True)
+    bank_code = models.CharField(max_length=20, blank=True, help_text="Paystack bank code")
+    bank_account_verified = models.BooleanField(
+        default=False,
+        help_text="Account name confirmed with Paystack for the current bank details"
+    )
     
     # Trust score
     trust_score = models.DecimalField(
@@ -61,6 +68,21 @@ class User(AbstractUser):
     )
     total_completed_transactions = models.PositiveIntegerField(default=0)
     total_disputes = models.PositiveIntegerField(default=0)
+    trust_score_dirty = models.BooleanField(
+        default=False,
+        db_index=True,
+        help_text="Activity changed since the last trust score run"
+    )
+    
+    # Rating aggregates (maintained by accounts.ratings, repaired by
+    # `manage.py recompute_ratings`)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -84,15 +106,32 @@ class User(AbstractUser):
             return f"{self.first_name} {self.last_name}"
         return self.username
     
-    def update_trust_score(self):
-        """Calculate and update trust score based on transactions"""
-        if self.total_completed_transactions == 0:
-            self.trust_score = 0.00
-        else:
-            # Simple algorithm: 5.0 base - (disputes/transactions * 5)
-            dispute_ratio = self.total_disputes / self.total_completed_transactions
-            self.trust_score = max(0, 5.0 - (dispute_ratio * 5))
-        self.save()
+    @property
+    def average_rating(self):
+        """Average star rating from the denormalized aggregates"""
+        if not self.rating_count:
+            return 0
+        return self.rating_sum / self.rating_count
+    
+    @property
+    def rating_histogram(self):
+        """Number of ratings per star, highest first: [(5, n), ..., (1, n)]"""
+        return [(stars, getattr(self, f'rating_{stars}_count')) for stars in range(5, 0, -1)]
+    
+    def update_trust_score(self, completed=0, disputes=0):
+        """
+        Add to the activity counters and flag the user for the next batch
+        trust-score run (accounts.trust). A queryset update keeps this off
+        the full-row save path, so no post_save signals fire per event, and
+        the F() increments don't lose concurrent events on stale instances.
+        """
+        counters = {}
+        if completed:
+            counters['total_completed_transactions'] = F('total_completed_transactions') + completed
+        if disputes:
+            counters['total_disputes'] = F('total_disputes') + disputes
+        self.trust_score_dirty = True
+        User.objects.filter(pk=self.pk).update(trust_score_dirty=True, **counters)
 
 
 class UserWallet(models.Model):
@@ -129,6 +168,27 @@ class UserWallet(models.Model):
     
     def __str__(self):
         return f"{self.user.get_full_name()}'s Wallet - ₦{self.balance:,.2f}"
+    
+    @classmethod
+    def adjust(cls, user_id, **amounts):
+        """
+        Add signed amounts to a user's wallet fields in one UPDATE, e.g.
+        UserWallet.adjust(user_id, balance=amount, total_earned=amount).
+
+        The database applies the arithmetic, so concurrent credits and debits
+        (releases, refunds, payouts) can't overwrite each other the way a
+        read-modify-write save() can. Wallet instances already in memory are
+        not refreshed.
+        """
+        from core.views import dashboard_cache
+        
+        updated = cls.objects.filter(user_id=user_id).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + amount for field, amount in amounts.items()},
+        )
+        # update() skips post_save, so drop the cached dashboard here
+        db_transaction.on_commit(lambda: dashboard_cache.delete(user_id))
+        return updated
 
 
 class UserRating(models.Model):
@@ -0,0 +1,116 @@
+"""
+Rating submission and denormalized rating aggregates
+"""
+from django.db import transaction as db_transaction
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from .models import User, UserRating
+
+
+RATING_AGGREGATE_FIELDS = [
+    'rating_count', 'rating_sum',
+    'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+]
+
+
+def can_rate(transaction, user):
+    """Only the two parties can rate, once each, after payment is released"""
+    return (
+        transaction.status == 'RELEASED'
+        and user.pk in (transaction.client_id, transaction.service_provider_id)
+    )
+
+
+def submit_rating(transaction, rater, rating, review=''):
+    """
+    Save a rating and update the rated user's aggregates atomically.
+
+    The aggregates are bumped with a single UPDATE using F() expressions,
+    so concurrent ratings for the same user never lose an increment.
+    """
+    if rater.pk == transaction.client_id:
+        rated_user_id = transaction.service_provider_id
+    else:
+        rated_user_id = transaction.client_id
+
+    with db_transaction.atomic():
+        user_rating = UserRating.objects.create(
+            rated_user_id=rated_user_id,
+            rater=rater,
+            transaction=transaction,
+            rating=rating,
+            review=review,
+        )
+        User.objects.filter(pk=rated_user_id).update(**{
+            'rating_count': F('rating_count') + 1,
+            'rating_sum': F('rating_sum') + rating,
+            f'rating_{rating}_count': F(f'rating_{rating}_count') + 1,
+            # Ratings feed the trust score (accounts.trust)
+            'trust_score_dirty': True,
+        })
+
+    return user_rating
+
+
+def _actual(stars=None, total=False):
+    """Correlated subquery: the user's rating count (or sum) from UserRating rows"""
+    ratings = UserRating.objects.filter(rated_user=OuterRef('pk'))
+    if stars is not None:
+        ratings = ratings.filter(rating=stars)
+    value = Sum('rating') if total else Count('id')
+    return Coalesce(
+        Subquery(ratings.values('rated_user').annotate(value=value).values('value')),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def _actual_aggregates():
+    return {
+        'rating_count': _actual(),
+        'rating_sum': _actual(total=True),
+        **{f'rating_{stars}_count': _actual(stars) for stars in range(1, 6)},
+    }
+
+
+def recompute_rating_aggregates(chunk_size=1000):
+    """
+    Rebuild every user's rating aggregates from UserRating rows.
+
+    Users are processed a chunk at a time: their rows are locked, so
+    submit_rating's F() increments wait for the rebuild (and the rebuild
+    for ratings in flight), then a single UPDATE sets the aggregates from
+    subqueries, for the users whose stored values differ, and flags them
+    for the next trust-score run. Users with no ratings left are reset to
+    zero.
+
+    Returns:
+        int: number of users updated
+    """
+    has_ratings = Exists(UserRating.objects.filter(rated_user=OuterRef('pk')))
+    candidates = User.objects.filter(Q(rating_count__gt=0) | Q(has_ratings)).order_by('pk')
+    updated = 0
+    last_pk = 0
+
+    while True:
+        user_ids = list(candidates.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        last_pk = user_ids[-1]
+
+        with db_transaction.atomic():
+            list(User.objects.select_for_update().filter(pk__in=user_ids).values_list('pk', flat=True))
+            actual = _actual_aggregates()
+            unchanged = Q()
+            for field in RATING_AGGREGATE_FIELDS:
+                unchanged &= Q(**{field: F(f'actual_{field}')})
+            changed = list(
+                User.objects.filter(pk__in=user_ids)
+                .annotate(**{f'actual_{field}': expression for field, expression in actual.items()})
+                .exclude(unchanged)
+                .values_list('pk', flat=True)
+            )
+            if changed:
+                updated += User.objects.filter(pk__in=changed).update(trust_score_dirty=True, **actual)
+
+    return updated
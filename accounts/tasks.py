@@ -0,0 +1,24 @@
+"""
+Celery tasks for accounts
+- Batch trust score recalculation
+"""
+from celery import shared_task
+from .trust import recalculate_trust_scores
+
+
+@shared_task
+def recalculate_dirty_trust_scores():
+    """
+    Rescore users whose activity changed since the last run
+    Runs every 10 minutes via Celery Beat
+    """
+    return recalculate_trust_scores(only_dirty=True)
+
+
+@shared_task
+def recalculate_all_trust_scores():
+    """
+    Rescore every user so recency decay is applied to inactive accounts
+    Runs nightly via Celery Beat
+    """
+    return recalculate_trust_scores(only_dirty=False)
@@ -0,0 +1,55 @@
+"""
+Tests for accounts app
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+
+from transactions.models import Transaction
+
+from .models import User, UserRating
+from .ratings import recompute_rating_aggregates, submit_rating
+
+
+class RatingAggregateTests(TestCase):
+
+    def setUp(self):
+        self.rated = User.objects.create_user(
+            username='rated', email='rated@example.com', phone_number='08200000001', password='x-secret-1',
+        )
+        self.raters = [
+            User.objects.create_user(
+                username=f'rater{n}', email=f'rater{n}@example.com', phone_number=f'0820000001{n}',
+                password='x-secret-1',
+            )
+            for n in range(3)
+        ]
+
+    def rate(self, rater, stars):
+        transaction = Transaction.objects.create(
+            client=rater, service_provider=self.rated, amount=Decimal('1000.00'), service_description='Rated work',
+        )
+        return submit_rating(transaction, rater, stars)
+
+    def test_recompute_repairs_drifted_aggregates(self):
+        self.rate(self.raters[0], 5)
+        self.rate(self.raters[1], 3)
+        User.objects.filter(pk=self.rated.pk).update(
+            rating_count=7, rating_sum=1, rating_5_count=0, trust_score_dirty=False,
+        )
+
+        self.assertEqual(recompute_rating_aggregates(chunk_size=1), 1)
+
+        rated = User.objects.get(pk=self.rated.pk)
+        self.assertEqual((rated.rating_count, rated.rating_sum), (2, 8))
+        self.assertEqual((rated.rating_5_count, rated.rating_3_count, rated.rating_1_count), (1, 1, 0))
+        self.assertTrue(rated.trust_score_dirty)
+        self.assertEqual(recompute_rating_aggregates(), 0)
+
+    def test_users_without_ratings_are_reset(self):
+        self.rate(self.raters[0], 4)
+        UserRating.objects.all().delete()
+
+        self.assertEqual(recompute_rating_aggregates(), 1)
+        rated = User.objects.get(pk=self.rated.pk)
+        self.assertEqual((rated.rating_count, rated.rating_sum, rated.rating_4_count), (0, 0, 0))
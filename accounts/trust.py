@@ -0,0 +1,165 @@
+"""
+Batch trust-score engine
+Scores are recomputed for many users at once instead of on every event:
+per-user aggregates come from grouped queries per chunk, scores are
+computed with NumPy arrays and written back with bulk_update.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction as db_transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from transactions.models import Transaction
+
+from .models import User
+
+
+# Bayesian prior for star ratings: a new user behaves as if they already
+# had PRIOR_WEIGHT ratings averaging PRIOR_MEAN
+PRIOR_MEAN = 3.5
+PRIOR_WEIGHT = 5.0
+
+DISPUTE_PENALTY = 0.6
+REFUND_PENALTY = 0.4
+EXPERIENCE_SCALE = 10.0      # completions for ~63% of the experience bonus
+RECENCY_HALF_LIFE_DAYS = 180.0
+
+
+def compute_trust_scores(completed, disputed, refunded, rating_count, rating_sum, days_inactive):
+    """
+    Vectorized trust score on a 0.00 - 5.00 scale.
+
+    All arguments are equal-length arrays, one element per user.
+    `days_inactive` is NaN for users who have never completed a transaction.
+
+    Returns:
+        np.ndarray: scores rounded to 2 decimal places
+    """
+    completed = np.asarray(completed, dtype=np.float64)
+    disputed = np.asarray(disputed, dtype=np.float64)
+    refunded = np.asarray(refunded, dtype=np.float64)
+    rating_count = np.asarray(rating_count, dtype=np.float64)
+    rating_sum = np.asarray(rating_sum, dtype=np.float64)
+    days_inactive = np.asarray(days_inactive, dtype=np.float64)
+
+    # Quality: smoothed average rating
+    rating = (rating_sum + PRIOR_MEAN * PRIOR_WEIGHT) / (rating_count + PRIOR_WEIGHT)
+
+    # Reliability: share of jobs that ended in a dispute or a refund
+    dispute_rate = disputed / np.maximum(completed + disputed, 1)
+    refund_rate = refunded / np.maximum(completed + refunded, 1)
+    reliability = np.clip(1 - DISPUTE_PENALTY * dispute_rate - REFUND_PENALTY * refund_rate, 0, 1)
+
+    # Track record: more completions and recent activity earn the full score
+    experience = 1 - np.exp(-completed / EXPERIENCE_SCALE)
+    recency = np.where(
+        np.isnan(days_inactive),
+        0.0,
+        np.exp2(-np.nan_to_num(days_inactive) / RECENCY_HALF_LIFE_DAYS),
+    )
+
+    scores = rating * reliability * (0.7 + 0.2 * experience + 0.1 * recency)
+
+    # No history at all: no score, as before
+    scores = np.where((completed + disputed + refunded + rating_count) == 0, 0.0, scores)
+    return np.round(np.clip(scores, 0, 5), 2)
+
+
+def _trust_inputs(user_ids):
+    """
+    Per-user aggregates for a chunk of users: one grouped query per role,
+    plus the denormalized rating columns.
+
+    Completions and last activity count on both sides of a transaction;
+    disputes and refunds only count against the service provider.
+    """
+    released = Q(status='RELEASED')
+    as_provider = {
+        row['service_provider_id']: row
+        for row in Transaction.objects.filter(service_provider_id__in=user_ids).values('service_provider_id').annotate(
+            completed=Count('pk', filter=released),
+            disputed=Count('pk', filter=Q(dispute_raised_at__isnull=False)),
+            refunded=Count('pk', filter=Q(status='REFUNDED')),
+            last_released_at=Max('released_at'),
+        ).order_by()
+    }
+    as_client = {
+        row['client_id']: row
+        for row in Transaction.objects.filter(client_id__in=user_ids).values('client_id').annotate(
+            completed=Count('pk', filter=released),
+            last_released_at=Max('released_at'),
+        ).order_by()
+    }
+
+    rows = []
+    for pk, rating_count, rating_sum in User.objects.filter(pk__in=user_ids).values_list(
+        'pk', 'rating_count', 'rating_sum',
+    ).order_by():
+        provider = as_provider.get(pk, {})
+        client = as_client.get(pk, {})
+        last_released = [at for at in (provider.get('last_released_at'), client.get('last_released_at')) if at]
+        rows.append((
+            pk,
+            provider.get('completed', 0) + client.get('completed', 0),
+            provider.get('disputed', 0),
+            provider.get('refunded', 0),
+            rating_count,
+            rating_sum,
+            max(last_released) if last_released else None,
+        ))
+    return rows
+
+
+def recalculate_trust_scores(only_dirty=True, chunk_size=2000):
+    """
+    Recompute trust scores in chunks.
+
+    Args:
+        only_dirty: limit the run to users flagged by update_trust_score()
+        chunk_size: users per grouped query / bulk_update
+
+    Returns:
+        int: number of users scored
+    """
+    users = User.objects.order_by('pk')
+    if only_dirty:
+        users = users.filter(trust_score_dirty=True)
+
+    now = timezone.now()
+    scored = 0
+    last_pk = 0
+
+    while True:
+        user_ids = list(users.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+        if not user_ids:
+            break
+        last_pk = user_ids[-1]
+
+        with db_transaction.atomic():
+            # Clear the flags before reading the inputs: activity that lands
+            # while the chunk is scored sets them again for the next run
+            User.objects.filter(pk__in=user_ids, trust_score_dirty=True).update(trust_score_dirty=False)
+
+            rows = _trust_inputs(user_ids)
+            pks, completed, disputed, refunded, rating_count, rating_sum, last_released = zip(*rows)
+            days_inactive = [
+                (now - released_at).total_seconds() / 86400 if released_at else np.nan
+                for released_at in last_released
+            ]
+
+            scores = compute_trust_scores(
+                completed, disputed, refunded, rating_count, rating_sum, days_inactive
+            )
+
+            User.objects.bulk_update(
+                [
+                    User(pk=pk, trust_score=Decimal(f'{score:.2f}'))
+                    for pk, score in zip(pks, scores.tolist())
+                ],
+                ['trust_score'],
+            )
+        scored += len(pks)
+
+    return scored
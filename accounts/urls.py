@@ -14,4 +14,5 @@ urlpatterns = [
     path('profile/edit/', views.edit_profile_view, name='edit_profile'),
     path('profile/bank-details/', views.bank_details_view, name='bank_details'),
     path('user/<int:user_id>/', views.public_profile_view, name='public_profile'),
+    path('rate/<int:transaction_id>/', views.rate_user_view, name='rate_user'),
 ]
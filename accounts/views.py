@@ -8,11 +8,28 @@ from django.contrib import messages
 from django.views.generic import CreateView, UpdateView, DetailView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction as db_transaction
+from core.models import SiteSettings
+from payments.tasks import resolve_bank_account
+from transactions.models import Transaction
 from .models import User, UserRating
 from .forms import (
     UserRegistrationForm, UserLoginForm, UserProfileForm, 
     BankDetailsForm, RatingForm
 )
+from .ratings import can_rate, submit_rating
+
+
+RATINGS_PER_PAGE = 10
+
+
+def get_ratings_page(request, user):
+    """One page of a user's reviews; the total comes from the aggregates, not COUNT(*)"""
+    ratings = UserRating.objects.filter(rated_user=user).select_related('rater')
+    paginator = Paginator(ratings, RATINGS_PER_PAGE)
+    paginator.count = user.rating_count
+    return paginator.get_page(request.GET.get('page'))
 
 
 def register_view(request):
@@ -20,6 +37,11 @@ def register_view(request):
     if request.user.is_authenticated:
         return redirect('core:dashboard')
     
+    site_config = SiteSettings.load()
+    if site_config is not None and not site_config.allow_new_registrations:
+        messages.info(request, 'New registrations are temporarily closed. Please check back soon.')
+        return redirect('core:home')
+    
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
@@ -67,12 +89,11 @@ def logout_view(request):
 def profile_view(request):
     """User profile view"""
     user = request.user
-    ratings = UserRating.objects.filter(rated_user=user)
     
     context = {
         'user': user,
-        'ratings': ratings,
-        'avg_rating': sum([r.rating for r in ratings]) / len(ratings) if ratings else 0,
+        'ratings': get_ratings_page(request, user),
+        'avg_rating': user.average_rating,
     }
     return render(request, 'accounts/profile.html', context)
 
@@ -98,8 +119,16 @@ def bank_details_view(request):
     if request.method == 'POST':
         form = BankDetailsForm(request.POST, instance=request.user)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Your bank details have been saved successfully!')
+            user = form.save()
+            if user.bank_account_verified:
+                messages.success(request, 'Your bank details have been saved successfully!')
+            else:
+                # Confirm the account name with Paystack off the request path
+                db_transaction.on_commit(lambda: resolve_bank_account.delay(user.pk))
+                messages.success(
+                    request,
+                    'Your bank details have been saved. We are confirming the account name with your bank.'
+                )
             return redirect('accounts:profile')
     else:
         form = BankDetailsForm(instance=request.user)
@@ -110,11 +139,57 @@ def bank_details_view(request):
 def public_profile_view(request, user_id):
     """View other user's public profile"""
     user = get_object_or_404(User, id=user_id)
-    ratings = UserRating.objects.filter(rated_user=user)
     
     context = {
         'profile_user': user,
-        'ratings': ratings,
-        'avg_rating': sum([r.rating for r in ratings]) / len(ratings) if ratings else 0,
+        'ratings': get_ratings_page(request, user),
+        'avg_rating': user.average_rating,
     }
     return render(request, 'accounts/public_profile.html', context)
+
+
+@login_required
+def rate_user_view(request, transaction_id):
+    """Rate the other party after payment has been released"""
+    transaction = get_object_or_404(
+        Transaction.objects.select_related('client', 'service_provider'),
+        id=transaction_id
+    )
+    
+    if not can_rate(transaction, request.user):
+        messages.error(request, 'You can only rate the other party once payment has been released.')
+        return redirect('transactions:detail', transaction_id=transaction.id)
+    
+    if UserRating.objects.filter(transaction=transaction, rater=request.user).exists():
+        messages.info(request, 'You have already rated this transaction.')
+        return redirect('transactions:detail', transaction_id=transaction.id)
+    
+    if request.user == transaction.client:
+        rated_user = transaction.service_provider
+    else:
+        rated_user = transaction.client
+    
+    if request.method == 'POST':
+        form = RatingForm(request.POST)
+        if form.is_valid():
+            try:
+                submit_rating(
+                    transaction,
+                    request.user,
+                    form.cleaned_data['rating'],
+                    form.cleaned_data['review'],
+                )
+            except IntegrityError:
+                # Double submit raced past the check above
+                messages.info(request, 'You have already rated this transaction.')
+                return redirect('transactions:detail', transaction_id=transaction.id)
+            messages.success(request, f'Thanks! Your rating for {rated_user.get_full_name()} has been saved.')
+            return redirect('transactions:detail', transaction_id=transaction.id)
+    else:
+        form = RatingForm()
+    
+    return render(request, 'accounts/rate_user.html', {
+        'form': form,
+        'transaction': transaction,
+        'rated_user': rated_user,
+    })
@@ -0,0 +1,25 @@
+"""
+ASGI config for SafeRelease Nigeria platform.
+
+Serves the async Paystack views, so a slow gateway doesn't tie up a worker:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+
+That only holds while the whole middleware stack is async-capable. One
+sync-only middleware makes Django run every request on a thread, blocked
+for the full Paystack call. The project's own middlewares are
+async-capable; WhiteNoise is not, so it is left out here
+(STATIC_VIA_WHITENOISE) and /static/ has to be served by the proxy or CDN,
+e.g. from `collectstatic` output.
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('PAYSTACK_ASYNC_VIEWS', 'True')
+os.environ.setdefault('STATIC_VIA_WHITENOISE', 'False')
+
+application = get_asgi_application()
+
+app = application
@@ -4,6 +4,7 @@ Celery configuration for async tasks (auto-release, notifications, etc.)
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
@@ -11,6 +12,9 @@ app = Celery('SafeRelease')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+# Runtime, queue lag, retry and item metrics for every task
+import core.task_metrics  # noqa: E402,F401
+
 # Periodic Tasks
 app.conf.beat_schedule = {
     'check-auto-release-transactions': {
@@ -21,8 +25,39 @@ app.conf.beat_schedule = {
         'task': 'transactions.tasks.send_pending_notifications',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    'recalculate-dirty-trust-scores': {
+        'task': 'accounts.tasks.recalculate_dirty_trust_scores',
+        'schedule': crontab(minute='*/10'),  # Every 10 minutes
+    },
+    'recalculate-all-trust-scores': {
+        'task': 'accounts.tasks.recalculate_all_trust_scores',
+        'schedule': crontab(hour=2, minute=0),  # Nightly
+    },
+    'refresh-bank-directory': {
+        'task': 'payments.tasks.refresh_bank_directory',
+        'schedule': crontab(hour=3, minute=0),  # Daily
+    },
+    'sweep-pending-payments': {
+        'task': 'payments.tasks.sweep_pending_payments',
+        'schedule': crontab(minute='*/10'),  # Every 10 minutes
+    },
+    'run-payouts': {
+        'task': 'payments.tasks.run_payouts',
+        'schedule': crontab(hour=9, minute=0),  # Daily, in banking hours
+    },
 }
 
+
+@worker_process_init.connect
+def configure_worker_database(**kwargs):
+    """Use the relaxed statement timeout for batch jobs and drop inherited connections"""
+    from django.db import connections
+    from core.db import use_task_statement_timeout
+
+    use_task_statement_timeout()
+    connections.close_all()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
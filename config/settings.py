@@ -2,6 +2,7 @@
 Django settings for SafeRelease Nigeria platform.
 """
 import os
+from decimal import Decimal
 from pathlib import Path
 from decouple import config
 import cloudinary
@@ -40,9 +41,17 @@ INSTALLED_APPS = [
     'crispy_bootstrap5',
 ]
 
+# WhiteNoise is sync-only: under ASGI it would put every request, async
+# views included, on a thread for its whole duration. config/asgi.py turns
+# it off, so /static/ must come from the proxy or CDN there.
+STATIC_VIA_WHITENOISE = config('STATIC_VIA_WHITENOISE', default=True, cast=bool)
+
+# Every middleware here is async-capable except WhiteNoise (see above)
 MIDDLEWARE = [
+    'core.middleware.RequestInstrumentationMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    *(['whitenoise.middleware.WhiteNoiseMiddleware'] if STATIC_VIA_WHITENOISE else []),
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,13 +59,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.MaintenanceModeMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to core.instrumentation
+        'BACKEND': 'core.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -71,14 +82,78 @@ TEMPLATES = [
     },
 ]
 
+# Slow-query log (core.slow_queries): queries slower than SLOW_QUERY_MS
+# (0 disables) are recorded with their plan, re-captured after
+# SLOW_QUERY_REPLAN_HOURS; EXPLAIN ANALYZE runs under its own timeout
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=200, cast=int)
+SLOW_QUERY_REPLAN_HOURS = config('SLOW_QUERY_REPLAN_HOURS', default=24, cast=int)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = config('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', default=10000, cast=int)
+
+# Per-request instrumentation (core.middleware.RequestInstrumentationMiddleware):
+# requests over these budgets are logged at WARNING; 0 disables a budget and
+# @request_budget overrides them per view
+REQUEST_QUERY_BUDGET = config('REQUEST_QUERY_BUDGET', default=30, cast=int)
+REQUEST_TIME_BUDGET_MS = config('REQUEST_TIME_BUDGET_MS', default=500, cast=int)
+REQUEST_SERVER_TIMING = config('REQUEST_SERVER_TIMING', default=True, cast=bool)
+REQUEST_LOG_LEVEL = config('REQUEST_LOG_LEVEL', default='INFO')
+
+# On-demand profiling (core.profiler): token lifetime (seconds) and the
+# number of stored profiles kept
+PROFILER_TOKEN_MAX_AGE = config('PROFILER_TOKEN_MAX_AGE', default=3600, cast=int)
+PROFILER_KEEP = config('PROFILER_KEEP', default=200, cast=int)
+
+# Bearer token Prometheus must send to /metrics; empty disables the
+# endpoint (404), except under DEBUG
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per request
+        'core.requests': {
+            'handlers': ['console'],
+            'level': REQUEST_LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database configuration
 DATABASE_URL = config('DATABASE_URL', default=None)
+
+# Persistent connections: seconds to keep a connection open between
+# requests (0 closes after every request)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+# Set when DATABASE_URL points at PgBouncer (or Neon's pooled endpoint) in
+# transaction mode: server-side cursors and session-level SETs don't survive there
+DB_POOLED = config('DB_POOLED', default=False, cast=bool)
+
+# Statement timeouts in milliseconds (0 disables). Web requests are strict,
+# Celery workers get the relaxed value for batch jobs.
+DB_STATEMENT_TIMEOUT_MS = config('DB_STATEMENT_TIMEOUT_MS', default=5000, cast=int)
+DB_TASK_STATEMENT_TIMEOUT_MS = config('DB_TASK_STATEMENT_TIMEOUT_MS', default=300000, cast=int)
+
+# Connection setup slower than this is reported as a warning by `manage.py check --database default`
+DB_CONNECT_WARN_MS = config('DB_CONNECT_WARN_MS', default=250, cast=int)
+
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
+        'default': dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
     }
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = DB_POOLED
 else:
     DATABASES = {
         'default': {
@@ -148,6 +223,36 @@ PAYSTACK_SECRET_KEY = config('PAYSTACK_SECRET_KEY', default='sk_test_3e89989f81e
 PAYSTACK_PUBLIC_KEY = config('PAYSTACK_PUBLIC_KEY', default='pk_test_82cbf50854af160f931f8b9e6f9c84af8489536e')
 PAYSTACK_CALLBACK_URL = config('SITE_URL', default='http://localhost:8000') + '/payments/verify/'
 
+# API root; point at `manage.py paystack_simulator` to run offline
+PAYSTACK_BASE_URL = config('PAYSTACK_BASE_URL', default='https://api.paystack.co')
+
+# Paystack HTTP client: keep-alive connections per worker process, separate
+# connect/read timeouts (seconds) and retries for idempotent GETs
+PAYSTACK_POOL_SIZE = config('PAYSTACK_POOL_SIZE', default=10, cast=int)
+PAYSTACK_CONNECT_TIMEOUT = config('PAYSTACK_CONNECT_TIMEOUT', default=3.05, cast=float)
+PAYSTACK_READ_TIMEOUT = config('PAYSTACK_READ_TIMEOUT', default=20, cast=float)
+PAYSTACK_MAX_RETRIES = config('PAYSTACK_MAX_RETRIES', default=2, cast=int)
+PAYSTACK_RETRY_BACKOFF = config('PAYSTACK_RETRY_BACKOFF', default=0.25, cast=float)
+
+# Async gateway views (payments.async_views) for ASGI workers; config/asgi.py
+# turns them on. PAYSTACK_ASYNC_POOL_SIZE caps in-flight calls per event loop.
+PAYSTACK_ASYNC_VIEWS = config('PAYSTACK_ASYNC_VIEWS', default=False, cast=bool)
+PAYSTACK_ASYNC_POOL_SIZE = config('PAYSTACK_ASYNC_POOL_SIZE', default=200, cast=int)
+
+# Resolved account names are reused for this long (seconds) per bank account
+ACCOUNT_RESOLUTION_TTL = config('ACCOUNT_RESOLUTION_TTL', default=7 * 86400, cast=int)
+
+# Payouts: wallets at or above this balance are swept to the bank
+PAYOUT_MIN_AMOUNT = config('PAYOUT_MIN_AMOUNT', default=Decimal('1000.00'), cast=Decimal)
+
+# Stuck PENDING payment sweeper (payments.sweeper): re-verify payments
+# between PAYMENT_SWEEP_AFTER_MINUTES and PAYMENT_SWEEP_MAX_AGE_HOURS old,
+# cancel ones Paystack reports abandoned after PAYMENT_ABANDON_HOURS
+PAYMENT_SWEEP_AFTER_MINUTES = config('PAYMENT_SWEEP_AFTER_MINUTES', default=15, cast=int)
+PAYMENT_SWEEP_MAX_AGE_HOURS = config('PAYMENT_SWEEP_MAX_AGE_HOURS', default=72, cast=int)
+PAYMENT_ABANDON_HOURS = config('PAYMENT_ABANDON_HOURS', default=24, cast=int)
+PAYMENT_SWEEP_WORKERS = config('PAYMENT_SWEEP_WORKERS', default=8, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -156,6 +261,58 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Run tasks inline in the calling process instead of on a worker. Only for
+# local development without a broker: webhooks, account resolution and
+# payouts then run inside the request that queued them.
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
+
+# Webhook events get their own queue (and worker) so bursts don't wait
+# behind batch jobs: celery -A config worker -Q webhooks
+CELERY_TASK_ROUTES = {
+    'payments.tasks.process_webhook_event': {'queue': 'webhooks'},
+}
+
+# Port a worker serves its task metrics on (core.task_metrics); 0 disables
+WORKER_METRICS_PORT = config('WORKER_METRICS_PORT', default=0, cast=int)
+
+# Cache configuration
+# Redis (shared with Celery) is the L2 behind core.cache's in-process L1.
+# Without CACHE_REDIS_URL or REDIS_URL the cache is per-process memory.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=config('REDIS_URL', default=''))
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'saferelease',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'socket_connect_timeout': 1,
+                'socket_timeout': 1,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+TIERED_CACHE_L1_MAX_ENTRIES = config('TIERED_CACHE_L1_MAX_ENTRIES', default=1024, cast=int)
+TIERED_CACHE_L1_TIMEOUT = config('TIERED_CACHE_L1_TIMEOUT', default=30, cast=int)
+TIERED_CACHE_CHANNEL = 'saferelease:cache:invalidate'
+
+# Anonymous full-page cache for marketing pages (seconds)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=3600, cast=int)
+PAGE_CACHE_BROWSER_MAX_AGE = config('PAGE_CACHE_BROWSER_MAX_AGE', default=60, cast=int)
+PAGE_CACHE_CDN_MAX_AGE = config('PAGE_CACHE_CDN_MAX_AGE', default=600, cast=int)
+PAGE_CACHE_WARM_URLS = [
+    'core:home', 'core:how_it_works', 'core:about', 'core:faq',
+    'core:contact', 'core:terms', 'core:privacy', 'core:love_page',
+]
+
 
 
 # Platform Settings
@@ -183,13 +340,14 @@ MAX_TRANSACTION_AMOUNT = 500000  # ₦500,000
 
 
 
-CELERY_TASK_ALWAYS_EAGER = True
-CELERY_TASK_EAGER_PROPAGATES = True
 
 # Security Settings
 SESSION_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_SECURE = not DEBUG
-SECURE_SSL_REDIRECT = not DEBUG
+# Overridable so local tools (payments simulator, load tests) can talk plain HTTP
+SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=not DEBUG, cast=bool)
+# Prometheus scrapes workers directly over plain HTTP
+SECURE_REDIRECT_EXEMPT = [r'^metrics$']
 SECURE_HSTS_SECONDS = 31536000 if not DEBUG else 0
 SECURE_HSTS_INCLUDE_SUBDOMAINS = not DEBUG
 SECURE_HSTS_PRELOAD = not DEBUG
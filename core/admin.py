@@ -2,7 +2,11 @@
 Admin configuration for core app
 """
 from django.contrib import admin
-from .models import SiteSettings, FAQ, Testimonial
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import SiteSettings, FAQ, Testimonial, RequestProfile, SlowQuery
 
 
 @admin.register(SiteSettings)
@@ -31,3 +35,98 @@ class TestimonialAdmin(admin.ModelAdmin):
     list_filter = ['rating', 'is_featured', 'created_at']
     search_fields = ['name', 'role', 'content']
     list_editable = ['is_featured']
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles captured by core.profiler; read-only"""
+    list_display = ['created_at', 'method', 'path', 'view_name', 'status_code',
+                    'duration_ms', 'query_count', 'db_ms', 'user']
+    list_filter = ['view_name', 'method', 'created_at']
+    search_fields = ['path', 'view_name']
+    date_hierarchy = 'created_at'
+    list_select_related = ['user']
+    fields = ['created_at', 'user', 'method', 'path', 'view_name', 'status_code',
+              'duration_ms', 'query_count', 'db_ms', 'download', 'formatted_report', 'formatted_sql_log']
+    readonly_fields = fields
+    
+    def get_queryset(self, request):
+        # The changelist never needs the blobs
+        queryset = super().get_queryset(request)
+        if request.resolver_match.url_name.endswith('changelist'):
+            queryset = queryset.defer('report', 'stats', 'sql_log')
+        return queryset
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/pstats/',
+                self.admin_site.admin_view(self.download_stats),
+                name='core_requestprofile_pstats',
+            ),
+        ] + super().get_urls()
+    
+    def download_stats(self, request, pk):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(bytes(profile.stats), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.pstats"'
+        return response
+    
+    @admin.display(description='pstats file')
+    def download(self, obj):
+        url = reverse('admin:core_requestprofile_pstats', args=[obj.pk])
+        return format_html('<a href="{}">profile-{}.pstats</a> (snakeviz, flameprof)', url, obj.pk)
+    
+    @admin.display(description='Report')
+    def formatted_report(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.report)
+    
+    @admin.display(description='SQL log')
+    def formatted_sql_log(self, obj):
+        rows = format_html_join(
+            '', '<tr><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+            ((index, entry['ms'], entry['sql']) for index, entry in enumerate(obj.sql_log, 1)),
+        )
+        return format_html('<table><tr><th>#</th><th>ms</th><th>SQL</th></tr>{}</table>', rows)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Slow statements recorded by core.slow_queries; read-only"""
+    list_display = ['short_sql', 'count', 'mean', 'max_ms', 'origin', 'last_seen', 'has_plan']
+    list_filter = ['vendor', 'origin', 'last_seen']
+    search_fields = ['normalized_sql', 'origin']
+    date_hierarchy = 'last_seen'
+    fields = ['fingerprint', 'vendor', 'origin', 'count', 'mean', 'max_ms', 'first_seen', 'last_seen',
+              'normalized_sql', 'sample_sql', 'sample_params', 'plan_captured_at', 'plan_error', 'formatted_plan']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.normalized_sql[:120]
+    
+    @admin.display(description='Mean ms')
+    def mean(self, obj):
+        return f'{obj.mean_ms:.1f}'
+    
+    @admin.display(description='Plan', boolean=True)
+    def has_plan(self, obj):
+        return bool(obj.plan)
+    
+    @admin.display(description='Plan')
+    def formatted_plan(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.plan)
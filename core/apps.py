@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        import core.checks
+        import core.db
+        import core.instrumentation
+        import core.profiler
+        import core.signals
+        import core.slow_queries
+
+        from payments import paystack
+        from . import instrumentation, metrics
+        paystack.latency_observers.append(instrumentation.record_paystack_call)
+        paystack.latency_observers.append(metrics.record_paystack_call)
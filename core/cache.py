@@ -0,0 +1,410 @@
+"""
+Tiered cache: small in-process LRU (L1) in front of the shared cache (L2, Redis)
+
+Usage:
+    dashboard_cache = CacheNamespace('dashboard', timeout=300)
+    stats = dashboard_cache.get_or_set(user.id, lambda: compute_stats(user))
+    dashboard_cache.delete(user.id)     # one key, every process
+    dashboard_cache.invalidate()        # whole namespace, every process
+
+- Keys are versioned per namespace; invalidate() bumps the version so old
+  entries in Redis simply stop being read and expire on their own
+- Deletes and invalidations are broadcast over Redis pub/sub so other
+  processes drop their L1 copies immediately (L1 entries also expire after
+  a short TTL in case a message is missed)
+- get_or_set() is single-flight: one thread per process and one process per
+  key recomputes a missing value while the others wait for it;
+  aget_or_set() is the same for coroutines (one task per event loop)
+- Hit/miss counters are kept per namespace, see cache_stats()
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+_namespaces = {}
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+l1 = LRUCache(getattr(settings, 'TIERED_CACHE_L1_MAX_ENTRIES', 1024))
+
+# Longest wait, in seconds, between reconnects of the invalidation listener
+MAX_RECONNECT_DELAY = 60
+
+
+class _InvalidationBus:
+    """Redis pub/sub channel carrying deletes and namespace invalidations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._client = None
+
+    @property
+    def enabled(self):
+        return bool(getattr(settings, 'CACHE_REDIS_URL', ''))
+
+    @property
+    def channel(self):
+        return getattr(settings, 'TIERED_CACHE_CHANNEL', 'saferelease:cache:invalidate')
+
+    def _ensure_started(self):
+        # (Re)start after a fork: gunicorn and Celery fork workers after import
+        if self._pid == os.getpid():
+            return self._client
+        with self._lock:
+            if self._pid == os.getpid():
+                return self._client
+            import redis
+
+            self._client = redis.Redis.from_url(settings.CACHE_REDIS_URL)
+            listener = threading.Thread(
+                target=self._listen, name='tiered-cache-invalidation', daemon=True
+            )
+            listener.start()
+            self._pid = os.getpid()
+            return self._client
+
+    def start(self):
+        if not self.enabled:
+            return
+        try:
+            self._ensure_started()
+        except Exception:
+            logger.exception('Could not start cache invalidation listener')
+
+    def publish(self, namespace, key=None):
+        if not self.enabled:
+            return
+        try:
+            client = self._ensure_started()
+            client.publish(self.channel, json.dumps({'ns': namespace, 'key': key}))
+        except Exception:
+            logger.warning('Could not publish cache invalidation for %s', namespace, exc_info=True)
+
+    def _listen(self):
+        failures = 0
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if failures:
+                    # Anything published while disconnected was missed; drop L1 to be safe
+                    l1.clear()
+                    logger.info('Cache invalidation listener reconnected after %d attempts', failures)
+                    failures = 0
+                for message in pubsub.listen():
+                    self._apply(message.get('data'))
+            except Exception:
+                failures += 1
+                # One traceback per outage; the retries back off up to a minute apart
+                if failures == 1:
+                    logger.warning('Cache invalidation listener disconnected, retrying', exc_info=True)
+                else:
+                    logger.debug('Cache invalidation listener still disconnected (attempt %d)', failures)
+                time.sleep(min(2 ** (failures - 1), MAX_RECONNECT_DELAY))
+
+    def _apply(self, data):
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        namespace = payload.get('ns')
+        if payload.get('key') is None:
+            l1.delete_namespace(namespace)
+        else:
+            l1.delete((namespace, payload['key']))
+
+
+bus = _InvalidationBus()
+
+
+class CacheNamespace:
+    """A versioned group of keys cached in L1 and L2"""
+
+    def __init__(self, name, timeout=300, l1_timeout=None, lock_timeout=10):
+        self.name = name
+        self.timeout = timeout
+        self.l1_timeout = l1_timeout or getattr(settings, 'TIERED_CACHE_L1_TIMEOUT', 30)
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # aget_or_set's in-flight futures, per event loop (futures are bound to one)
+        self._ainflight = weakref.WeakKeyDictionary()
+        self._stats = defaultdict(int)
+        self._stats_lock = threading.Lock()
+        _namespaces[name] = self
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+    # Versioning
+
+    @property
+    def _version_key(self):
+        return f'{self.name}:__version__'
+
+    def version(self):
+        version = l1.get((self.name, '__version__'))
+        if version is MISSING:
+            try:
+                version = cache.get(self._version_key)
+                if version is None:
+                    cache.add(self._version_key, 1, timeout=None)
+                    version = cache.get(self._version_key) or 1
+            except Exception:
+                logger.warning('L2 unavailable reading version of %s', self.name, exc_info=True)
+                self._count('errors')
+                version = 1
+            l1.set((self.name, '__version__'), version, self.l1_timeout)
+        return version
+
+    def _l2_key(self, key, version):
+        return f'{self.name}:v{version}:{key}'
+
+    # Reads and writes
+
+    def _read(self, key):
+        """Return (value, version); value is MISSING when neither tier has it"""
+        bus.start()
+        version = self.version()
+
+        entry = l1.get((self.name, key))
+        if entry is not MISSING and entry[0] == version:
+            self._count('l1_hits')
+            return entry[1], version
+
+        try:
+            wrapped = cache.get(self._l2_key(key, version))
+        except Exception:
+            logger.warning('L2 unavailable reading %s:%s', self.name, key, exc_info=True)
+            self._count('errors')
+            wrapped = None
+
+        if wrapped is not None:
+            self._count('l2_hits')
+            l1.set((self.name, key), (version, wrapped[0]), self.l1_timeout)
+            return wrapped[0], version
+
+        self._count('misses')
+        return MISSING, version
+
+    def _write(self, key, value, version, timeout):
+        l1.set((self.name, key), (version, value), min(self.l1_timeout, timeout))
+        try:
+            # Wrapped so that None is a cacheable value
+            cache.set(self._l2_key(key, version), (value,), timeout)
+        except Exception:
+            logger.warning('L2 unavailable writing %s:%s', self.name, key, exc_info=True)
+            self._count('errors')
+
+    def get(self, key, default=None):
+        value, _ = self._read(key)
+        return default if value is MISSING else value
+
+    def set(self, key, value, timeout=None):
+        self._write(key, value, self.version(), timeout or self.timeout)
+
+    def delete(self, key):
+        """Remove one key from both tiers in every process"""
+        l1.delete((self.name, key))
+        try:
+            cache.delete(self._l2_key(key, self.version()))
+        except Exception:
+            logger.warning('L2 unavailable deleting %s:%s', self.name, key, exc_info=True)
+            self._count('errors')
+        bus.publish(self.name, key)
+
+    def invalidate(self):
+        """Drop every key in the namespace, in every process"""
+        try:
+            cache.add(self._version_key, 1, timeout=None)
+            cache.incr(self._version_key)
+        except Exception:
+            logger.warning('L2 unavailable invalidating %s', self.name, exc_info=True)
+            self._count('errors')
+        l1.delete_namespace(self.name)
+        bus.publish(self.name)
+        self._count('invalidations')
+
+    def get_or_set(self, key, compute, timeout=None):
+        """Return the cached value, computing it at most once across processes"""
+        value, version = self._read(key)
+        if value is not MISSING:
+            return value
+
+        # Single flight within the process: followers wait for the leader
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(self.lock_timeout)
+            value, version = self._read(key)
+            if value is not MISSING:
+                return value
+            return self._compute(key, compute, version, timeout)
+
+        try:
+            return self._compute_once(key, compute, version, timeout)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _compute_once(self, key, compute, version, timeout):
+        # Single flight across processes: the holder of the L2 lock computes,
+        # everyone else polls L2 until the value shows up
+        lock_key = f'{self._l2_key(key, version)}:lock'
+        try:
+            acquired = cache.add(lock_key, 1, self.lock_timeout)
+        except Exception:
+            self._count('errors')
+            acquired = True
+
+        if acquired:
+            try:
+                return self._compute(key, compute, version, timeout)
+            finally:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    pass
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value, version = self._read(key)
+            if value is not MISSING:
+                return value
+        return self._compute(key, compute, version, timeout)
+
+    def _compute(self, key, compute, version, timeout):
+        self._count('computes')
+        value = compute()
+        self._write(key, value, version, timeout or self.timeout)
+        return value
+
+    async def aget_or_set(self, key, compute, timeout=None):
+        """
+        get_or_set for async code: `compute` returns an awaitable, which runs
+        on the event loop; the cache itself is read and written off it.
+        """
+        value, version = await sync_to_async(self._read)(key)
+        if value is not MISSING:
+            return value
+
+        # Single flight within the event loop: followers await the leader's future
+        inflight = self._ainflight.setdefault(asyncio.get_running_loop(), {})
+        future = inflight.get(key)
+        if future is not None:
+            value = await asyncio.shield(future)
+            if value is not MISSING:
+                return value
+            # The leader failed: compute for ourselves
+            return await self._acompute(key, compute, version, timeout)
+
+        future = inflight[key] = asyncio.get_running_loop().create_future()
+        value = MISSING
+        try:
+            value = await self._acompute_once(key, compute, version, timeout)
+            return value
+        finally:
+            inflight.pop(key, None)
+            future.set_result(value)
+
+    async def _acompute_once(self, key, compute, version, timeout):
+        # Same L2 lock as _compute_once, so sync and async callers share it
+        lock_key = f'{self._l2_key(key, version)}:lock'
+        try:
+            acquired = await sync_to_async(cache.add)(lock_key, 1, self.lock_timeout)
+        except Exception:
+            self._count('errors')
+            acquired = True
+
+        if acquired:
+            try:
+                return await self._acompute(key, compute, version, timeout)
+            finally:
+                try:
+                    await sync_to_async(cache.delete)(lock_key)
+                except Exception:
+                    pass
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            value, version = await sync_to_async(self._read)(key)
+            if value is not MISSING:
+                return value
+        return await self._acompute(key, compute, version, timeout)
+
+    async def _acompute(self, key, compute, version, timeout):
+        self._count('computes')
+        value = await compute()
+        await sync_to_async(self._write)(key, value, version, timeout or self.timeout)
+        return value
+
+
+def cache_stats():
+    """Hit/miss counters for every namespace"""
+    return {name: namespace.stats() for name, namespace in _namespaces.items()}
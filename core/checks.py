@@ -0,0 +1,53 @@
+"""
+System checks for the platform
+Run with: python manage.py check --database default
+"""
+import time
+
+from django.conf import settings
+from django.core.checks import Info, Tags, Warning, register
+from django.db import connections
+
+
+@register(Tags.database)
+def check_connection_setup_cost(app_configs, databases=None, **kwargs):
+    """Report how long it takes to open a database connection and run a query"""
+    messages = []
+
+    for alias in databases or []:
+        conn = connections.create_connection(alias)
+        try:
+            started = time.perf_counter()
+            conn.connect()
+            connected = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            finished = time.perf_counter()
+        except Exception as e:
+            messages.append(Warning(
+                f"Could not connect to database '{alias}': {e}",
+                id='core.W001',
+            ))
+            continue
+        finally:
+            conn.close()
+
+        connect_ms = (connected - started) * 1000
+        query_ms = (finished - connected) * 1000
+        conn_max_age = settings.DATABASES[alias].get('CONN_MAX_AGE', 0)
+        summary = (
+            f"Database '{alias}': connection setup {connect_ms:.1f}ms, "
+            f"first query {query_ms:.1f}ms (CONN_MAX_AGE={conn_max_age})"
+        )
+
+        if connect_ms > settings.DB_CONNECT_WARN_MS and not conn_max_age:
+            messages.append(Warning(
+                summary,
+                hint='Connection setup is paid on every request. Set DB_CONN_MAX_AGE '
+                     'to reuse connections.',
+                id='core.W002',
+            ))
+        else:
+            messages.append(Info(summary, id='core.I001'))
+
+    return messages
@@ -8,7 +8,7 @@ from .models import SiteSettings
 def site_settings(request):
     """Make site settings available in all templates"""
     try:
-        site_config = SiteSettings.objects.first()
+        site_config = SiteSettings.load()
     except:
         site_config = None
     
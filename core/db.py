@@ -0,0 +1,82 @@
+"""
+Database connection helpers
+- Statement timeout policy (strict for web, relaxed for Celery workers)
+- Per-block statement timeout overrides
+"""
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# Timeout applied to new connections in this process. Celery workers switch
+# it to DB_TASK_STATEMENT_TIMEOUT_MS when they start (see config/celery.py).
+_process_timeout_ms = None
+
+
+def get_statement_timeout():
+    """Statement timeout (ms) for connections opened by this process"""
+    if _process_timeout_ms is not None:
+        return _process_timeout_ms
+    return settings.DB_STATEMENT_TIMEOUT_MS
+
+
+def use_task_statement_timeout():
+    """Switch this process to the relaxed timeout used for batch jobs"""
+    global _process_timeout_ms
+    _process_timeout_ms = settings.DB_TASK_STATEMENT_TIMEOUT_MS
+    # Connections already open (system checks, earlier queries) switch too
+    for conn in connections.all(initialized_only=True):
+        if conn.connection is not None:
+            set_statement_timeout(sender=type(conn), connection=conn)
+
+
+@receiver(connection_created)
+def set_statement_timeout(sender, connection, **kwargs):
+    """
+    Apply the process statement timeout to every new Postgres connection.
+
+    Skipped behind PgBouncer in transaction mode, where a session-level SET
+    would leak to whichever client gets the server connection next. Pooled
+    deployments should set the default on the role instead
+    (ALTER ROLE ... SET statement_timeout) and use `statement_timeout`
+    below for per-block overrides.
+    """
+    if connection.vendor != 'postgresql' or settings.DB_POOLED:
+        return
+
+    timeout = get_statement_timeout()
+    with connection.cursor() as cursor:
+        cursor.execute('SET statement_timeout = %s', [timeout])
+
+
+class statement_timeout:
+    """
+    Override the statement timeout for a block.
+
+    Usage:
+        with statement_timeout(30000):
+            ...
+
+    Runs the block in a transaction and uses SET LOCAL, so the override ends
+    with the transaction and is safe under PgBouncer transaction pooling.
+    No-op on databases other than Postgres. Batch jobs should rather switch
+    the whole process with use_task_statement_timeout().
+    """
+
+    def __init__(self, milliseconds, using=None):
+        self.milliseconds = milliseconds
+        self.using = using
+
+    def __enter__(self):
+        self._atomic = transaction.atomic(using=self.using)
+        self._atomic.__enter__()
+
+        conn = transaction.get_connection(self.using)
+        if conn.vendor == 'postgresql':
+            with conn.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout = %s', [self.milliseconds])
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._atomic.__exit__(exc_type, exc_value, traceback)
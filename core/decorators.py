@@ -0,0 +1,99 @@
+"""
+View decorators for core app
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .cache import CacheNamespace
+
+
+# Rendered anonymous pages; invalidated by core.signals when FAQs,
+# testimonials or site settings change
+page_cache = CacheNamespace('pages', timeout=settings.PAGE_CACHE_TIMEOUT)
+
+
+def _is_anonymous(request):
+    """Decide anonymity without touching the database when there's no session"""
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return True
+    return not request.user.is_authenticated
+
+
+def cache_anonymous_page(view_func):
+    """
+    Serve anonymous GET/HEAD requests from the page cache.
+
+    The cache key is the path only, so tracking query strings (utm_*) share
+    one entry. Requests carrying flash messages bypass the cache, and
+    responses that set cookies are never stored. Cached responses are
+    marked public for the CDN and vary on Cookie so logged-in users never
+    get an anonymous copy.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        cacheable = (
+            request.method in ('GET', 'HEAD')
+            and 'messages' not in request.COOKIES
+            and _is_anonymous(request)
+        )
+        if not cacheable:
+            response = view_func(request, *args, **kwargs)
+            patch_vary_headers(response, ['Cookie'])
+            patch_cache_control(response, private=True)
+            return response
+
+        rendered = {}
+
+        def render_page():
+            response = rendered['response'] = view_func(request, *args, **kwargs)
+            if response.status_code != 200 or response.cookies or response.streaming:
+                return None
+            return {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+            }
+
+        page = page_cache.get_or_set(request.path, render_page)
+        if page is None:
+            # Not cacheable (error page, cookies set): pass the response through
+            response = rendered.get('response')
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            patch_vary_headers(response, ['Cookie'])
+            patch_cache_control(response, private=True)
+            return response
+
+        response = rendered.get('response')
+        if response is None:
+            response = HttpResponse(page['content'], content_type=page['content_type'])
+        patch_vary_headers(response, ['Cookie'])
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.PAGE_CACHE_BROWSER_MAX_AGE,
+            s_maxage=settings.PAGE_CACHE_CDN_MAX_AGE,
+        )
+        return response
+
+    return wrapper
+
+
+def request_budget(queries=None, ms=None):
+    """
+    Override the query and latency budgets for one view.
+
+    Usage:
+        @request_budget(queries=200, ms=3000)
+        def export_view(request): ...
+
+    RequestInstrumentationMiddleware logs a warning when a request goes
+    over its budget; None keeps the REQUEST_QUERY_BUDGET or
+    REQUEST_TIME_BUDGET_MS default.
+    """
+    def decorator(view_func):
+        view_func.request_budget = (queries, ms)
+        return view_func
+    return decorator
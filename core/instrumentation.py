@@ -0,0 +1,145 @@
+"""
+Per-request instrumentation
+RequestInstrumentationMiddleware (core.middleware) opens a RequestMetrics
+for each request; the hooks below add to whichever one is current:
+- DB queries and time via an execute_wrapper every connection gets when
+  it is opened; sync_to_async carries the context variable into its
+  threads, so async requests count their queries too
+- template render time via the InstrumentedDjangoTemplates backend
+- Paystack call time via payments.paystack.latency_observers
+
+The metrics live in a context variable, so the hooks cost one lookup when
+no request is being measured (management commands, Celery tasks).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates, Template
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters for one request"""
+
+    __slots__ = (
+        'started', 'view', 'queries', 'db_seconds', 'template_seconds', 'template_depth',
+        'paystack_calls', 'paystack_errors', 'paystack_seconds',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.paystack_calls = 0
+        self.paystack_errors = 0
+        self.paystack_seconds = 0.0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total_seconds):
+        """Server-Timing header value (durations in milliseconds)"""
+        parts = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+        ]
+        if self.paystack_calls:
+            parts.append(f'paystack;dur={self.paystack_seconds * 1000:.1f};desc="{self.paystack_calls} calls"')
+        parts.append(f'total;dur={total_seconds * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def start_request():
+    """Begin measuring; returns the token for `finish_request`"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def current_metrics():
+    """The RequestMetrics being filled in, or None outside a measured request"""
+    return _current.get()
+
+
+def count_queries(execute, sql, params, many, context):
+    """execute_wrapper adding each query and its time to the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_seconds += time.perf_counter() - started
+        metrics.queries += 1
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """Wrap every connection once (the wrapper list outlives reconnects)"""
+    if count_queries not in connection.execute_wrappers:
+        # First: connection.execute_wrapper() blocks pop the last wrapper on exit
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+def record_paystack_call(operation, seconds, ok):
+    """payments.paystack latency observer"""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    metrics.paystack_calls += 1
+    metrics.paystack_seconds += seconds
+    if not ok:
+        metrics.paystack_errors += 1
+
+
+class InstrumentedTemplate(Template):
+    """Times top-level renders; includes rendered through the backend aren't counted twice"""
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates whose templates report their render time"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+@contextmanager
+def quiet_request_log():
+    """Log only over-budget requests for the block (load and stress tests)"""
+    request_logger = logging.getLogger('core.requests')
+    previous = request_logger.level
+    request_logger.setLevel(max(previous, logging.WARNING))
+    try:
+        yield
+    finally:
+        request_logger.setLevel(previous)
@@ -0,0 +1,489 @@
+"""
+End-to-end escrow load test
+Virtual users drive the whole escrow flow over HTTP, each iteration with a
+fresh client/provider pair:
+
+    register_view (x2) -> create_transaction -> initiate_payment
+    -> (Paystack checkout) -> verify_payment -> start_work -> complete_work
+    -> approve_payment, or auto_release for a share of the escrows
+
+By default the app is served in-process on a threaded WSGI server and
+Paystack is replaced by payments.simulator, so the run needs no network.
+The in-process server reports queries per request in X-Query-Count.
+Against an external server (base_url), that server must already point at
+a simulator (PAYSTACK_BASE_URL) and share this process's database, which
+is used to check each step's outcome and to run auto-release.
+
+Usage: python manage.py loadtest --users 20 --iterations 10 --output run.json
+"""
+import json
+import random
+import re
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from django.conf import settings
+from django.db import connection, connections
+from django.urls import reverse
+from django.utils import timezone
+
+from transactions.models import Transaction
+from transactions.tasks import send_auto_release_notification
+
+from .instrumentation import quiet_request_log
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+
+# Reported in flow order
+STEPS = [
+    'register_view', 'create_transaction', 'initiate_payment', 'verify_payment',
+    'start_work', 'complete_work', 'approve_payment', 'auto_release',
+]
+
+PASSWORD = 'LoadTest-Pa55word!'
+
+
+class StepFailed(Exception):
+    """A step returned, but not with the outcome the flow needs"""
+
+
+@dataclass
+class LoadTestConfig:
+    """Parameters of one run (saved with the results)"""
+    base_url: str = ''                       # empty: serve the app in-process
+    users: int = 10                          # concurrent virtual users
+    iterations: int = 5                      # escrows per virtual user
+    duration: float = 0                      # seconds; overrides iterations when set
+    auto_release_rate: float = 0.2           # share of escrows released by auto-release
+    amount: Decimal = Decimal('10000.00')
+    timeout: float = 30
+    seed: int = None
+    paystack_latency_ms: float = 150
+    paystack_error_rate: float = 0.0
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Thread-safe collector of per-step timings, query counts and errors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.escrows = 0
+        self.failed_escrows = 0
+
+    def record(self, step, seconds, queries=None, error=None):
+        with self.lock:
+            if error is None:
+                self.timings[step].append(seconds)
+                if queries is not None:
+                    self.queries[step].append(queries)
+            else:
+                self.errors[step][error] += 1
+
+    def escrow_done(self, ok):
+        with self.lock:
+            if ok:
+                self.escrows += 1
+            else:
+                self.failed_escrows += 1
+
+    def summary(self, elapsed):
+        steps = {}
+        for step in STEPS:
+            timings = sorted(self.timings.get(step, []))
+            queries = self.queries.get(step, [])
+            errors = sum(self.errors[step].values()) if step in self.errors else 0
+            if not timings and not errors:
+                continue
+            steps[step] = {
+                'count': len(timings),
+                'errors': errors,
+                'p50_ms': _ms(percentile(timings, 50)),
+                'p95_ms': _ms(percentile(timings, 95)),
+                'p99_ms': _ms(percentile(timings, 99)),
+                'mean_ms': _ms(sum(timings) / len(timings)) if timings else None,
+                'max_ms': _ms(timings[-1]) if timings else None,
+                'queries_mean': round(sum(queries) / len(queries), 1) if queries else None,
+                'queries_max': max(queries) if queries else None,
+            }
+        requests_done = sum(len(timings) for timings in self.timings.values())
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'escrows': self.escrows,
+            'failed_escrows': self.failed_escrows,
+            'escrows_per_s': round(self.escrows / elapsed, 2) if elapsed else None,
+            'requests_per_s': round(requests_done / elapsed, 2) if elapsed else None,
+            'steps': steps,
+            'errors': {step: dict(counter) for step, counter in self.errors.items()},
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class _PlainHTTPSession(requests.Session):
+    """
+    Session that sends Secure cookies over plain HTTP: the local server
+    stands in for the TLS-terminated site, where the session and CSRF
+    cookies are Secure
+    """
+
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        for cookie in self.cookies:
+            cookie.secure = False
+        return response
+
+
+def query_counting(app):
+    """WSGI wrapper adding the number of queries a request ran as X-Query-Count"""
+    def counted_app(environ, start_response):
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            return start_response(status, headers + [(QUERY_COUNT_HEADER, str(count[0]))], exc_info)
+
+        # Django calls start_response once the response is built, so every
+        # query the view, middleware and templates ran is counted
+        with connection.execute_wrapper(counter):
+            return app(environ, counted_start_response)
+
+    return counted_app
+
+
+class LocalServer:
+    """The project's WSGI app on a threaded server in this process"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+        from django.core.wsgi import get_wsgi_application
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadedWSGIServer((host, port), QuietHandler, allow_reuse_address=True)
+        self.server.set_app(query_counting(get_wsgi_application()))
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='loadtest-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class VirtualUser:
+    """One simulated person running escrows end to end, one after another"""
+
+    def __init__(self, harness, index):
+        self.harness = harness
+        self.index = index
+        self.random = random.Random(None if harness.config.seed is None else harness.config.seed + index)
+
+    def _session(self):
+        return _PlainHTTPSession()
+
+    def _url(self, path):
+        return path if path.startswith('http') else f'{self.harness.base_url}{path}'
+
+    def _call(self, session, step, method, path, data=None):
+        """Timed request; redirects are not followed so each step is one request"""
+        headers = {}
+        if method == 'POST':
+            data = dict(data or {}, csrfmiddlewaretoken=session.cookies.get('csrftoken', ''))
+            headers = {'Origin': self.harness.base_url, 'Referer': self._url(path)}
+
+        started = time.perf_counter()
+        try:
+            response = session.request(
+                method, self._url(path), data=data, headers=headers,
+                allow_redirects=False, timeout=self.harness.config.timeout,
+            )
+        except requests.RequestException as e:
+            self.harness.recorder.record(step, 0, error=type(e).__name__)
+            raise StepFailed(f'{step}: {e}')
+        seconds = time.perf_counter() - started
+
+        if response.status_code >= 400:
+            self.harness.recorder.record(step, seconds, error=f'HTTP {response.status_code}')
+            raise StepFailed(f'{step}: HTTP {response.status_code}')
+
+        queries = response.headers.get(QUERY_COUNT_HEADER)
+        return response, seconds, int(queries) if queries is not None else None
+
+    def _step(self, session, step, method, path, data=None, check=None):
+        """Run a recorded step; `check(response)` raises StepFailed on a wrong outcome"""
+        response, seconds, queries = self._call(session, step, method, path, data)
+        try:
+            if check is not None:
+                check(response)
+        except StepFailed as e:
+            self.harness.recorder.record(step, seconds, error=str(e))
+            raise
+        self.harness.recorder.record(step, seconds, queries)
+        return response
+
+    def _expect_status(self, transaction_id, status):
+        def check(response):
+            current = Transaction.objects.filter(pk=transaction_id).values_list('status', flat=True).first()
+            if current != status:
+                raise StepFailed(f'status {current}, expected {status}')
+        return check
+
+    def register(self, user_type):
+        session = self._session()
+        session.get(self._url(reverse('accounts:register')), timeout=self.harness.config.timeout)
+        token = self.harness.unique_token()
+
+        def check(response):
+            if response.status_code != 302:
+                raise StepFailed('registration form rejected')
+
+        self._step(session, 'register_view', 'POST', reverse('accounts:register'), {
+            'email': f'lt-{token}@loadtest.invalid',
+            'phone_number': f'234{int(token, 16) % 10 ** 10:010d}',
+            'first_name': 'Load',
+            'last_name': f'User {self.index}',
+            'user_type': user_type,
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+        }, check)
+        return session, f'lt-{token}@loadtest.invalid'
+
+    def run_escrow(self):
+        """One escrow from registration to release"""
+        provider, provider_email = self.register('PROVIDER')
+        client, _ = self.register('CLIENT')
+
+        client.get(self._url(reverse('transactions:create')), timeout=self.harness.config.timeout)
+        response = self._step(client, 'create_transaction', 'POST', reverse('transactions:create'), {
+            'amount': str(self.harness.config.amount),
+            'service_description': 'Load test escrow',
+            'service_category': 'Load test',
+            'service_provider_email': provider_email,
+        }, _expect_redirect(r'/payments/initiate/(\d+)/'))
+        transaction_id = int(re.search(r'/payments/initiate/(\d+)/', response.headers['Location']).group(1))
+
+        # initiate_payment redirects off-site to the Paystack checkout
+        response = self._step(
+            client, 'initiate_payment', 'GET', reverse('payments:initiate', args=[transaction_id]),
+            check=_expect_redirect(r'^https?://(?!' + re.escape(urlsplit(self.harness.base_url).netloc) + ')'),
+        )
+
+        # The customer pays; the simulator settles, fires the webhook and redirects back
+        checkout = client.get(response.headers['Location'], allow_redirects=False, timeout=self.harness.config.timeout)
+        reference = parse_qs(urlsplit(checkout.headers.get('Location', '')).query).get('reference', [''])[0]
+        if not reference:
+            self.harness.recorder.record('verify_payment', 0, error='checkout did not return a reference')
+            raise StepFailed('checkout did not return a reference')
+
+        self._step(
+            client, 'verify_payment', 'GET', f"{reverse('payments:verify')}?reference={reference}",
+            check=self._expect_status(transaction_id, 'PAID'),
+        )
+        self._step(
+            provider, 'start_work', 'POST', reverse('transactions:start_work', args=[transaction_id]),
+            check=self._expect_status(transaction_id, 'IN_PROGRESS'),
+        )
+        self._step(
+            provider, 'complete_work', 'POST', reverse('transactions:complete_work', args=[transaction_id]),
+            check=self._expect_status(transaction_id, 'COMPLETED'),
+        )
+
+        if self.random.random() < self.harness.config.auto_release_rate:
+            self.auto_release(transaction_id)
+        else:
+            self._step(
+                client, 'approve_payment', 'POST', reverse('transactions:approve', args=[transaction_id]),
+                check=self._expect_status(transaction_id, 'RELEASED'),
+            )
+
+    def auto_release(self, transaction_id):
+        """
+        What check_auto_release does for this escrow once its review window
+        is over; run here rather than through the task, which would release
+        every other virtual user's backdated escrow too
+        """
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            Transaction.objects.filter(pk=transaction_id, status='COMPLETED').update(auto_release_date=timezone.now())
+            transaction = Transaction.objects.get(pk=transaction_id)
+            released = transaction.release_payment()
+            if released:
+                send_auto_release_notification.delay(transaction.id)
+        seconds = time.perf_counter() - started
+
+        if not released:
+            self.harness.recorder.record('auto_release', seconds, error=f'not released from {transaction.status}')
+            raise StepFailed('auto_release: not released')
+        self.harness.recorder.record('auto_release', seconds, count[0])
+
+    def run(self, deadline):
+        completed = 0
+        try:
+            while True:
+                if deadline is not None:
+                    if time.monotonic() >= deadline:
+                        break
+                elif completed >= self.harness.config.iterations:
+                    break
+                try:
+                    self.run_escrow()
+                    self.harness.recorder.escrow_done(True)
+                except StepFailed:
+                    self.harness.recorder.escrow_done(False)
+                completed += 1
+        finally:
+            connections.close_all()
+
+
+def _expect_redirect(pattern):
+    def check(response):
+        location = response.headers.get('Location', '')
+        if response.status_code != 302 or not re.search(pattern, location):
+            raise StepFailed(f'unexpected response {response.status_code} {location or "(no redirect)"}')
+    return check
+
+
+class LoadTest:
+    """A configured run; `run()` returns the JSON-serialisable results"""
+
+    def __init__(self, config=None):
+        self.config = config or LoadTestConfig()
+        self.recorder = Recorder()
+        self.base_url = self.config.base_url.rstrip('/')
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+        self._run_id = f'{int(time.time()):x}'
+
+    def unique_token(self):
+        """Hex token unique within the run and across runs"""
+        with self._counter_lock:
+            self._counter += 1
+            return f'{self._run_id}{self._counter:06x}'
+
+    def run(self):
+        if self.base_url:
+            return self._drive()
+        return self._run_in_process()
+
+    def _run_in_process(self):
+        from payments.paystack import paystack
+        from payments.paystack_async import async_paystack
+        from payments.simulator import PaystackSimulator, SimulatorConfig
+
+        # Plain HTTP on loopback, no outgoing mail, and tasks (webhook
+        # handling included) run inline since there is no worker; restored afterwards
+        overrides = {
+            'SECURE_SSL_REDIRECT': False,
+            'ALLOWED_HOSTS': list(settings.ALLOWED_HOSTS) + ['127.0.0.1'],
+            'EMAIL_BACKEND': 'django.core.mail.backends.dummy.EmailBackend',
+            'CELERY_TASK_ALWAYS_EAGER': True,
+            'CELERY_TASK_EAGER_PROPAGATES': True,
+        }
+        previous = {name: getattr(settings, name) for name in overrides}
+        previous_urls = (paystack.base_url, async_paystack.base_url)
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+
+        server = LocalServer().start()
+        self.base_url = server.url
+        simulator = PaystackSimulator(SimulatorConfig(
+            webhook_url=f"{server.url}{reverse('payments:webhook')}",
+            latency_ms=self.config.paystack_latency_ms,
+            error_rate=self.config.paystack_error_rate,
+            seed=self.config.seed,
+        )).start()
+        paystack.base_url = async_paystack.base_url = simulator.url
+        try:
+            with quiet_request_log():
+                return self._drive()
+        finally:
+            simulator.stop()
+            server.stop()
+            paystack.base_url, async_paystack.base_url = previous_urls
+            for name, value in previous.items():
+                setattr(settings, name, value)
+
+    def _drive(self):
+        deadline = time.monotonic() + self.config.duration if self.config.duration else None
+        started_at = timezone.now()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.config.users, thread_name_prefix='virtual-user') as pool:
+            for future in [pool.submit(VirtualUser(self, index).run, deadline) for index in range(self.config.users)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        config = asdict(self.config)
+        config['amount'] = str(self.config.amount)
+        return {
+            'started_at': started_at.isoformat(),
+            'commit': _git_commit(),
+            'database': connection.vendor,
+            'target': self.base_url if self.config.base_url else 'in-process',
+            'config': config,
+            **self.recorder.summary(elapsed),
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5, cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline):
+    """Per-step p95 change against an earlier run's results: {step: (before_ms, after_ms, change)}"""
+    changes = {}
+    for step, stats in results['steps'].items():
+        before = (baseline.get('steps', {}).get(step) or {}).get('p95_ms')
+        after = stats['p95_ms']
+        if before and after is not None:
+            changes[step] = (before, after, (after - before) / before)
+    return changes
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as results:
+        return json.load(results)
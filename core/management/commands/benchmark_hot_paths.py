@@ -0,0 +1,98 @@
+"""
+Microbenchmarks for model methods, signals and forms on the escrow path
+Runs in a throwaway test database; baselines are kept per database vendor.
+Usage: python manage.py benchmark_hot_paths --save-baseline
+       python manage.py benchmark_hot_paths --only mark_as_paid --repeat 200
+"""
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.loadtest import _git_commit
+from core.microbench import Fixtures, build_benchmarks, compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Time the escrow hot paths call by call and compare against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Timed calls per benchmark')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed calls before timing')
+        parser.add_argument('--only', action='append', dest='only', help='Benchmark to run (repeatable)')
+        parser.add_argument('--threshold', type=float, default=0.20, help='Median growth reported as a regression')
+        parser.add_argument('--baseline', help='Baseline JSON (default: benchmarks/<vendor>.json)')
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse and keep the test database')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        vendor = connection.vendor
+        baseline_path = options['baseline'] or os.path.join(settings.BASE_DIR, 'benchmarks', f'{vendor}.json')
+        baseline = None
+        if not options['save_baseline'] and os.path.exists(baseline_path):
+            try:
+                with open(baseline_path, encoding='utf-8') as stored:
+                    baseline = json.load(stored)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read baseline {baseline_path}: {e}')
+            if baseline.get('vendor') != vendor:
+                raise CommandError(f"Baseline {baseline_path} was recorded on {baseline.get('vendor')}, not {vendor}")
+
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if vendor == 'sqlite' and not test_settings.get('NAME'):
+            # A file rather than memory, closer to how the app runs
+            test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'benchmark_hot_paths.sqlite3')
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            benchmarks = build_benchmarks(Fixtures())
+            if options['only']:
+                unknown = set(options['only']) - {benchmark.name for benchmark in benchmarks}
+                if unknown:
+                    raise CommandError(f"Unknown benchmark: {', '.join(sorted(unknown))}")
+                benchmarks = [benchmark for benchmark in benchmarks if benchmark.name in options['only']]
+
+            results = {}
+            self.stdout.write(f"{'benchmark':<28}{'median':>10}{'p95':>10}{'min':>10}{'ops/s':>10}{'queries':>9}")
+            for benchmark in benchmarks:
+                stats = run_benchmark(benchmark, repeat=options['repeat'], warmup=options['warmup'])
+                results[benchmark.name] = stats
+                self.stdout.write(
+                    f"{benchmark.name:<28}{stats['median_ms']:>8.3f}ms{stats['p95_ms']:>8.3f}ms"
+                    f"{stats['min_ms']:>8.3f}ms{stats['ops_per_s']:>10g}{stats['queries']:>9}"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(baseline_path) or '.', exist_ok=True)
+            with open(baseline_path, 'w', encoding='utf-8') as stored:
+                json.dump({'vendor': vendor, 'commit': _git_commit(), 'benchmarks': results}, stored, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'✓ Baseline written to {baseline_path}'))
+            return
+
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f'⚠️  No baseline at {baseline_path}; run with --save-baseline'))
+            return
+
+        changes = compare(results, baseline['benchmarks'], options['threshold'])
+        regressions = [change for change in changes if change[1] != 'faster']
+        for name, kind, before, after in changes:
+            if kind == 'queries':
+                self.stdout.write(self.style.ERROR(f'✗ {name}: {before} -> {after} queries'))
+            elif kind == 'slower':
+                self.stdout.write(self.style.ERROR(f'✗ {name}: median {before}ms -> {after}ms ({after / before - 1:+.0%})'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}: median {before}ms -> {after}ms ({after / before - 1:+.0%})'))
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regressions against baseline from commit {baseline.get('commit') or 'unknown'}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"✓ No regressions against baseline ({options['threshold']:.0%} threshold)"))
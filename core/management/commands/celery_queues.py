@@ -0,0 +1,80 @@
+"""
+Celery queue depths, and optionally what each worker holds
+Usage: python manage.py celery_queues
+       python manage.py celery_queues --workers --watch 5
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from kombu.exceptions import OperationalError
+
+from config.celery import app
+
+
+class Command(BaseCommand):
+    help = 'Print the number of messages waiting in each Celery queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues', help='Queue to check (repeatable; default: all routed queues)')
+        parser.add_argument('--workers', action='store_true', help='Also ask workers for active, reserved and scheduled tasks')
+        parser.add_argument('--watch', type=float, default=0, help='Repeat every this many seconds')
+
+    def handle(self, *args, **options):
+        queues = options['queues'] or self.known_queues()
+        while True:
+            self.print_depths(queues)
+            if options['workers']:
+                self.print_workers()
+            if not options['watch']:
+                return
+            time.sleep(options['watch'])
+            self.stdout.write('')
+
+    def known_queues(self):
+        queues = {app.conf.task_default_queue}
+        for route in (settings.CELERY_TASK_ROUTES or {}).values():
+            if route.get('queue'):
+                queues.add(route['queue'])
+        return sorted(queues)
+
+    def print_depths(self, queues):
+        connection = app.connection_for_read()
+        depths = {}
+        try:
+            with connection:
+                connection.ensure_connection(max_retries=1)
+                channel = connection.channel()
+                for queue in queues:
+                    try:
+                        _, depths[queue], _ = channel.queue_declare(queue=queue, passive=True)
+                    except connection.channel_errors:
+                        depths[queue] = None
+                        channel = connection.channel()  # a failed passive declare closes the channel
+        except (OperationalError, *connection.connection_errors) as e:
+            raise CommandError(f'Cannot reach the broker at {connection.as_uri()}: {e}')
+
+        self.stdout.write(f"{'queue':<20}{'waiting':>10}")
+        for queue, depth in depths.items():
+            if depth is None:
+                self.stdout.write(self.style.WARNING(f'{queue:<20}{"missing":>10}'))
+            else:
+                self.stdout.write(f'{queue:<20}{depth:>10}')
+
+    def print_workers(self):
+        inspect = app.control.inspect(timeout=2)
+        states = {
+            'active': inspect.active() or {},
+            'reserved': inspect.reserved() or {},
+            'scheduled': inspect.scheduled() or {},
+        }
+        workers = sorted(set().union(*states.values()))
+        if not workers:
+            self.stdout.write(self.style.WARNING('⚠️  No workers replied'))
+            return
+        self.stdout.write(f"\n{'worker':<40}{'active':>8}{'reserved':>10}{'scheduled':>11}")
+        for worker in workers:
+            self.stdout.write(
+                f'{worker:<40}{len(states["active"].get(worker, [])):>8}'
+                f'{len(states["reserved"].get(worker, [])):>10}{len(states["scheduled"].get(worker, [])):>11}'
+            )
@@ -0,0 +1,66 @@
+"""
+Generate a large synthetic data set for benchmarking
+Usage: python manage.py generate_synthetic_data --users 1000000 --seed 42
+
+Loads into whatever DATABASE_URL points at, so outside DEBUG it refuses a
+database that already has users or escrows unless given --force.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from core.db import use_task_statement_timeout
+from core.synthetic import SyntheticConfig, SyntheticDataGenerator
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load synthetic users, escrows, messages, payments and ratings (no signals)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--transactions-per-user', type=float, default=3.0)
+        parser.add_argument('--provider-share', type=float, default=0.3,
+                            help='Share of users who offer services')
+        parser.add_argument('--provider-skew', type=float, default=1.1,
+                            help='Zipf exponent of provider popularity (higher = hotter top providers)')
+        parser.add_argument('--days', type=int, default=365, help='Length of the history in days')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=20_000)
+        parser.add_argument('--password', help='Password for every generated user (default: unusable)')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on Postgres')
+        parser.add_argument('--force', action='store_true',
+                            help='Load into a database that already has users or escrows, even without DEBUG')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('--users must be at least 2')
+        if not (settings.DEBUG or options['force']) and (User.objects.exists() or Transaction.objects.exists()):
+            raise CommandError(
+                'This database already has users or escrows and DEBUG is off; '
+                'point DATABASE_URL at a scratch database, or pass --force'
+            )
+
+        # Large COPY batches can outlast the web statement timeout
+        use_task_statement_timeout()
+
+        config = SyntheticConfig(
+            users=options['users'],
+            transactions_per_user=options['transactions_per_user'],
+            provider_share=options['provider_share'],
+            provider_skew=options['provider_skew'],
+            days=options['days'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            password=options['password'],
+            use_copy=not options['no_copy'],
+        )
+        result = SyntheticDataGenerator(config).generate(progress=self.stdout.write)
+
+        for table, stats in sorted(result['tables'].items()):
+            rate = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+            self.stdout.write(f"  {table:<36}{stats['rows']:>12,} rows {rate:>12,.0f} rows/s")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {result['total_rows']:,} rows in {result['seconds']:.1f}s with {result['method']} "
+            f"→ {result['total_rows'] / result['seconds']:,.0f} rows/s"
+        ))
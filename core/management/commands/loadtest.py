@@ -0,0 +1,90 @@
+"""
+End-to-end escrow load test
+Usage: python manage.py loadtest --users 20 --iterations 10 --output loadtest.json
+       python manage.py loadtest --duration 60 --baseline previous.json
+"""
+import json
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import STEPS, LoadTest, LoadTestConfig, compare, load_results
+
+# p95 growth reported as a regression against --baseline
+REGRESSION_THRESHOLD = 0.10
+
+
+class Command(BaseCommand):
+    help = 'Drive the escrow flow with concurrent virtual users and report per-step latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='', help='Running server to target (default: serve the app in-process)')
+        parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+        parser.add_argument('--iterations', type=int, default=5, help='Escrows per virtual user')
+        parser.add_argument('--duration', type=float, default=0, help='Run for this many seconds instead')
+        parser.add_argument('--auto-release-rate', type=float, default=0.2, help='Share of escrows left to auto-release')
+        parser.add_argument('--amount', type=Decimal, default=Decimal('10000.00'), help='Escrow amount in naira')
+        parser.add_argument('--paystack-latency-ms', type=float, default=150, help='Simulated gateway latency (in-process only)')
+        parser.add_argument('--paystack-error-rate', type=float, default=0.0, help='Simulated gateway error rate (in-process only)')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Results JSON of an earlier run to compare p95s against')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = load_results(options['baseline'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        config = LoadTestConfig(
+            base_url=options['url'],
+            users=options['users'],
+            iterations=options['iterations'],
+            duration=options['duration'],
+            auto_release_rate=options['auto_release_rate'],
+            amount=options['amount'],
+            seed=options['seed'],
+            paystack_latency_ms=options['paystack_latency_ms'],
+            paystack_error_rate=options['paystack_error_rate'],
+        )
+        results = LoadTest(config).run()
+
+        self.stdout.write(
+            f"{results['escrows']} escrows ({results['failed_escrows']} failed) in {results['elapsed_s']}s: "
+            f"{results['escrows_per_s']} escrows/s, {results['requests_per_s']} requests/s"
+        )
+        self.stdout.write(f"{'step':<20}{'n':>6}{'err':>5}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+        for step in STEPS:
+            stats = results['steps'].get(step)
+            if stats is None:
+                continue
+            self.stdout.write(
+                f"{step:<20}{stats['count']:>6}{stats['errors']:>5}"
+                f"{_fmt(stats['p50_ms']):>9}{_fmt(stats['p95_ms']):>9}{_fmt(stats['p99_ms']):>9}"
+                f"{_fmt(stats['queries_mean']):>9}"
+            )
+        for step, errors in results['errors'].items():
+            for error, count in errors.items():
+                self.stdout.write(self.style.WARNING(f'⚠️  {step}: {error} (x{count})'))
+
+        if baseline is not None:
+            for step, (before, after, change) in compare(results, baseline).items():
+                line = f'{step}: p95 {before}ms -> {after}ms ({change:+.0%})'
+                if change > REGRESSION_THRESHOLD:
+                    self.stdout.write(self.style.ERROR(f'✗ {line}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {line}'))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✓ Results written to {options['output']}"))
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:g}'
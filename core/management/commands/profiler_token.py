@@ -0,0 +1,32 @@
+"""
+Issue a request profiling token for a staff member (see core.profiler)
+Usage: python manage.py profiler_token admin@saferelease.ng
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from core.profiler import PROFILE_PARAM, make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a token that makes the next requests run under the profiler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Staff member the profiles are recorded for')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['email'], is_staff=True, is_active=True).first()
+        if user is None:
+            raise CommandError(f"No active staff user with email {options['email']}")
+
+        token = make_token(user)
+        minutes = settings.PROFILER_TOKEN_MAX_AGE // 60
+        self.stdout.write(self.style.SUCCESS(f'✓ Token for {user.email}, valid for {minutes} minutes:'))
+        self.stdout.write(token)
+        self.stdout.write(f"\n  curl -H 'X-Profile: {token}' {settings.SITE_URL}/dashboard/")
+        self.stdout.write(
+            f'  or, from a browser, append ?{PROFILE_PARAM}={token} to a URL '
+            '(the header stays out of access logs, so prefer it)'
+        )
+        self.stdout.write('Profiles are listed under Core > Request Profiles in the admin.')
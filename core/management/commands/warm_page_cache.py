@@ -0,0 +1,41 @@
+"""
+Pre-render the anonymous page cache after a deploy
+Usage: python manage.py warm_page_cache
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from core.decorators import page_cache
+
+
+class Command(BaseCommand):
+    help = 'Invalidate and pre-render cached anonymous pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-invalidate',
+            action='store_true',
+            help='Keep existing entries (by default pages rendered by the previous release are dropped)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['no_invalidate']:
+            page_cache.invalidate()
+
+        host = next((h for h in settings.ALLOWED_HOSTS if h and not h.startswith('.') and h != '*'), 'localhost')
+        factory = RequestFactory(HTTP_HOST=host)
+
+        for url_name in settings.PAGE_CACHE_WARM_URLS:
+            path = reverse(url_name)
+            request = factory.get(path, secure=not settings.DEBUG)
+            request.user = AnonymousUser()
+            match = resolve(path)
+            response = match.func(request, *match.args, **match.kwargs)
+
+            if response.status_code == 200:
+                self.stdout.write(self.style.SUCCESS(f'✓ {path}'))
+            else:
+                self.stdout.write(self.style.WARNING(f'⚠️  {path} returned {response.status_code}'))
@@ -0,0 +1,140 @@
+"""
+Prometheus metrics, served at /metrics to holders of METRICS_TOKEN
+- Request latency and DB query histograms by URL name (fed by
+  RequestInstrumentationMiddleware)
+- Paystack call latency and errors by operation (latency_observers)
+- Transaction status transitions (post_save)
+- Escrow gauges computed from a cached aggregate at scrape time
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory shared
+by the workers (cleared on deploy); each worker writes its samples there
+and a scrape of any worker reads them all. gunicorn.conf.py removes the
+files of workers that exit.
+"""
+import os
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from transactions.models import Transaction
+
+from .cache import CacheNamespace
+
+# Statuses whose amount is still held by the platform
+ESCROW_STATUSES = ['PAID', 'IN_PROGRESS', 'COMPLETED', 'APPROVED', 'DISPUTED']
+
+escrow_metrics_cache = CacheNamespace('escrow_metrics', timeout=60)
+
+REQUEST_LATENCY = Histogram(
+    'saferelease_http_request_duration_seconds',
+    'Time to build the response, by URL name',
+    ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'saferelease_http_request_db_queries',
+    'Database queries per request, by URL name',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 30, 50, 100, 200),
+)
+PAYSTACK_LATENCY = Histogram(
+    'saferelease_paystack_request_duration_seconds',
+    'Paystack API call time, by operation (each retry is a call)',
+    ['operation'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20),
+)
+PAYSTACK_ERRORS = Counter(
+    'saferelease_paystack_errors',
+    'Failed Paystack API calls, by operation',
+    ['operation'],
+)
+TRANSITIONS = Counter(
+    'saferelease_transaction_transitions',
+    'Transaction status changes saved through the model',
+    ['from_status', 'to_status'],
+)
+
+
+def observe_request(view, method, status, seconds, queries):
+    """Called by RequestInstrumentationMiddleware once per request"""
+    view = view or 'unmatched'
+    REQUEST_LATENCY.labels(view, method, f'{status // 100}xx').observe(seconds)
+    REQUEST_QUERIES.labels(view).observe(queries)
+
+
+def record_paystack_call(operation, seconds, ok):
+    """payments.paystack latency observer"""
+    PAYSTACK_LATENCY.labels(operation).observe(seconds)
+    if not ok:
+        PAYSTACK_ERRORS.labels(operation).inc()
+
+
+@receiver(post_save, sender=Transaction)
+def count_transition(sender, instance, created, **kwargs):
+    """Compare against the status the instance was loaded with (Transaction.from_db)"""
+    previous = None if created else getattr(instance, '_loaded_status', None)
+    if created or instance.status != previous:
+        TRANSITIONS.labels(previous or 'NEW', instance.status).inc()
+        instance._loaded_status = instance.status
+
+
+def escrow_aggregates():
+    """One aggregate query over open escrows; cached, so scrapes stay cheap"""
+    now = timezone.now()
+    totals = Transaction.objects.filter(status__in=ESCROW_STATUSES).aggregate(
+        held=Sum('amount'),
+        held_count=Count('id'),
+        due_next_hour=Count('id', filter=Q(
+            status='COMPLETED', auto_release_date__lte=now + timedelta(hours=1),
+        )),
+        open_disputes=Count('id', filter=Q(status='DISPUTED')),
+    )
+    return {
+        'held': float(totals['held'] or 0),
+        'held_count': totals['held_count'],
+        'due_next_hour': totals['due_next_hour'],
+        'open_disputes': totals['open_disputes'],
+    }
+
+
+class EscrowCollector:
+    """Escrow gauges, read from escrow_metrics_cache when scraped"""
+
+    def describe(self):
+        # Lets the registry skip a collect() (and its query) at registration
+        return []
+
+    def collect(self):
+        totals = escrow_metrics_cache.get_or_set('totals', escrow_aggregates)
+        yield GaugeMetricFamily(
+            'saferelease_escrow_amount_naira', 'Amount held in escrow', value=totals['held'],
+        )
+        yield GaugeMetricFamily(
+            'saferelease_escrow_transactions', 'Transactions holding funds in escrow', value=totals['held_count'],
+        )
+        yield GaugeMetricFamily(
+            'saferelease_auto_release_due_next_hour', 'Completed transactions due for auto-release within the hour',
+            value=totals['due_next_hour'],
+        )
+        yield GaugeMetricFamily(
+            'saferelease_open_disputes', 'Transactions in dispute', value=totals['open_disputes'],
+        )
+
+
+REGISTRY.register(EscrowCollector())
+
+
+def render_metrics():
+    """Exposition text for this process, or for all workers in multiprocess mode"""
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(EscrowCollector())
+    return generate_latest(registry)
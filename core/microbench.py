@@ -0,0 +1,221 @@
+"""
+Microbenchmarks for the per-object hot paths
+Times model methods, signal handlers and form validation one call at a
+time and counts the queries each call runs. Fixtures are built before the
+clock starts, one per call, since most of these methods change state.
+
+Results can be saved as a baseline and later runs compared against it:
+a slower median beyond the threshold, or any extra query, is a regression.
+Query counts are exact on any machine; timings only compare on the same
+machine and database.
+
+Usage: python manage.py benchmark_hot_paths --save-baseline
+       python manage.py benchmark_hot_paths            # compare
+"""
+import statistics
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import connection
+
+from accounts.models import User
+from accounts.signals import create_user_wallet, save_user_wallet
+from transactions.forms import CreateTransactionForm
+from transactions.models import Transaction
+from transactions.signals import create_timeline_entry
+
+from .loadtest import percentile
+
+AMOUNT = Decimal('25000.00')
+
+
+@dataclass
+class Benchmark:
+    """`setup(count)` returns one fixture per call; `run(fixture)` is timed"""
+    name: str
+    run: callable
+    setup: callable = None
+    description: str = ''
+
+
+class QueryCounter:
+    """execute_wrapper counting the queries run on this thread's connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Fixtures:
+    """Users and escrows in a given state, without password hashing"""
+
+    def __init__(self):
+        self.counter = User.objects.count()
+
+    def user(self):
+        self.counter += 1
+        user = User(
+            username=f'bench{self.counter}',
+            email=f'bench{self.counter}@bench.invalid',
+            phone_number=f'234{self.counter:010d}',
+            first_name='Bench',
+            last_name=str(self.counter),
+        )
+        user.set_unusable_password()
+        user.save()
+        return user
+
+    def escrow(self, status='PENDING'):
+        """A fresh transaction in `status`, re-read as a view would load it"""
+        transaction = Transaction.objects.create(
+            client=self.user(),
+            service_provider=self.user(),
+            amount=AMOUNT,
+            service_description='Benchmark escrow',
+        )
+        transaction = Transaction.objects.get(pk=transaction.pk)
+        steps = {
+            'PAID': ['pay'],
+            'IN_PROGRESS': ['pay', 'start'],
+            'COMPLETED': ['pay', 'start', 'complete'],
+            'DISPUTED': ['pay', 'start', 'dispute'],
+        }.get(status, [])
+        for step in steps:
+            if step == 'pay':
+                transaction.mark_as_paid(f'BENCH-{transaction.reference}')
+            elif step == 'start':
+                transaction.start_work()
+            elif step == 'complete':
+                transaction.complete_work()
+            elif step == 'dispute':
+                transaction.raise_dispute('Benchmark dispute')
+        return Transaction.objects.get(pk=transaction.pk)
+
+
+def build_benchmarks(fixtures):
+    """The suite, in report order"""
+
+    def new_transaction(count):
+        return [(fixtures.user(), fixtures.user()) for _ in range(count)]
+
+    def save_new(parties):
+        client, provider = parties
+        Transaction(
+            client=client, service_provider=provider, amount=AMOUNT,
+            service_description='Benchmark escrow',
+        ).save()
+
+    def escrows(status):
+        return lambda count: [fixtures.escrow(status) for _ in range(count)]
+
+    def fresh_users(count):
+        return [User.objects.get(pk=fixtures.user().pk) for _ in range(count)]
+
+    def unsaved_users(count):
+        fixtures.counter += count
+        return [
+            User(
+                username=f'bench{n}', email=f'bench{n}@bench.invalid', phone_number=f'234{n:010d}',
+                password='!', first_name='Bench', last_name=str(n),
+            )
+            for n in range(fixtures.counter - count + 1, fixtures.counter + 1)
+        ]
+
+    def walletless_users(count):
+        # bulk_create skips post_save, so these users have no wallet yet
+        users = User.objects.bulk_create(unsaved_users(count))
+        return list(User.objects.filter(email__in=[user.email for user in users]).order_by('pk'))
+
+    def create_user(user):
+        user.save()
+
+    def form_data(count):
+        provider = fixtures.user()
+        fixtures.user()  # a client; the form itself doesn't need it
+        return [{
+            'amount': str(AMOUNT),
+            'service_description': 'Benchmark escrow',
+            'service_category': 'Benchmarks',
+            'service_provider_email': provider.email,
+        }] * count
+
+    def validate_form(data):
+        form = CreateTransactionForm(data)
+        if not form.is_valid():
+            raise AssertionError(form.errors.as_text())
+
+    return [
+        Benchmark('transaction_save_create', save_new, new_transaction,
+                  'Transaction.save() on insert: reference, fee math, timeline signal'),
+        Benchmark('transaction_save_update', lambda t: t.save(), escrows('IN_PROGRESS'),
+                  'Transaction.save() without a status change'),
+        Benchmark('mark_as_paid', lambda t: t.mark_as_paid('BENCH-PAID'), escrows('PENDING')),
+        Benchmark('release_payment', lambda t: t.release_payment(), escrows('COMPLETED')),
+        Benchmark('resolve_dispute_refund', lambda t: t.resolve_dispute('refund', 100), escrows('DISPUTED')),
+        Benchmark('resolve_dispute_partial', lambda t: t.resolve_dispute('split', 40), escrows('DISPUTED')),
+        Benchmark('resolve_dispute_release', lambda t: t.resolve_dispute('release', 0), escrows('DISPUTED')),
+        Benchmark('update_trust_score', lambda user: user.update_trust_score(), fresh_users),
+        Benchmark('user_create', create_user, unsaved_users,
+                  'User.save() on insert with create_user_wallet and save_user_wallet'),
+        Benchmark('create_user_wallet',
+                  lambda user: create_user_wallet(User, instance=user, created=True), walletless_users),
+        Benchmark('save_user_wallet', lambda user: save_user_wallet(User, instance=user), fresh_users,
+                  'save_user_wallet handler for a user loaded without its wallet'),
+        Benchmark('create_timeline_entry_paid',
+                  lambda t: create_timeline_entry(Transaction, instance=t, created=False), escrows('PAID'),
+                  'create_timeline_entry for an already recorded status'),
+        Benchmark('create_transaction_form', validate_form, form_data,
+                  'CreateTransactionForm validation, provider looked up by email'),
+    ]
+
+
+def run_benchmark(benchmark, repeat=50, warmup=5):
+    """Time `repeat` calls after `warmup` untimed ones; returns the stats dict"""
+    fixtures = benchmark.setup(repeat + warmup) if benchmark.setup else [None] * (repeat + warmup)
+    for fixture in fixtures[:warmup]:
+        benchmark.run(fixture)
+
+    timings, queries = [], []
+    for fixture in fixtures[warmup:]:
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            benchmark.run(fixture)
+            timings.append(time.perf_counter() - started)
+        queries.append(counter.count)
+
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 4),
+        'p95_ms': round(percentile(timings, 95) * 1000, 4),
+        'min_ms': round(timings[0] * 1000, 4),
+        'ops_per_s': round(1 / statistics.median(timings), 1),
+        'queries': max(queries),
+        'runs': len(timings),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Regressions and improvements against a baseline.
+
+    Returns:
+        list: (name, kind, before, after) where kind is 'slower', 'queries'
+            or 'faster'
+    """
+    changes = []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if stats['queries'] > before['queries']:
+            changes.append((name, 'queries', before['queries'], stats['queries']))
+        if stats['median_ms'] > before['median_ms'] * (1 + threshold):
+            changes.append((name, 'slower', before['median_ms'], stats['median_ms']))
+        elif stats['median_ms'] < before['median_ms'] * (1 - threshold):
+            changes.append((name, 'faster', before['median_ms'], stats['median_ms']))
+    return changes
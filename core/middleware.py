@@ -0,0 +1,213 @@
+"""
+Middleware for core app
+"""
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.shortcuts import render
+
+from . import instrumentation, metrics, profiler
+from .models import SiteSettings
+
+request_logger = logging.getLogger('core.requests')
+
+
+class MaintenanceModeMiddleware:
+    """
+    Serve a 503 page while SiteSettings.maintenance_mode is on.
+
+    Reads the cached settings row, so it costs no queries per request.
+    Staff, the admin, static/media files, /metrics and the Paystack webhook
+    keep working so payments are still recorded during maintenance.
+    Async-capable: under ASGI the check runs in one sync_to_async call.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.exempt_prefixes = tuple(
+            prefix for prefix in [
+                '/admin/',
+                '/payments/webhook/',
+                '/metrics',
+                settings.STATIC_URL,
+                settings.MEDIA_URL,
+            ] + list(getattr(settings, 'MAINTENANCE_EXEMPT_PATHS', []))
+            if prefix
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.maintenance_response(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        # The settings cache, request.user and the template may all hit the database
+        response = await sync_to_async(self.maintenance_response)(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def maintenance_response(self, request):
+        """The 503 page when this request is blocked, else None"""
+        site_config = SiteSettings.load()
+
+        if (
+            site_config is not None
+            and site_config.maintenance_mode
+            and not request.path.startswith(self.exempt_prefixes)
+            and not request.user.is_staff
+        ):
+            response = render(request, 'core/maintenance.html', status=503)
+            response['Retry-After'] = '600'
+            response['Cache-Control'] = 'no-store'
+            return response
+        return None
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure every request: total time, DB queries and time, template render
+    time and Paystack call time (see core.instrumentation).
+
+    Feeds the request histograms in core.metrics, adds a Server-Timing
+    header and logs one JSON line per request to the
+    `core.requests` logger, at WARNING when the view goes over its query or
+    latency budget (REQUEST_QUERY_BUDGET / REQUEST_TIME_BUDGET_MS, or the
+    view's @request_budget). Goes first in MIDDLEWARE so the total covers
+    the rest of the stack. Async-capable, so it doesn't force ASGI requests
+    onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = settings.REQUEST_QUERY_BUDGET
+        self.time_budget_ms = settings.REQUEST_TIME_BUDGET_MS
+        self.server_timing = settings.REQUEST_SERVER_TIMING
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would run a sync process_view through sync_to_async
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics, token = instrumentation.start_request()
+        try:
+            response = self.get_response(request)
+            elapsed = request_metrics.elapsed
+        finally:
+            instrumentation.finish_request(token)
+        return self.finish(request, response, request_metrics, elapsed)
+
+    async def __acall__(self, request):
+        request_metrics, token = instrumentation.start_request()
+        try:
+            response = await self.get_response(request)
+            elapsed = request_metrics.elapsed
+        finally:
+            instrumentation.finish_request(token)
+        return self.finish(request, response, request_metrics, elapsed)
+
+    def finish(self, request, response, request_metrics, elapsed):
+        if self.server_timing:
+            response['Server-Timing'] = request_metrics.server_timing(elapsed)
+        match = request.resolver_match
+        metrics.observe_request(
+            match.view_name if match is not None else None,
+            request.method, response.status_code, elapsed, request_metrics.queries,
+        )
+        self._log(request, response, request_metrics, elapsed)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.name_view(request)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.name_view(request)
+
+    def name_view(self, request):
+        # Lets code running inside the view (core.slow_queries) name it
+        request_metrics = instrumentation.current_metrics()
+        if request_metrics is not None:
+            request_metrics.view = request.resolver_match.view_name
+
+    def _log(self, request, response, metrics, elapsed):
+        match = request.resolver_match
+        query_budget, time_budget_ms = self.query_budget, self.time_budget_ms
+        if match is not None:
+            view_queries, view_ms = getattr(match.func, 'request_budget', (None, None))
+            query_budget = view_queries if view_queries is not None else query_budget
+            time_budget_ms = view_ms if view_ms is not None else time_budget_ms
+
+        elapsed_ms = elapsed * 1000
+        over_budget = [
+            name for name, exceeded in (
+                ('queries', query_budget and metrics.queries > query_budget),
+                ('time', time_budget_ms and elapsed_ms > time_budget_ms),
+            )
+            if exceeded
+        ]
+        level = logging.WARNING if over_budget else logging.INFO
+        if not request_logger.isEnabledFor(level):
+            return
+
+        request_logger.log(level, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match is not None else None,
+            'status': response.status_code,
+            'ms': round(elapsed_ms, 1),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_seconds * 1000, 1),
+            'template_ms': round(metrics.template_seconds * 1000, 1),
+            'paystack_calls': metrics.paystack_calls,
+            'paystack_errors': metrics.paystack_errors,
+            'paystack_ms': round(metrics.paystack_seconds * 1000, 1),
+            'over_budget': over_budget,
+        }))
+
+
+class ProfilerMiddleware:
+    """
+    Profile requests carrying a staff profiling token (see core.profiler).
+
+    Sits near the top of MIDDLEWARE so the profile covers sessions and
+    auth too; the token itself identifies the staff member. Async-capable;
+    see core.profiler for what an async profile covers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = profiler.requested_token(request)
+        if token:
+            user = profiler.token_user(token)
+            if user is not None:
+                return profiler.profile_request(self.get_response, request, user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        token = profiler.requested_token(request)
+        if token:
+            user = await sync_to_async(profiler.token_user)(token)
+            if user is not None:
+                return await profiler.aprofile_request(self.get_response, request, user)
+        return await self.get_response(request)
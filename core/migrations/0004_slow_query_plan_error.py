@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_slow_query'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='slowquery',
+            name='plan_error',
+            field=models.TextField(blank=True, help_text='Why the last EXPLAIN failed, if it did'),
+        ),
+        migrations.AlterField(
+            model_name='slowquery',
+            name='plan_captured_at',
+            field=models.DateTimeField(blank=True, help_text='Last EXPLAIN attempt', null=True),
+        ),
+    ]
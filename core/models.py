@@ -1,7 +1,13 @@
 """
 Core models for the platform
 """
+from django.conf import settings
 from django.db import models
+from .cache import CacheNamespace
+
+
+# Long L1 lifetime: changes are pushed to every process by core.signals
+site_settings_cache = CacheNamespace('site_settings', timeout=86400, l1_timeout=600)
 
 
 class SiteSettings(models.Model):
@@ -31,6 +37,11 @@ class SiteSettings(models.Model):
     
     def __str__(self):
         return self.site_name
+    
+    @classmethod
+    def load(cls):
+        """Return the settings row (or None), cached in process"""
+        return site_settings_cache.get_or_set('current', lambda: cls.objects.first())
 
 
 class FAQ(models.Model):
@@ -67,3 +78,78 @@ class Testimonial(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.role}"
+
+
+class RequestProfile(models.Model):
+    """cProfile run of one request, captured on demand by core.profiler"""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='request_profiles',
+        help_text='Staff member the profiling token was issued to',
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    
+    # Top functions by cumulative time, as printed by pstats
+    report = models.TextField()
+    # Raw pstats dump, for snakeviz / flameprof / gprof2dot
+    stats = models.BinaryField()
+    # [{'sql': ..., 'ms': ...}, ...] in execution order
+    sql_log = models.JSONField(default=list)
+    
+    class Meta:
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
+    
+    @classmethod
+    def prune(cls, keep):
+        """Delete all but the `keep` most recent profiles"""
+        stale = list(cls.objects.values_list('pk', flat=True)[keep:])
+        if stale:
+            cls.objects.filter(pk__in=stale).delete()
+
+
+class SlowQuery(models.Model):
+    """A query shape that ran over SLOW_QUERY_MS, with its plan (core.slow_queries)"""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    normalized_sql = models.TextField(help_text='Literals and IN lists collapsed to ?')
+    vendor = models.CharField(max_length=20)
+    
+    # Occurrences over the threshold
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(db_index=True)
+    
+    # The slowest occurrence: its SQL, parameter types (never values), plan and where it came from
+    sample_sql = models.TextField()
+    sample_params = models.JSONField(default=list)
+    origin = models.CharField(max_length=200, blank=True, help_text='View name or Celery task')
+    plan = models.TextField(blank=True)
+    plan_error = models.TextField(blank=True, help_text='Why the last EXPLAIN failed, if it did')
+    plan_captured_at = models.DateTimeField(null=True, blank=True, help_text='Last EXPLAIN attempt')
+    
+    class Meta:
+        verbose_name = 'Slow Query'
+        verbose_name_plural = 'Slow Queries'
+        ordering = ['-last_seen']
+    
+    def __str__(self):
+        return self.normalized_sql[:80]
+    
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0
@@ -0,0 +1,166 @@
+"""
+On-demand request profiling for staff
+A staff member mints a token (manage.py profiler_token) and sends it as
+the X-Profile header, or from a browser as the _profile query parameter
+(kept out of the stored path, but web server logs still see it, so
+prefer the header). ProfilerMiddleware
+(core.middleware) then runs that request under cProfile, logs its SQL, and
+stores a RequestProfile listed in the admin. Requests without a token only
+pay for one header and one query-string lookup, plus a context-variable
+lookup per query.
+
+The stored .pstats file opens in snakeviz, or converts to a flamegraph
+with flameprof.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.encoding import escape_uri_path
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+TOKEN_SALT = 'core.profiler'
+
+# Functions listed in the stored report, and SQL statements kept per profile
+REPORT_LINES = 60
+MAX_SQL_ENTRIES = 2000
+
+# The SQLLog of the request being profiled, if any
+_sql_log = ContextVar('profiler_sql_log', default=None)
+
+
+def make_token(user):
+    """Profiling token for a staff user, valid for PROFILER_TOKEN_MAX_AGE seconds"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def requested_token(request):
+    """The token on the request, without touching the session or user"""
+    return request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+
+
+def token_user(token):
+    """The active staff user a valid token was issued to, else None"""
+    from accounts.models import User
+
+    try:
+        user_pk = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=user_pk, is_staff=True, is_active=True).first()
+
+
+class SQLLog:
+    """execute_wrapper recording each statement and its time"""
+
+    def __init__(self):
+        self.entries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.entries) < MAX_SQL_ENTRIES:
+                self.entries.append({'sql': sql, 'ms': round(elapsed * 1000, 3), 'many': many})
+
+
+def log_queries(execute, sql, params, many, context):
+    """execute_wrapper handing queries to the profiled request's SQLLog"""
+    sql_log = _sql_log.get()
+    if sql_log is None:
+        return execute(sql, params, many, context)
+    return sql_log(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_sql_log(sender, connection, **kwargs):
+    """Wrap every connection once, like core.instrumentation; sync_to_async threads see the log too"""
+    if log_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_queries)
+
+
+@contextmanager
+def _profiling(profiler, sql_log):
+    token = _sql_log.set(sql_log)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _sql_log.reset(token)
+
+
+def profile_request(get_response, request, user):
+    """Run the request under cProfile and store a RequestProfile; returns the response"""
+    profiler = cProfile.Profile()
+    sql_log = SQLLog()
+    started = time.perf_counter()
+    with _profiling(profiler, sql_log):
+        response = get_response(request)
+    return store_profile(request, response, user, profiler, sql_log, time.perf_counter() - started)
+
+
+async def aprofile_request(get_response, request, user):
+    """
+    profile_request for the async middleware stack. cProfile only sees the
+    event-loop thread: code the view runs through sync_to_async shows up as
+    a wait (its SQL is still logged), and coroutines of other requests the
+    loop serves meanwhile show up too.
+    """
+    profiler = cProfile.Profile()
+    sql_log = SQLLog()
+    started = time.perf_counter()
+    with _profiling(profiler, sql_log):
+        response = await get_response(request)
+    return await sync_to_async(store_profile)(request, response, user, profiler, sql_log, time.perf_counter() - started)
+
+
+def stored_path(request):
+    """The request's path and query string, without the profiling token"""
+    query = request.GET.copy()
+    query.pop(PROFILE_PARAM, None)
+    path = escape_uri_path(request.path)
+    return f'{path}?{query.urlencode()}' if query else path
+
+
+def store_profile(request, response, user, profiler, sql_log, duration):
+    """Save the RequestProfile and tag the response with its id"""
+    from .models import RequestProfile
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats('cumulative').print_stats(REPORT_LINES)
+
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        user=user,
+        method=request.method,
+        path=stored_path(request)[:500],
+        view_name=match.view_name if match is not None else '',
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 2),
+        query_count=sql_log.count,
+        db_ms=round(sql_log.seconds * 1000, 2),
+        report=report.getvalue(),
+        stats=marshal.dumps(stats.stats),  # what Stats.dump_stats writes
+        sql_log=sql_log.entries,
+    )
+    RequestProfile.prune(settings.PROFILER_KEEP)
+    response['X-Profile-Id'] = str(profile.pk)
+    return response
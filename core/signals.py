@@ -0,0 +1,42 @@
+"""
+Signal handlers for core app
+Keeps cached pages and stats in step with the models they are built from.
+Entries are dropped once the write commits: dropped earlier, a concurrent
+read could cache the pre-commit state again until the entry expires.
+"""
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import UserWallet
+from transactions.models import Transaction
+from .decorators import page_cache
+from .models import SiteSettings, FAQ, Testimonial, site_settings_cache
+from .views import dashboard_cache
+
+
+@receiver([post_save, post_delete], sender=SiteSettings)
+def invalidate_site_settings(sender, **kwargs):
+    """Push the new settings row to every process"""
+    db_transaction.on_commit(lambda: site_settings_cache.delete('current'))
+
+
+@receiver([post_save, post_delete], sender=SiteSettings)
+@receiver([post_save, post_delete], sender=FAQ)
+@receiver([post_save, post_delete], sender=Testimonial)
+def invalidate_page_cache(sender, **kwargs):
+    """Cached pages embed FAQs, testimonials and site settings"""
+    db_transaction.on_commit(page_cache.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_transaction_dashboards(sender, instance, **kwargs):
+    """Drop cached dashboard stats for both parties"""
+    user_ids = [instance.client_id, instance.service_provider_id]
+    db_transaction.on_commit(lambda: [dashboard_cache.delete(user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=UserWallet)
+def invalidate_wallet_dashboard(sender, instance, **kwargs):
+    """Drop cached dashboard stats when wallet balances move"""
+    user_id = instance.user_id
+    db_transaction.on_commit(lambda: dashboard_cache.delete(user_id))
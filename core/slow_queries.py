@@ -0,0 +1,217 @@
+"""
+Slow-query log with plan capture
+An execute_wrapper on every connection times each query. Queries over
+SLOW_QUERY_MS are handed to a background thread, which keeps one
+SlowQuery row per normalized statement (count, total and max time, and
+the view or task it came from) and captures its plan:
+- Postgres: EXPLAIN (ANALYZE, BUFFERS) for plain SELECTs, plain EXPLAIN
+  otherwise (ANALYZE would run a write a second time, or take the row
+  locks of a SELECT ... FOR UPDATE)
+- SQLite: EXPLAIN QUERY PLAN
+
+A plan is captured for a new statement, for a new slowest occurrence, and
+again after SLOW_QUERY_REPLAN_HOURS. The request only pays for a clock
+read per query; the rest happens off the request path. Parameter values
+are only used for the EXPLAIN; the stored sample keeps their types. An
+EXPLAIN that fails keeps the previous plan and records its error apart.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import current_task
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .db import statement_timeout
+from .instrumentation import current_metrics
+
+logger = logging.getLogger(__name__)
+
+# Slow queries waiting for the background thread; more are dropped
+MAX_PENDING = 100
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+_LOCKING = re.compile(r'\bFOR\s+(?:UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b', re.IGNORECASE)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query')
+_pending = 0
+_pending_lock = threading.Lock()
+_local = threading.local()
+
+
+def normalize(sql):
+    """The statement's shape: literals and placeholders as ?, IN lists as (...)"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def current_origin():
+    """The Celery task or view this query runs for"""
+    if current_task:
+        return current_task.name
+    metrics = current_metrics()
+    if metrics is not None and metrics.view:
+        return metrics.view
+    return ''
+
+
+class SlowQueryWrapper:
+    """execute_wrapper timing each query; one per connection"""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= settings.SLOW_QUERY_MS and not many and not getattr(_local, 'capturing', False):
+                _submit(self.alias, sql, params, elapsed_ms, current_origin())
+
+
+@receiver(connection_created)
+def install_wrapper(sender, connection, **kwargs):
+    """
+    Wrap every connection once (the wrapper list outlives reconnects).
+
+    The wrapper goes first in the list: a connection is often opened inside
+    a connection.execute_wrapper() block (load tests, benchmarks), and that
+    context manager pops the *last* wrapper on exit.
+    """
+    if not settings.SLOW_QUERY_MS:
+        return
+    if not any(isinstance(wrapper, SlowQueryWrapper) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.insert(0, SlowQueryWrapper(connection.alias))
+
+
+def _submit(alias, sql, params, elapsed_ms, origin):
+    global _pending
+    with _pending_lock:
+        if _pending >= MAX_PENDING:
+            return
+        _pending += 1
+    _executor.submit(_record, alias, sql, _snapshot(params), _param_types(params), elapsed_ms, origin)
+
+
+def _snapshot(params):
+    """A copy of the parameters as passed, for the EXPLAIN re-run (lists, bytes, arrays intact)"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return dict(params)
+    return tuple(params)
+
+
+def _param_types(params):
+    """What sample_params stores: the type of each parameter, never its value"""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def _record(alias, sql, params, param_types, elapsed_ms, origin):
+    """Background thread: count the occurrence and capture a plan if due"""
+    global _pending
+    _local.capturing = True
+    try:
+        close_old_connections()
+        record_slow_query(alias, sql, params, param_types, elapsed_ms, origin)
+    except Exception:
+        logger.exception('Could not record slow query')
+    finally:
+        _local.capturing = False
+        with _pending_lock:
+            _pending -= 1
+
+
+def record_slow_query(alias, sql, params, param_types, elapsed_ms, origin):
+    from .models import SlowQuery
+
+    connection = connections[alias]
+    normalized = normalize(sql)
+    now = timezone.now()
+    slow_query, created = SlowQuery.objects.get_or_create(
+        fingerprint=fingerprint(normalized),
+        defaults={
+            'normalized_sql': normalized,
+            'vendor': connection.vendor,
+            'last_seen': now,
+            'sample_sql': sql,
+            'sample_params': param_types,
+            'origin': origin[:200],
+        },
+    )
+    SlowQuery.objects.filter(pk=slow_query.pk).update(
+        count=F('count') + 1,
+        total_ms=F('total_ms') + elapsed_ms,
+        last_seen=now,
+    )
+
+    slowest = elapsed_ms > slow_query.max_ms
+    replan_after = timedelta(hours=settings.SLOW_QUERY_REPLAN_HOURS)
+    stale = slow_query.plan_captured_at is None or slow_query.plan_captured_at < now - replan_after
+    if not (created or slowest or stale):
+        return
+
+    updates = {}
+    if slowest:
+        updates.update(max_ms=elapsed_ms, sample_sql=sql, sample_params=param_types, origin=origin[:200])
+    try:
+        updates.update(plan=explain(connection, sql, params), plan_error='', plan_captured_at=timezone.now())
+    except Exception as e:
+        # Unexplainable statements (DDL, SAVEPOINT, ...): keep the last plan, retry after the replan interval
+        logger.warning('Could not EXPLAIN slow query %s: %s', slow_query.fingerprint, e)
+        updates.update(plan_error=f'{type(e).__name__}: {e}', plan_captured_at=timezone.now())
+    SlowQuery.objects.filter(pk=slow_query.pk).update(**updates)
+
+
+def explain(connection, sql, params):
+    """The plan for one statement, as text"""
+    if connection.vendor == 'postgresql':
+        analyze = sql.lstrip().upper().startswith('SELECT') and not _LOCKING.search(sql)
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+        # ANALYZE runs the query a second time, so bound how long it may take
+        with statement_timeout(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS, using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params or None)
+                return '\n'.join(row[0] for row in cursor.fetchall())
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params or None)
+            rows = cursor.fetchall()
+        # (id, parent, notused, detail): indent each step under its parent
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return '\n'.join(lines)
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN ' + sql, params or None)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
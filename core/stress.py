@@ -0,0 +1,456 @@
+"""
+Concurrency stress test for the money-moving paths
+Hammers the same escrows from many threads at once, through the real views
+and tasks, then checks the books. Scenarios:
+
+    approve_vs_auto_release   client approves while check_auto_release runs
+    verify_vs_webhook         Paystack callback and charge.success webhook
+                              for the same charge
+    dispute_vs_auto_release   client disputes while check_auto_release runs
+
+Escrows are processed in waves: each wave takes `threads // contenders`
+escrows, and their contenders are released together by a barrier so they
+really overlap. Every escrow has its own client and provider, so wallet
+balances show exactly what happened to it.
+
+Runs in a throwaway test database (like manage.py test). Use Postgres:
+SQLite serialises writers, so it shows "database is locked" rather than
+row-lock behaviour. On Postgres, lock waiters are sampled from
+pg_stat_activity and deadlocks counted from pg_stat_database.
+
+Usage: python manage.py stress_escrow --threads 16 --escrows 100
+"""
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User, UserWallet
+from payments.models import Payment
+from payments.webhooks import compute_signature
+from transactions.models import Transaction
+from transactions.tasks import check_auto_release
+
+from .instrumentation import quiet_request_log
+from .loadtest import percentile
+
+SCENARIOS = ['approve_vs_auto_release', 'verify_vs_webhook', 'dispute_vs_auto_release']
+
+# Postgres SQLSTATEs
+DEADLOCK_DETECTED = '40P01'
+SERIALIZATION_FAILURE = '40001'
+LOCK_NOT_AVAILABLE = '55P03'
+QUERY_CANCELED = '57014'  # statement_timeout
+
+LOCK_WAITERS_SQL = """
+    SELECT count(*) FROM pg_stat_activity
+    WHERE datname = current_database() AND wait_event_type = 'Lock'
+"""
+DEADLOCKS_SQL = 'SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()'
+
+
+@dataclass
+class StressConfig:
+    """Parameters of one run"""
+    threads: int = 8
+    escrows: int = 50                # per scenario
+    contenders: int = 4              # concurrent operations per escrow, alternating sides
+    amount: Decimal = Decimal('10000.00')
+    scenarios: list = field(default_factory=lambda: list(SCENARIOS))
+    paystack_latency_ms: float = 20
+    barrier_timeout: float = 60
+
+
+def classify_error(exc):
+    """Short error class: deadlock, serialization_failure, lock_timeout or the exception name"""
+    cause = exc
+    while cause is not None:
+        code = getattr(cause, 'pgcode', None)
+        if code == DEADLOCK_DETECTED:
+            return 'deadlock'
+        if code == SERIALIZATION_FAILURE:
+            return 'serialization_failure'
+        if code in (LOCK_NOT_AVAILABLE, QUERY_CANCELED):
+            return 'lock_timeout'
+        if 'is locked' in str(cause):  # SQLite: database / table is locked
+            return 'lock_timeout'
+        cause = cause.__cause__
+    return type(exc).__name__
+
+
+class LockMonitor(threading.Thread):
+    """Samples the number of sessions waiting on a lock (Postgres only)"""
+
+    def __init__(self, interval=0.05):
+        super().__init__(name='stress-lock-monitor', daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self._done.is_set():
+                    cursor.execute(LOCK_WAITERS_SQL)
+                    self.samples.append(cursor.fetchone()[0])
+                    self._done.wait(self.interval)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def summary(self):
+        if not self.samples:
+            return {'max_waiters': None, 'mean_waiters': None, 'share_with_waiters': None}
+        return {
+            'max_waiters': max(self.samples),
+            'mean_waiters': round(sum(self.samples) / len(self.samples), 2),
+            'share_with_waiters': round(sum(1 for s in self.samples if s) / len(self.samples), 3),
+        }
+
+
+def _deadlock_count():
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(DEADLOCKS_SQL)
+        return cursor.fetchone()[0]
+
+
+class ScenarioStats:
+    """Per-operation latencies and error classes, shared by the worker threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    def record(self, operation, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.timings[operation].append(seconds)
+            else:
+                self.errors[operation][error] += 1
+
+    def summary(self):
+        operations = {}
+        for operation in sorted(set(self.timings) | set(self.errors)):
+            timings = sorted(self.timings.get(operation, []))
+            operations[operation] = {
+                'count': len(timings),
+                'errors': dict(self.errors.get(operation, {})),
+                'p50_ms': _ms(percentile(timings, 50)),
+                'p95_ms': _ms(percentile(timings, 95)),
+                'p99_ms': _ms(percentile(timings, 99)),
+            }
+        return operations
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class StressTest:
+    """Runs the configured scenarios; `run()` returns JSON-serialisable results"""
+
+    def __init__(self, config=None):
+        self.config = config or StressConfig()
+        self._counter = 0
+
+    # Fixtures
+
+    def _user(self, role):
+        self._counter += 1
+        token = f'{role}{self._counter}'
+        user = User(
+            username=f'stress-{token}',
+            email=f'stress-{token}@stress.invalid',
+            phone_number=f'234{self._counter:010d}',
+            first_name='Stress',
+            last_name=token,
+        )
+        user.set_unusable_password()
+        user.save()
+        return user
+
+    def _escrow(self, state):
+        """A transaction with a fresh client and provider, moved to `state` (UNPAID or COMPLETED)"""
+        transaction = Transaction.objects.create(
+            client=self._user('client'),
+            service_provider=self._user('provider'),
+            amount=self.config.amount,
+            service_description='Concurrency stress test',
+        )
+        if state == 'COMPLETED':
+            # Fresh instance: the users still carry the wallets the signal built in memory
+            transaction = Transaction.objects.get(pk=transaction.pk)
+            transaction.mark_as_paid(f'STRESS-{transaction.reference}')
+            transaction.start_work()
+            transaction.complete_work()
+        return transaction
+
+    def _client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    # Operations: (name, prepare) where prepare() runs before the barrier
+    # and returns the callable that races
+
+    def _approve(self, transaction):
+        def prepare():
+            client = self._client_for(transaction.client)
+            url = reverse('transactions:approve', args=[transaction.pk])
+            return lambda: client.post(url, secure=True)
+        return 'approve_payment', prepare
+
+    def _dispute(self, transaction):
+        def prepare():
+            client = self._client_for(transaction.client)
+            url = reverse('transactions:dispute', args=[transaction.pk])
+            return lambda: client.post(url, {'reason': 'Stress test dispute'}, secure=True)
+        return 'raise_dispute', prepare
+
+    def _auto_release(self, transaction):
+        return 'check_auto_release', lambda: check_auto_release
+
+    def _verify(self, transaction, payment, body):
+        def prepare():
+            client = self._client_for(transaction.client)
+            url = f"{reverse('payments:verify')}?reference={payment.reference}"
+            return lambda: client.get(url, secure=True)
+        return 'verify_payment', prepare
+
+    def _webhook(self, transaction, payment, body):
+        def prepare():
+            client = Client()
+            url = reverse('payments:webhook')
+            signature = compute_signature(body)
+            return lambda: client.post(
+                url, body, content_type='application/json', secure=True,
+                HTTP_X_PAYSTACK_SIGNATURE=signature,
+            )
+        return 'paystack_webhook', prepare
+
+    # Scenarios: each returns (escrows, per-escrow operation lists, before_wave)
+
+    def _make_due(self, escrows):
+        Transaction.objects.filter(pk__in=[t.pk for t in escrows]).update(
+            auto_release_date=timezone.now() - timedelta(minutes=1),
+        )
+
+    def approve_vs_auto_release(self):
+        escrows = [self._escrow('COMPLETED') for _ in range(self.config.escrows)]
+        operations = [self._alternate(self._approve(t), self._auto_release(t)) for t in escrows]
+        return escrows, operations, self._make_due
+
+    def dispute_vs_auto_release(self):
+        escrows = [self._escrow('COMPLETED') for _ in range(self.config.escrows)]
+        operations = [self._alternate(self._dispute(t), self._auto_release(t)) for t in escrows]
+        return escrows, operations, self._make_due
+
+    def verify_vs_webhook(self):
+        from payments.paystack import paystack
+
+        escrows, operations = [], []
+        for _ in range(self.config.escrows):
+            transaction = self._escrow('UNPAID')
+            payment = Payment.objects.create(
+                transaction=transaction,
+                user=transaction.client,
+                amount=transaction.amount,
+            )
+            response = paystack.initialize_payment(
+                email=transaction.client.email,
+                amount=payment.amount,
+                reference=payment.reference,
+            )
+            if not response.get('status'):
+                raise RuntimeError(f"Simulator rejected initialize: {response.get('message')}")
+            payment.paystack_reference = response['data']['reference']
+            payment.save(update_fields=['paystack_reference'])
+
+            # The customer has paid; callback and webhook are now both in flight
+            data = self.simulator.settle_charge(payment.reference)
+            body = json.dumps({'event': 'charge.success', 'data': data}).encode('utf-8')
+            escrows.append(transaction)
+            operations.append(self._alternate(
+                self._verify(transaction, payment, body),
+                self._webhook(transaction, payment, body),
+            ))
+        return escrows, operations, None
+
+    def _alternate(self, first, second):
+        return [first if i % 2 == 0 else second for i in range(self.config.contenders)]
+
+    # Running
+
+    def _contend(self, stats, barrier, operation):
+        name, prepare = operation
+        race = error = None
+        try:
+            race = prepare()
+        except Exception as e:
+            error = classify_error(e)
+        try:
+            barrier.wait()
+            if race is None:
+                stats.record(name, 0, error=f'setup: {error}')
+                return
+            started = time.perf_counter()
+            try:
+                race()
+            except Exception as e:
+                stats.record(name, time.perf_counter() - started, error=classify_error(e))
+            else:
+                stats.record(name, time.perf_counter() - started)
+        finally:
+            # Test databases can't be dropped while worker connections are open
+            connections.close_all()
+
+    def run_scenario(self, name):
+        escrows, operations, before_wave = getattr(self, name)()
+        stats = ScenarioStats()
+        per_wave = max(self.config.threads // self.config.contenders, 1)
+        threads = per_wave * self.config.contenders
+
+        monitor = LockMonitor() if connection.vendor == 'postgresql' else None
+        deadlocks_before = _deadlock_count()
+        if monitor:
+            monitor.start()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='stress') as pool:
+            for start in range(0, len(escrows), per_wave):
+                wave = operations[start:start + per_wave]
+                if before_wave:
+                    before_wave(escrows[start:start + per_wave])
+                racing = [operation for escrow_operations in wave for operation in escrow_operations]
+                barrier = threading.Barrier(len(racing), timeout=self.config.barrier_timeout)
+                for future in [pool.submit(self._contend, stats, barrier, op) for op in racing]:
+                    future.result()
+        elapsed = time.perf_counter() - started
+
+        if monitor:
+            monitor.stop()
+        deadlocks_after = _deadlock_count()
+
+        operations_summary = stats.summary()
+        total_operations = sum(
+            op['count'] + sum(op['errors'].values()) for op in operations_summary.values()
+        )
+        violations = check_invariants([t.pk for t in escrows])
+        return {
+            'escrows': len(escrows),
+            'threads': threads,
+            'elapsed_s': round(elapsed, 3),
+            'operations_per_s': round(total_operations / elapsed, 2) if elapsed else None,
+            'escrows_per_s': round(len(escrows) / elapsed, 2) if elapsed else None,
+            'operations': operations_summary,
+            'deadlocks': (
+                deadlocks_after - deadlocks_before
+                if deadlocks_before is not None else
+                sum(op['errors'].get('deadlock', 0) for op in operations_summary.values())
+            ),
+            'lock_waits': monitor.summary() if monitor else None,
+            'violations': violations,
+        }
+
+    def run(self):
+        from django.test.utils import override_settings
+        from payments.paystack import paystack
+        from payments.simulator import PaystackSimulator, SimulatorConfig
+
+        results = {'database': connection.vendor, 'config': {
+            'threads': self.config.threads,
+            'escrows': self.config.escrows,
+            'contenders': self.config.contenders,
+            'amount': str(self.config.amount),
+        }, 'scenarios': {}}
+
+        previous_url = paystack.base_url
+        with PaystackSimulator(SimulatorConfig(webhook_url='', latency_ms=self.config.paystack_latency_ms)) as simulator, \
+                override_settings(
+                    ALLOWED_HOSTS=['testserver'],
+                    EMAIL_BACKEND='django.core.mail.backends.dummy.EmailBackend',
+                    # No worker here: tasks run inside the request or task that queues them
+                    CELERY_TASK_ALWAYS_EAGER=True,
+                    CELERY_TASK_EAGER_PROPAGATES=True,
+                ), quiet_request_log():
+            self.simulator = simulator
+            paystack.base_url = simulator.url
+            try:
+                for name in self.config.scenarios:
+                    results['scenarios'][name] = self.run_scenario(name)
+            finally:
+                paystack.base_url = previous_url
+        return results
+
+
+def check_invariants(transaction_ids):
+    """
+    Books check for the given escrows (each with its own client and provider).
+
+    Returns:
+        list: human-readable violations, empty when the books balance
+    """
+    violations = []
+    transactions = Transaction.objects.filter(pk__in=transaction_ids).select_related(
+        'client__wallet', 'service_provider__wallet',
+    )
+    open_amount = Decimal('0')
+    client_ids = []
+    for transaction in transactions:
+        client_wallet = transaction.client.wallet
+        provider = transaction.service_provider
+        released = transaction.released_at is not None
+        is_open = transaction.is_paid and not released and transaction.status != 'REFUNDED'
+        if is_open:
+            open_amount += transaction.amount
+        client_ids.append(transaction.client_id)
+
+        expected_escrow = transaction.amount if is_open else Decimal('0')
+        if client_wallet.escrow_balance != expected_escrow:
+            violations.append(
+                f'{transaction.reference}: escrow {client_wallet.escrow_balance}, expected {expected_escrow}'
+            )
+        if transaction.is_paid and client_wallet.total_spent != transaction.amount:
+            violations.append(
+                f'{transaction.reference}: paid {client_wallet.total_spent} for {transaction.amount} (charged twice)'
+            )
+        expected_balance = transaction.service_provider_amount if released else Decimal('0')
+        if provider.wallet.balance != expected_balance:
+            violations.append(
+                f'{transaction.reference}: provider credited {provider.wallet.balance}, expected {expected_balance}'
+                + (' (released twice)' if provider.wallet.balance > expected_balance else '')
+            )
+        if provider.total_completed_transactions > 1:
+            violations.append(
+                f'{transaction.reference}: counted as completed {provider.total_completed_transactions} times'
+            )
+        if transaction.is_disputed and released:
+            violations.append(f'{transaction.reference}: released while disputed')
+
+    successful = Payment.objects.filter(transaction_id__in=transaction_ids, status='SUCCESS')
+    paid = set(transactions.filter(is_paid=True).values_list('pk', flat=True))
+    for transaction_id in set(successful.values_list('transaction_id', flat=True)) - paid:
+        violations.append(f'transaction {transaction_id}: payment SUCCESS but not marked paid')
+
+    escrow_total = UserWallet.objects.filter(user_id__in=client_ids).aggregate(
+        total=Sum('escrow_balance'),
+    )['total'] or Decimal('0')
+    if escrow_total != open_amount:
+        violations.append(f'total escrow {escrow_total} != open amounts {open_amount}')
+    return violations
@@ -0,0 +1,570 @@
+"""
+Synthetic data for benchmarking
+Generates users, wallets, transactions in every status with their timeline,
+messages, payments and ratings, at millions-of-rows scale:
+
+- rows are written with Postgres COPY (bulk_create elsewhere), so no
+  save() or post_save signal runs per row
+- everything is planned with NumPy from the seed, chunk by chunk, so a
+  given configuration always produces the same data
+- providers are picked with a Zipf law (a few hot providers take most of
+  the volume) and dates follow a seasonal curve with a December peak,
+  quieter weekends and growth over the period
+
+Two passes over the same chunk plans: the first only accumulates per-user
+aggregates (wallets, completed/disputed counters, rating histograms), so
+users are written complete, before the rows that reference them.
+
+Usage: python manage.py generate_synthetic_data --users 1000000
+"""
+import csv
+import io
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models, transaction as db_transaction
+from django.utils import timezone
+
+from accounts.models import User, UserRating, UserWallet
+from payments.models import Payment
+from transactions.models import Transaction, TransactionMessage, TransactionTimeline
+
+DAY = 86400.0
+
+# NULL marker for COPY, so empty strings stay empty strings
+COPY_NULL = r'\N'
+
+# Index = status code in the plans
+STATUSES = ['PENDING', 'PAID', 'IN_PROGRESS', 'COMPLETED', 'APPROVED', 'RELEASED', 'DISPUTED', 'CANCELLED', 'REFUNDED']
+(PENDING, PAID, IN_PROGRESS, COMPLETED, APPROVED, RELEASED, DISPUTED, CANCELLED, REFUNDED) = range(len(STATUSES))
+STATUS_WEIGHTS = [0.06, 0.05, 0.08, 0.06, 0.01, 0.60, 0.03, 0.06, 0.05]
+
+# Escrows older than this have settled one way or the other
+SETTLED_AFTER_DAYS = 21
+
+# Stars 1..5
+RATING_WEIGHTS = [0.03, 0.04, 0.10, 0.30, 0.53]
+
+FIRST_NAMES = [
+    'Adaeze', 'Chinedu', 'Emeka', 'Funmilayo', 'Ibrahim', 'Kemi', 'Ngozi', 'Oluwaseun',
+    'Tunde', 'Yetunde', 'Bola', 'Chioma', 'Musa', 'Amaka', 'Segun', 'Zainab',
+]
+LAST_NAMES = [
+    'Okafor', 'Adeyemi', 'Bello', 'Eze', 'Ibrahim', 'Nwosu', 'Ogunleye', 'Okonkwo',
+    'Lawal', 'Balogun', 'Uche', 'Abubakar', 'Chukwu', 'Adebayo', 'Danjuma', 'Obi',
+]
+CATEGORIES = [
+    'Web Design', 'Plumbing', 'Graphics', 'Photography', 'Catering', 'Tutoring',
+    'Electrical', 'Writing', 'Tailoring', 'Logistics', 'Mobile Apps', 'Event Planning',
+]
+MESSAGES = [
+    'Hello, when can you start?', 'I have started on it.', 'Please see the update.',
+    'Can we adjust the timeline?', 'Done, please review.', 'Thanks, looks good!',
+    'Any progress on this?', 'I will send the files today.',
+]
+BANK_CODES = ['044', '058', '033', '011', '057', '035', '232', '214', '070', '050']
+
+
+@dataclass
+class SyntheticConfig:
+    """Shape of the generated data set"""
+    users: int = 100_000
+    transactions_per_user: float = 3.0
+    provider_share: float = 0.3
+    provider_skew: float = 1.1        # Zipf exponent over provider popularity
+    days: int = 365
+    seed: int = 42
+    chunk_size: int = 20_000
+    password: str = None              # unusable passwords when None
+    use_copy: bool = True             # COPY on Postgres; ignored elsewhere
+
+    @property
+    def transactions(self):
+        return int(self.users * self.transactions_per_user)
+
+
+def _naira(kobo):
+    return [f'{k // 100}.{k % 100:02d}' for k in kobo.tolist()]
+
+
+def _timestamps(seconds):
+    """Epoch seconds (NaN = missing) -> ISO-8601 UTC strings or None"""
+    missing = np.isnan(seconds)
+    values = np.datetime_as_string(
+        np.where(missing, 0, seconds * 1e6).astype('datetime64[us]'), unit='us',
+    ).tolist()
+    return [None if absent else f'{value}+00:00' for value, absent in zip(values, missing.tolist())]
+
+
+def _uuids(rng, n):
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    return [str(uuid.UUID(bytes=row.tobytes(), version=4)) for row in raw]
+
+
+def _after(base, rng, scale_seconds, mask):
+    """base + Exp(scale) where mask, NaN elsewhere"""
+    return np.where(mask, base + rng.exponential(scale_seconds, base.shape[0]), np.nan)
+
+
+class RowWriter:
+    """
+    Writes (columns, rows) batches with COPY or bulk_create.
+    Non-null columns not supplied get the field default, once per batch.
+    """
+
+    def __init__(self, use_copy=True):
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.rows = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def _defaults(self, model, columns):
+        supplied = set(columns)
+        defaults = []
+        for field in model._meta.concrete_fields:
+            if field.attname in supplied or field.primary_key or field.null:
+                continue
+            if field.unique:
+                raise ValueError(f'{model.__name__}.{field.name} is unique and must be supplied')
+            defaults.append((field.attname, field.get_default()))
+        return defaults
+
+    def write(self, model, columns, rows):
+        if not rows:
+            return
+        started = time.perf_counter()
+        defaults = self._defaults(model, columns)
+        if self.use_copy:
+            self._copy(model, columns, rows, defaults)
+        else:
+            self._bulk_create(model, columns, rows, defaults)
+        self.rows[model._meta.db_table] += len(rows)
+        self.seconds[model._meta.db_table] += time.perf_counter() - started
+
+    def _copy(self, model, columns, rows, defaults):
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        constants = [_copy_value(fields[name].get_db_prep_save(value, connection)) for name, value in defaults]
+        all_columns = [fields[name].column for name in columns] + [fields[name].column for name, _ in defaults]
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(value) for value in row] + constants)
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(model._meta.db_table)} ({", ".join(quote(c) for c in all_columns)}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer,
+            )
+
+    def _bulk_create(self, model, columns, rows, defaults):
+        datetimes = {
+            index for index, name in enumerate(columns)
+            if isinstance(model._meta.get_field(_field_name(model, name)), models.DateTimeField)
+        }
+        objects = []
+        for row in rows:
+            values = [
+                datetime.fromisoformat(value) if index in datetimes and value is not None else value
+                for index, value in enumerate(row)
+            ]
+            objects.append(model(**dict(zip(columns, values))))
+        model.objects.bulk_create(objects, batch_size=2000)
+
+
+def _field_name(model, attname):
+    for field in model._meta.concrete_fields:
+        if field.attname == attname:
+            return field.name
+    return attname
+
+
+def _copy_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+@contextmanager
+def _explicit_timestamps(*model_classes):
+    """Let bulk_create keep the generated created_at/updated_at instead of now()"""
+    toggled = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                toggled.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in toggled:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataGenerator:
+    """Plans and writes one data set; `generate()` returns per-table row counts and timings"""
+
+    def __init__(self, config=None):
+        self.config = config or SyntheticConfig()
+        config = self.config
+        self.now = timezone.now().timestamp()
+        self.period_start = self.now - config.days * DAY
+        self.fee_bp = int(settings.PLATFORM_FEE_PERCENTAGE * 100)  # basis points
+        self.min_kobo = int(settings.MIN_TRANSACTION_AMOUNT * 100)
+        self.max_kobo = int(settings.MAX_TRANSACTION_AMOUNT * 100)
+
+        rng = np.random.default_rng([config.seed, 0])
+        self.is_provider = rng.random(config.users) < config.provider_share
+        self.providers = np.flatnonzero(self.is_provider)
+        if not len(self.providers):
+            self.is_provider[0] = True
+            self.providers = np.array([0])
+        # Zipf popularity over a random ranking of providers
+        weights = 1.0 / np.arange(1, len(self.providers) + 1) ** config.provider_skew
+        self.provider_cdf = np.cumsum(rng.permutation(weights))
+        self.provider_cdf /= self.provider_cdf[-1]
+        self.day_weights = self._seasonality()
+
+        self.user_base = (User.objects.aggregate(models.Max('pk'))['pk__max'] or 0) + 1
+        self.transaction_base = (Transaction.objects.aggregate(models.Max('pk'))['pk__max'] or 0) + 1
+
+    def _seasonality(self):
+        """Relative volume for each day of the period"""
+        days = np.arange(self.config.days)
+        dates = (self.period_start + days * DAY).astype('datetime64[s]')
+        day_of_year = (dates - dates.astype('datetime64[Y]')).astype('timedelta64[D]').astype(int)
+        month = dates.astype('datetime64[M]').astype(int) % 12 + 1
+        weekday = (dates.astype('datetime64[D]').astype(int) + 3) % 7  # 0 = Monday
+        weights = (
+            1.0
+            + 0.25 * np.sin(2 * np.pi * (day_of_year - 80) / 365)
+            + np.where((month == 12) & (day_of_year % 31 >= 9), 0.8, 0.0)
+            - np.where(weekday >= 5, 0.25, 0.0)
+            + 0.5 * days / max(self.config.days - 1, 1)
+        )
+        return weights / weights.sum()
+
+    # Planning
+
+    def _chunks(self):
+        total = self.config.transactions
+        return range((total + self.config.chunk_size - 1) // self.config.chunk_size)
+
+    def plan_transactions(self, chunk):
+        """Arrays for one chunk of transactions; deterministic per (seed, chunk)"""
+        config = self.config
+        first = chunk * config.chunk_size
+        n = min(config.chunk_size, config.transactions - first)
+        rng = np.random.default_rng([config.seed, 1, chunk])
+
+        day = rng.choice(config.days, n, p=self.day_weights)
+        created = self.period_start + day * DAY + rng.uniform(0, DAY, n)
+        provider = self.providers[np.searchsorted(self.provider_cdf, rng.random(n))]
+        client = rng.integers(0, config.users, n)
+        client = np.where(client == provider, (client + 1) % config.users, client)
+        amount = np.clip(np.round(rng.lognormal(np.log(25_000), 0.9, n), -2) * 100, self.min_kobo, self.max_kobo)
+        amount = amount.astype(np.int64)
+        fee = (amount * self.fee_bp + 5000) // 10000
+
+        status = rng.choice(len(STATUSES), n, p=STATUS_WEIGHTS)
+        settled = (self.now - created) > SETTLED_AFTER_DAYS * DAY
+        status = np.where(settled & (status == PENDING), CANCELLED, status)
+        status = np.where(settled & np.isin(status, [PAID, IN_PROGRESS, COMPLETED, APPROVED]), RELEASED, status)
+
+        disputed = np.isin(status, [DISPUTED, REFUNDED])
+        paid = ~np.isin(status, [PENDING, CANCELLED])
+        completed = np.isin(status, [COMPLETED, APPROVED, RELEASED])
+        started = np.isin(status, [IN_PROGRESS]) | completed | (disputed & (rng.random(n) < 0.7))
+        released = status == RELEASED
+        approved = (status == APPROVED) | (released & (rng.random(n) < 0.8))
+
+        paid_at = _after(created, rng, 3600, paid)
+        work_started_at = _after(paid_at, rng, DAY / 2, started)
+        work_completed_at = _after(work_started_at, rng, 2 * DAY, completed)
+        auto_release_date = np.where(completed, work_completed_at + settings.AUTO_RELEASE_DAYS * DAY, np.nan)
+        approved_at = _after(work_completed_at, rng, DAY, approved)
+        released_at = np.where(released, np.where(approved, approved_at, auto_release_date), np.nan)
+        dispute_from = np.where(started, work_started_at, paid_at)
+        dispute_raised_at = _after(dispute_from, rng, DAY, disputed)
+        dispute_resolved_at = _after(dispute_raised_at, rng, 3 * DAY, status == REFUNDED)
+
+        clip = lambda values: np.where(np.isnan(values), np.nan, np.minimum(values, self.now))
+        plan = {
+            'first': first,
+            'n': n,
+            'rng': rng,
+            'client': client,
+            'provider': provider,
+            'amount': amount,
+            'fee': fee,
+            'status': status,
+            'paid': paid,
+            'disputed': disputed,
+            'created': created,
+            'paid_at': clip(paid_at),
+            'work_started_at': clip(work_started_at),
+            'work_completed_at': clip(work_completed_at),
+            'auto_release_date': auto_release_date,
+            'approved_at': clip(approved_at),
+            'released_at': clip(released_at),
+            'dispute_raised_at': clip(dispute_raised_at),
+            'dispute_resolved_at': clip(dispute_resolved_at),
+        }
+
+        # Ratings on released escrows: client -> provider, sometimes provider -> client
+        rated = np.flatnonzero(released)
+        client_rates = rated[rng.random(len(rated)) < 0.6]
+        provider_rates = rated[rng.random(len(rated)) < 0.3]
+        plan['ratings'] = (
+            np.concatenate([client_rates, provider_rates]),
+            np.concatenate([provider[client_rates], client[provider_rates]]),
+            np.concatenate([client[client_rates], provider[provider_rates]]),
+            rng.choice(5, len(client_rates) + len(provider_rates), p=RATING_WEIGHTS) + 1,
+        )
+        return plan
+
+    def aggregates(self):
+        """Pass 1: per-user wallet sums, counters and rating histograms"""
+        users = self.config.users
+        totals = {name: np.zeros(users, dtype=np.int64) for name in (
+            'escrow', 'spent', 'earned', 'completed', 'disputes', 'rating_count', 'rating_sum',
+        )}
+        histogram = np.zeros((users, 5), dtype=np.int64)
+        open_statuses = [PAID, IN_PROGRESS, COMPLETED, APPROVED, DISPUTED]
+
+        for chunk in self._chunks():
+            plan = self.plan_transactions(chunk)
+            client, provider, amount, status = plan['client'], plan['provider'], plan['amount'], plan['status']
+            released = status == RELEASED
+            totals['escrow'] += np.bincount(client, np.where(np.isin(status, open_statuses), amount, 0), users).astype(np.int64)
+            totals['spent'] += np.bincount(client, np.where(plan['paid'], amount, 0), users).astype(np.int64)
+            totals['earned'] += np.bincount(provider, np.where(released, amount - plan['fee'], 0), users).astype(np.int64)
+            totals['completed'] += np.bincount(client, released, users).astype(np.int64)
+            totals['completed'] += np.bincount(provider, released, users).astype(np.int64)
+            totals['disputes'] += np.bincount(provider, plan['disputed'], users).astype(np.int64)
+
+            _, rated_user, _, stars = plan['ratings']
+            totals['rating_count'] += np.bincount(rated_user, minlength=users)
+            totals['rating_sum'] += np.bincount(rated_user, stars, users).astype(np.int64)
+            np.add.at(histogram, (rated_user, stars - 1), 1)
+
+        totals['histogram'] = histogram
+        return totals
+
+    # Writing
+
+    def _write_users(self, writer, totals):
+        config = self.config
+        password = make_password(config.password)
+        rng = np.random.default_rng([config.seed, 2])
+        joined = self.period_start - rng.uniform(0, 365 * DAY, config.users)
+        first_names = rng.integers(0, len(FIRST_NAMES), config.users)
+        last_names = rng.integers(0, len(LAST_NAMES), config.users)
+        user_type = np.where(self.is_provider, np.where(rng.random(config.users) < 0.3, 'BOTH', 'PROVIDER'), 'CLIENT')
+        verified = self.is_provider & (rng.random(config.users) < 0.8)
+        bank_codes = rng.integers(0, len(BANK_CODES), config.users)
+        accounts = rng.integers(0, 10 ** 10, config.users)
+        joined_at = _timestamps(joined)
+        histogram = totals['histogram']
+
+        user_columns = [
+            'id', 'password', 'username', 'email', 'phone_number', 'first_name', 'last_name',
+            'user_type', 'is_verified', 'is_email_verified', 'bank_name', 'bank_code', 'account_number',
+            'account_name', 'bank_account_verified', 'total_completed_transactions', 'total_disputes',
+            'trust_score_dirty', 'rating_count', 'rating_sum', 'rating_1_count', 'rating_2_count',
+            'rating_3_count', 'rating_4_count', 'rating_5_count', 'date_joined', 'created_at', 'updated_at',
+        ]
+        wallet_columns = ['user_id', 'balance', 'escrow_balance', 'total_earned', 'total_spent', 'created_at', 'updated_at']
+
+        for start in range(0, config.users, config.chunk_size):
+            end = min(start + config.chunk_size, config.users)
+            user_rows, wallet_rows = [], []
+            escrow = _naira(totals['escrow'][start:end])
+            spent = _naira(totals['spent'][start:end])
+            earned = _naira(totals['earned'][start:end])
+            for i in range(start, end):
+                pk = self.user_base + i
+                first, last = FIRST_NAMES[first_names[i]], LAST_NAMES[last_names[i]]
+                provider = bool(self.is_provider[i])
+                user_rows.append((
+                    pk, password, f'synthetic{pk}', f'user{pk}@synthetic.invalid', f'234{pk:010d}', first, last,
+                    str(user_type[i]), provider and bool(verified[i]), True,
+                    '' if not provider else f'Bank {BANK_CODES[bank_codes[i]]}',
+                    '' if not provider else BANK_CODES[bank_codes[i]],
+                    '' if not provider else f'{accounts[i]:010d}',
+                    '' if not provider else f'{first} {last}'.upper(),
+                    bool(verified[i]),
+                    int(totals['completed'][i]), int(totals['disputes'][i]), True,
+                    int(totals['rating_count'][i]), int(totals['rating_sum'][i]),
+                    *(int(count) for count in histogram[i]),
+                    joined_at[i], joined_at[i], joined_at[i],
+                ))
+                # Providers keep their earnings: payouts are not simulated
+                wallet_rows.append((
+                    pk, earned[i - start], escrow[i - start], earned[i - start], spent[i - start],
+                    joined_at[i], joined_at[i],
+                ))
+            with self._batch():
+                writer.write(User, user_columns, user_rows)
+                writer.write(UserWallet, wallet_columns, wallet_rows)
+
+    def _write_transactions(self, writer, plan):
+        n, first = plan['n'], plan['first']
+        rng = plan['rng']
+        pks = np.arange(self.transaction_base + first, self.transaction_base + first + n)
+        client = plan['client'] + self.user_base
+        provider = plan['provider'] + self.user_base
+        status = plan['status']
+        amount, fee = _naira(plan['amount']), _naira(plan['fee'])
+        provider_amount = _naira(plan['amount'] - plan['fee'])
+        stamps = {name: _timestamps(plan[name]) for name in (
+            'created', 'paid_at', 'work_started_at', 'work_completed_at', 'auto_release_date',
+            'approved_at', 'released_at', 'dispute_raised_at', 'dispute_resolved_at',
+        )}
+        categories = rng.integers(0, len(CATEGORIES), n)
+        transaction_ids = _uuids(rng, n)
+
+        transaction_rows, timeline_rows, message_rows, payment_rows, rating_rows = [], [], [], [], []
+        message_counts = np.where(plan['paid'], rng.poisson(1.5, n), 0)
+        message_gaps = rng.exponential(6 * 3600, int(message_counts.sum()) or 1)
+        message_texts = rng.integers(0, len(MESSAGES), len(message_gaps))
+        failed_first = rng.random(n) < 0.1
+        pending_payment = rng.random(n) < 0.5
+        payment_ids = _uuids(rng, 2 * n)
+        gap = 0
+
+        for i in range(n):
+            pk = int(pks[i])
+            code = int(status[i])
+            reference = f'TXN-S{pk:010X}'
+            created = stamps['created'][i]
+            paid = bool(plan['paid'][i])
+            transaction_rows.append((
+                pk, transaction_ids[i], reference, int(client[i]), int(provider[i]),
+                amount[i], fee[i], provider_amount[i],
+                f'{CATEGORIES[categories[i]]} job {reference}', CATEGORIES[categories[i]], STATUSES[code],
+                created, stamps['paid_at'][i], stamps['work_started_at'][i], stamps['work_completed_at'][i],
+                stamps['approved_at'][i], stamps['released_at'][i], stamps['auto_release_date'][i],
+                code == DISPUTED, 'Work not delivered as agreed' if plan['disputed'][i] else '',
+                stamps['dispute_raised_at'][i], stamps['dispute_resolved_at'][i],
+                f'PAY-S{pk:010X}1' if paid else '', paid,
+            ))
+
+            # The events create_timeline_entry would have recorded
+            events = [('Transaction Created', f'Transaction {reference} created', client[i], created)]
+            if paid:
+                events.append(('Payment Received', f'₦{amount[i]} received and held in escrow', client[i], stamps['paid_at'][i]))
+            if stamps['work_started_at'][i]:
+                events.append(('Work Started', 'Provider started working on the service', provider[i], stamps['work_started_at'][i]))
+            if stamps['work_completed_at'][i]:
+                events.append(('Work Completed', 'Provider marked work as completed', provider[i], stamps['work_completed_at'][i]))
+            if stamps['dispute_raised_at'][i]:
+                events.append(('Dispute Raised', 'Dispute raised by client', client[i], stamps['dispute_raised_at'][i]))
+            if stamps['released_at'][i]:
+                events.append(('Payment Released', f'₦{provider_amount[i]} released to provider', None, stamps['released_at'][i]))
+            for event, description, by, at in events:
+                timeline_rows.append((pk, event, description, None if by is None else int(by), at))
+
+            sent = plan['created'][i]
+            for k in range(int(message_counts[i])):
+                sent += message_gaps[gap]
+                sender = client[i] if k % 2 == 0 else provider[i]
+                message_rows.append((pk, int(sender), MESSAGES[message_texts[gap]], sent, True))
+                gap += 1
+
+            if paid:
+                if failed_first[i]:
+                    payment_rows.append((payment_ids[2 * i + 1], f'PAY-S{pk:010X}0', int(client[i]), pk, amount[i], 'FAILED', created, None))
+                payment_rows.append((payment_ids[2 * i], f'PAY-S{pk:010X}1', int(client[i]), pk, amount[i], 'SUCCESS', created, stamps['paid_at'][i]))
+            elif code == PENDING and pending_payment[i]:
+                payment_rows.append((payment_ids[2 * i], f'PAY-S{pk:010X}1', int(client[i]), pk, amount[i], 'PENDING', created, None))
+            elif code == CANCELLED and pending_payment[i]:
+                payment_rows.append((payment_ids[2 * i], f'PAY-S{pk:010X}1', int(client[i]), pk, amount[i], 'CANCELLED', created, None))
+
+        sent_at = _timestamps(np.minimum(np.array([row[3] for row in message_rows], dtype=float), self.now))
+        message_rows = [row[:3] + (at,) + row[4:] for row, at in zip(message_rows, sent_at)]
+
+        indexes, rated_user, rater, stars = plan['ratings']
+        rated_at = _timestamps(np.minimum(plan['released_at'][indexes] + DAY, self.now))
+        for index, user, by, star, at in zip(indexes.tolist(), rated_user.tolist(), rater.tolist(), stars.tolist(), rated_at):
+            rating_rows.append((int(pks[index]), self.user_base + user, self.user_base + by, star, at))
+
+        with self._batch():
+            writer.write(Transaction, [
+                'id', 'transaction_id', 'reference', 'client_id', 'service_provider_id',
+                'amount', 'platform_fee', 'service_provider_amount', 'service_description', 'service_category', 'status',
+                'created_at', 'paid_at', 'work_started_at', 'work_completed_at', 'approved_at', 'released_at',
+                'auto_release_date', 'is_disputed', 'dispute_reason', 'dispute_raised_at', 'dispute_resolved_at',
+                'payment_reference', 'is_paid',
+            ], transaction_rows)
+            writer.write(TransactionTimeline, ['transaction_id', 'event', 'description', 'created_by_id', 'created_at'], timeline_rows)
+            writer.write(TransactionMessage, ['transaction_id', 'sender_id', 'message', 'created_at', 'is_read'], message_rows)
+            writer.write(Payment, [
+                'payment_id', 'reference', 'user_id', 'transaction_id', 'amount', 'status', 'created_at', 'verified_at',
+            ], payment_rows)
+            writer.write(UserRating, ['transaction_id', 'rated_user_id', 'rater_id', 'rating', 'created_at'], rating_rows)
+
+    @contextmanager
+    def _batch(self):
+        """One chunk per database transaction; skip the WAL flush wait on Postgres"""
+        with db_transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL synchronous_commit TO OFF')
+            yield
+
+    def _reset_sequences(self):
+        """Ids were assigned here; move the sequences past them"""
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Transaction])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def generate(self, progress=None):
+        """
+        Write the data set.
+
+        Args:
+            progress: optional callable(message) for progress lines
+
+        Returns:
+            dict: table -> {'rows', 'seconds'}, plus 'total_rows' and 'seconds'
+        """
+        progress = progress or (lambda message: None)
+        started = time.perf_counter()
+        writer = RowWriter(self.config.use_copy)
+
+        totals = self.aggregates()
+        progress(f'Planned {self.config.transactions:,} transactions in {time.perf_counter() - started:.1f}s')
+
+        with _explicit_timestamps(User, UserWallet, Transaction, TransactionTimeline, TransactionMessage, Payment, UserRating):
+            self._write_users(writer, totals)
+            progress(f'Wrote {self.config.users:,} users and wallets')
+            for chunk in self._chunks():
+                self._write_transactions(writer, self.plan_transactions(chunk))
+                progress(f"Wrote chunk {chunk + 1}/{len(self._chunks())}: {sum(writer.rows.values()):,} rows so far")
+
+        self._reset_sequences()
+        tables = {
+            table: {'rows': writer.rows[table], 'seconds': round(writer.seconds[table], 3)}
+            for table in writer.rows
+        }
+        return {
+            'tables': tables,
+            'total_rows': sum(writer.rows.values()),
+            'seconds': time.perf_counter() - started,
+            'method': 'copy' if writer.use_copy else 'bulk_create',
+        }
@@ -0,0 +1,126 @@
+"""
+Celery task instrumentation (Prometheus, see core.metrics)
+- Runtime histogram per task and final state (task_prerun / task_postrun)
+- Queue lag: enqueue (or ETA) to start, per task and queue
+- Retries and failures per task
+- Items processed: the int values of a task's dict result, or an int result
+
+Imported by config/celery.py. Prefork workers record in their child
+processes, so run workers with PROMETHEUS_MULTIPROC_DIR set (as for
+gunicorn); with WORKER_METRICS_PORT set the worker's main process serves
+them all on that port.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from celery.signals import (
+    before_task_publish, task_failure, task_postrun, task_prerun, task_retry,
+    worker_init, worker_process_shutdown,
+)
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+
+# Message header carrying the publish time (epoch seconds)
+ENQUEUED_AT_HEADER = 'enqueued_at'
+
+TASK_RUNTIME = Histogram(
+    'saferelease_celery_task_duration_seconds',
+    'Task run time, by task and final state',
+    ['task', 'state'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+TASK_QUEUE_LAG = Histogram(
+    'saferelease_celery_task_queue_lag_seconds',
+    'Time from enqueue (or ETA) until a worker started the task',
+    ['task', 'queue'],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600),
+)
+TASK_RETRIES = Counter(
+    'saferelease_celery_task_retries',
+    'Task retries scheduled',
+    ['task'],
+)
+TASK_FAILURES = Counter(
+    'saferelease_celery_task_failures',
+    'Tasks that raised, by exception type',
+    ['task', 'exception'],
+)
+TASK_ITEMS = Counter(
+    'saferelease_celery_task_items',
+    'Items reported in task results (released, emails_sent, emails_failed, ...)',
+    ['task', 'item'],
+)
+
+_started = {}
+_started_lock = threading.Lock()
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(ENQUEUED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def task_started(task_id=None, task=None, **kwargs):
+    with _started_lock:
+        _started[task_id] = time.perf_counter()
+
+    request = task.request
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None)
+    if enqueued_at is None:
+        return  # Eager or published without the header
+    ready_at = float(enqueued_at)
+    if request.eta:
+        eta = request.eta if isinstance(request.eta, datetime) else datetime.fromisoformat(request.eta)
+        ready_at = max(ready_at, eta.timestamp())
+    queue = (request.delivery_info or {}).get('routing_key') or 'celery'
+    TASK_QUEUE_LAG.labels(task.name, queue).observe(max(0.0, time.time() - ready_at))
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    with _started_lock:
+        started = _started.pop(task_id, None)
+    if started is not None:
+        TASK_RUNTIME.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+    if state != 'SUCCESS':
+        return
+    if isinstance(retval, dict):
+        for item, value in retval.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                TASK_ITEMS.labels(task.name, str(item).lower()).inc(value)
+    elif isinstance(retval, int) and not isinstance(retval, bool):
+        TASK_ITEMS.labels(task.name, 'items').inc(retval)
+
+
+@task_retry.connect
+def task_retried(sender=None, **kwargs):
+    TASK_RETRIES.labels(sender.name).inc()
+
+
+@task_failure.connect
+def task_failed(sender=None, exception=None, **kwargs):
+    TASK_FAILURES.labels(sender.name, type(exception).__name__).inc()
+
+
+@worker_init.connect
+def serve_worker_metrics(**kwargs):
+    """Expose the worker's metrics on WORKER_METRICS_PORT, if set"""
+    from django.conf import settings
+
+    if not settings.WORKER_METRICS_PORT:
+        return
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(settings.WORKER_METRICS_PORT, registry=registry)
+
+
+@worker_process_shutdown.connect
+def drop_worker_samples(pid=None, **kwargs):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid or os.getpid())
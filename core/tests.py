@@ -0,0 +1,127 @@
+"""
+Tests for core app
+"""
+import threading
+
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from accounts.models import User
+from transactions.models import Transaction
+
+from . import instrumentation, profiler
+from .models import SlowQuery
+from .slow_queries import SlowQueryWrapper, _param_types, _snapshot, record_slow_query
+from .views import dashboard_cache
+
+
+@override_settings(
+    SLOW_QUERY_MS=200,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class ExecuteWrapperTests(TransactionTestCase):
+    """The permanent execute_wrappers survive requests that open the connection"""
+
+    def test_request_opening_a_connection_keeps_the_slow_query_wrapper(self):
+        user = User.objects.create_user(
+            username='wrapper', email='wrapper@example.com', phone_number='08099990001', password='x-secret-1',
+        )
+        client = Client()
+        client.force_login(user)
+        results = {}
+
+        def worker():
+            # A fresh thread: its first connection opens inside the middleware's execute_wrapper()
+            try:
+                timings = [client.get('/dashboard/', secure=True)['Server-Timing'] for _ in range(3)]
+                results['timings'] = timings
+                results['wrappers'] = list(connection.execute_wrappers)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        # The permanent wrappers, once each, and nothing a request left behind
+        wrappers = results['wrappers']
+        self.assertEqual(len(wrappers), 3)
+        self.assertEqual(sum(isinstance(wrapper, SlowQueryWrapper) for wrapper in wrappers), 1)
+        self.assertIn(instrumentation.count_queries, wrappers)
+        self.assertIn(profiler.log_queries, wrappers)
+        # Later requests count their queries once, like the second one
+        queries = [timing.split('desc="')[1].split(' ')[0] for timing in results['timings']]
+        self.assertEqual(queries[1], queries[2])
+        self.assertNotEqual(queries[1], '0')
+
+
+class StoredPathTests(SimpleTestCase):
+    """Profiles never store the token that requested them"""
+
+    def test_profile_param_is_dropped(self):
+        request = RequestFactory().get('/dashboard/', {'page': '2', profiler.PROFILE_PARAM: 'secret-token'})
+        self.assertEqual(profiler.stored_path(request), '/dashboard/?page=2')
+
+    def test_path_without_other_parameters(self):
+        request = RequestFactory().get('/dashboard/', {profiler.PROFILE_PARAM: 'secret-token'})
+        self.assertEqual(profiler.stored_path(request), '/dashboard/')
+
+
+class MetricsEndpointTests(TestCase):
+    """/metrics is closed unless a token is configured (or DEBUG is on)"""
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_token_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+        self.assertEqual(response.status_code, 200)
+
+
+class DashboardInvalidationTests(TestCase):
+    """Cached dashboards are dropped when the write commits, not before"""
+
+    def test_transaction_save_drops_dashboards_on_commit(self):
+        client = User.objects.create_user(
+            username='dash-client', email='dash-client@example.com', phone_number='08099990002', password='x-secret-1',
+        )
+        provider = User.objects.create_user(
+            username='dash-provider', email='dash-provider@example.com', phone_number='08099990003',
+            password='x-secret-1',
+        )
+        dashboard_cache.set(client.pk, 'cached')
+        dashboard_cache.set(provider.pk, 'cached')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                client=client, service_provider=provider, amount=1000, service_description='Dashboard test',
+            )
+            self.assertEqual(dashboard_cache.get(client.pk), 'cached')
+
+        self.assertIsNone(dashboard_cache.get(client.pk))
+        self.assertIsNone(dashboard_cache.get(provider.pk))
+
+
+class SlowQueryRecordTests(TestCase):
+    """The EXPLAIN re-run gets the parameters as they were passed"""
+
+    def record(self, sql, params):
+        record_slow_query('default', sql, _snapshot(params), _param_types(params), 250.0, 'test')
+        return SlowQuery.objects.get()
+
+    def test_parameters_reach_explain_unchanged(self):
+        slow_query = self.record('SELECT id FROM core_faq WHERE question IN (%s, %s)', [b'bytes', 'text'])
+
+        self.assertEqual(slow_query.plan_error, '')
+        self.assertTrue(slow_query.plan)
+        self.assertEqual(slow_query.sample_params, ['bytes', 'str'])
+
+    def test_failed_explain_is_not_stored_as_the_plan(self):
+        slow_query = self.record('SELECT id FROM no_such_table WHERE id = %s', [1])
+
+        self.assertEqual(slow_query.plan, '')
+        self.assertIn('no_such_table', slow_query.plan_error)
+        self.assertIsNotNone(slow_query.plan_captured_at)
@@ -15,6 +15,7 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('terms/', views.terms, name='terms'),
     path('privacy/', views.privacy, name='privacy'),
+    path('metrics', views.metrics, name='metrics'),
 
     path('Boyz-II-Men/', views.love_page, name='love_page'),
 ]
@@ -5,11 +5,22 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Sum, Count
 from transactions.models import Transaction
+from .cache import CacheNamespace
+from .decorators import cache_anonymous_page
 from .models import FAQ, Testimonial
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST
+from .metrics import render_metrics
 
 
+dashboard_cache = CacheNamespace('dashboard', timeout=300)
+
+
+@cache_anonymous_page
 def love_page(request):
     """
     Displays the romantic message page with access code protection.
@@ -40,6 +51,7 @@ def validate_access(request):
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+@cache_anonymous_page
 def home(request):
     """Homepage view"""
     if request.user.is_authenticated:
@@ -57,83 +69,108 @@ def home(request):
     return render(request, 'core/home.html', context)
 
 
+def get_dashboard_stats(user):
+    """Transaction counts and wallet figures for the dashboard, cached per user"""
+    def compute():
+        counts = Transaction.objects.filter(
+            Q(client=user) | Q(service_provider=user)
+        ).aggregate(
+            as_client_count=Count('id', filter=Q(client=user)),
+            as_provider_count=Count('id', filter=Q(service_provider=user)),
+            active_transactions=Count(
+                'id', filter=Q(status__in=['PAID', 'IN_PROGRESS', 'COMPLETED'])
+            ),
+            pending_approvals=Count(
+                'id', filter=Q(client=user, status='COMPLETED', is_disputed=False)
+            ),
+            pending_work=Count(
+                'id', filter=Q(service_provider=user, status__in=['PAID', 'IN_PROGRESS'])
+            ),
+        )
+        wallet = user.wallet
+        return {
+            'total_transactions': counts['as_client_count'] + counts['as_provider_count'],
+            'as_client_count': counts['as_client_count'],
+            'as_provider_count': counts['as_provider_count'],
+            'active_transactions': counts['active_transactions'],
+            'pending_approvals': counts['pending_approvals'],
+            'pending_work': counts['pending_work'],
+            'wallet_balance': wallet.balance,
+            'escrow_balance': wallet.escrow_balance,
+            'total_earned': wallet.total_earned,
+            'total_spent': wallet.total_spent,
+        }
+
+    return dashboard_cache.get_or_set(user.pk, compute)
+
+
 @login_required
 def dashboard(request):
     """User dashboard"""
     user = request.user
     
-    # Get user's transactions
-    as_client = Transaction.objects.filter(client=user)
-    as_provider = Transaction.objects.filter(service_provider=user)
-    
-    # Statistics
-    stats = {
-        'total_transactions': as_client.count() + as_provider.count(),
-        'as_client_count': as_client.count(),
-        'as_provider_count': as_provider.count(),
-        'active_transactions': Transaction.objects.filter(
-            Q(client=user) | Q(service_provider=user),
-            status__in=['PAID', 'IN_PROGRESS', 'COMPLETED']
-        ).count(),
-        'wallet_balance': user.wallet.balance,
-        'escrow_balance': user.wallet.escrow_balance,
-        'total_earned': user.wallet.total_earned,
-        'total_spent': user.wallet.total_spent,
-    }
+    # Statistics (invalidated by core.signals when transactions or wallets change)
+    stats = get_dashboard_stats(user)
     
     # Recent transactions
     recent_transactions = Transaction.objects.filter(
         Q(client=user) | Q(service_provider=user)
-    ).order_by('-created_at')[:5]
-    
-    # Pending actions
-    pending_approvals = Transaction.objects.filter(
-        client=user,
-        status='COMPLETED',
-        is_disputed=False
-    ).count()
-    
-    pending_work = Transaction.objects.filter(
-        service_provider=user,
-        status__in=['PAID', 'IN_PROGRESS']
-    ).count()
+    ).select_related('client', 'service_provider').order_by('-created_at')[:5]
     
     context = {
         'stats': stats,
         'recent_transactions': recent_transactions,
-        'pending_approvals': pending_approvals,
-        'pending_work': pending_work,
+        'pending_approvals': stats['pending_approvals'],
+        'pending_work': stats['pending_work'],
     }
     
     return render(request, 'core/dashboard.html', context)
 
 
+@cache_anonymous_page
 def how_it_works(request):
     """How it works page"""
     return render(request, 'core/how_it_works.html')
 
 
+@cache_anonymous_page
 def about(request):
     """About us page"""
     return render(request, 'core/about.html')
 
 
+@cache_anonymous_page
 def faq_page(request):
     """FAQ page"""
     faqs = FAQ.objects.filter(is_active=True)
     return render(request, 'core/faq.html', {'faqs': faqs})
 
 
+@cache_anonymous_page
 def contact(request):
     """Contact page"""
     return render(request, 'core/contact.html')
 
 
+@cache_anonymous_page
 def terms(request):
     """Terms and conditions"""
     return render(request, 'core/terms.html')
 
 
+@cache_anonymous_page
 def privacy(request):
     """Privacy policy"""
     return render(request, 'core/privacy.html')
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint (see core.metrics); closed without METRICS_TOKEN outside DEBUG"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,11 @@
+"""
+gunicorn settings (read automatically from the working directory)
+"""
+import os
+
+
+def child_exit(server, worker):
+    """Drop an exited worker's live samples from the Prometheus multiprocess directory"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -2,7 +2,8 @@
 Admin configuration for payments
 """
 from django.contrib import admin
-from .models import Payment, Payout
+from .models import Bank, Payment, Payout, TransferRecipient, WebhookEvent
+from .tasks import process_webhook_event
 
 
 @admin.register(Payment)
@@ -36,5 +37,40 @@ class PayoutAdmin(admin.ModelAdmin):
     list_display = ['reference', 'user', 'amount', 'status', 'bank_name', 
                     'created_at']
     list_filter = ['status', 'bank_name', 'created_at']
-    search_fields = ['reference', 'transfer_code', 'user__email', 'account_number']
+    search_fields = ['reference', 'transfer_code', 'recipient_code', 'user__email', 'account_number']
     readonly_fields = ['payout_id', 'reference', 'created_at', 'processed_at']
+
+
+@admin.register(Bank)
+class BankAdmin(admin.ModelAdmin):
+    """Bank directory admin"""
+    list_display = ['name', 'code', 'is_active', 'updated_at']
+    list_filter = ['is_active']
+    search_fields = ['name', 'code']
+
+
+@admin.register(TransferRecipient)
+class TransferRecipientAdmin(admin.ModelAdmin):
+    """Transfer recipient admin"""
+    list_display = ['recipient_code', 'user', 'bank_code', 'account_number', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['recipient_code', 'user__email', 'account_number']
+    readonly_fields = ['created_at']
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """Webhook event admin"""
+    list_display = ['event_id', 'event', 'status', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event', 'received_at']
+    search_fields = ['event_id']
+    readonly_fields = ['event_id', 'event', 'body', 'signature', 'status', 'attempts',
+                       'error', 'received_at', 'processed_at']
+    actions = ['replay_events']
+    
+    @admin.action(description='Replay selected events')
+    def replay_events(self, request, queryset):
+        event_ids = list(queryset.values_list('event_id', flat=True))
+        for event_id in event_ids:
+            process_webhook_event.delay(event_id, force=True)
+        self.message_user(request, f'Queued {len(event_ids)} events for replay.')
@@ -0,0 +1,119 @@
+"""
+Async payment views for ASGI deployments
+Mirror initiate_payment and verify_payment in views.py, but await the
+Paystack round-trip instead of holding a worker thread for it. Enabled
+by PAYSTACK_ASYNC_VIEWS (set by config/asgi.py).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import redirect
+from transactions.models import Transaction
+from .models import Payment
+from .paystack_async import async_paystack
+from .verification import apply_verification, averify_reference
+
+
+@sync_to_async
+def _get_user(request):
+    """Resolve the lazy request.user off the event loop (it hits the session table)"""
+    return request.user if request.user.is_authenticated else None
+
+
+async def initiate_payment(request, transaction_id):
+    """Initiate payment for a transaction"""
+    user = await _get_user(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+
+    try:
+        transaction = await Transaction.objects.aget(id=transaction_id)
+    except Transaction.DoesNotExist:
+        raise Http404('No Transaction matches the given query.')
+
+    # Verify user is the client
+    if user.pk != transaction.client_id:
+        messages.error(request, 'Only the client can make payment.')
+        return redirect('transactions:detail', transaction_id=transaction.id)
+
+    # Check if already paid
+    if transaction.is_paid:
+        messages.warning(request, 'This transaction has already been paid for.')
+        return redirect('transactions:detail', transaction_id=transaction.id)
+
+    # Create payment record with client IP and user agent
+    if request.META.get('HTTP_X_FORWARDED_FOR'):
+        ip_address = request.META.get('HTTP_X_FORWARDED_FOR').split(',')[0]
+    else:
+        ip_address = request.META.get('REMOTE_ADDR')
+
+    payment = await Payment.objects.acreate(
+        transaction=transaction,
+        user=user,
+        amount=transaction.amount,
+        ip_address=ip_address,
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+    # Initialize Paystack payment
+    response = await async_paystack.initialize_payment(
+        email=user.email,
+        amount=payment.amount,
+        reference=payment.reference,
+        callback_url=f"{settings.SITE_URL}/payments/verify/?reference={payment.reference}"
+    )
+
+    if response.get('status'):
+        # Save Paystack reference
+        payment.paystack_reference = response['data']['reference']
+        await payment.asave(update_fields=['paystack_reference'])
+
+        # Redirect to Paystack payment page
+        return redirect(response['data']['authorization_url'])
+
+    payment.status = 'FAILED'
+    await payment.asave(update_fields=['status'])
+    messages.error(request, f"Payment initialization failed: {response.get('message')}")
+    return redirect('transactions:detail', transaction_id=transaction.id)
+
+
+async def verify_payment(request):
+    """Verify payment from Paystack callback"""
+    reference = request.GET.get('reference')
+
+    if not reference:
+        messages.error(request, 'Payment reference not found.')
+        return redirect('core:dashboard')
+
+    # Get payment record
+    try:
+        payment = await Payment.objects.aget(reference=reference)
+    except Payment.DoesNotExist:
+        messages.error(request, 'Payment record not found.')
+        return redirect('core:dashboard')
+
+    # Already confirmed (usually by the webhook): no need to ask Paystack again
+    if payment.status != 'SUCCESS':
+        response = await averify_reference(reference)
+        await sync_to_async(apply_verification)(payment, response)
+
+    if payment.status == 'SUCCESS':
+        messages.success(
+            request,
+            f'Payment successful! ₦{payment.amount:,.2f} is now safely held in escrow.'
+        )
+    elif payment.status == 'PENDING':
+        messages.info(
+            request,
+            "We haven't received confirmation of your payment yet. "
+            "This transaction will update automatically once Paystack confirms it."
+        )
+    else:
+        messages.error(request, 'Payment verification failed. Please try again.')
+    return redirect('transactions:detail', transaction_id=payment.transaction_id)
+
+
+# csrf_exempt only learns to wrap coroutines in Django 5.0; set its marker directly
+verify_payment.csrf_exempt = True
@@ -0,0 +1,98 @@
+"""
+Bank directory and account-number resolution
+The bank list lives in the Bank table (refreshed from Paystack by a periodic
+task) and is served from the cache, so forms never wait on the gateway.
+Account resolutions are memoized per (bank_code, account_number).
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+from core.cache import CacheNamespace
+
+from .models import Bank
+from .paystack import paystack
+
+logger = logging.getLogger(__name__)
+
+bank_cache = CacheNamespace('banks', timeout=86400)
+resolution_cache = CacheNamespace('account_resolution', timeout=settings.ACCOUNT_RESOLUTION_TTL)
+
+
+def get_bank_choices():
+    """[(code, name), ...] of active banks, for form choices"""
+    return bank_cache.get_or_set(
+        'choices',
+        lambda: list(Bank.objects.filter(is_active=True).values_list('code', 'name')),
+    )
+
+
+def get_bank_name(code):
+    return dict(get_bank_choices()).get(code, '')
+
+
+def refresh_banks():
+    """
+    Sync the Bank table with Paystack's directory.
+    Banks Paystack no longer lists are deactivated, not deleted.
+
+    Returns:
+        int: number of active banks, or None if Paystack couldn't be reached
+    """
+    response = paystack.get_banks()
+    if not response.get('status'):
+        logger.warning('Bank directory refresh failed: %s', response.get('message'))
+        return None
+
+    banks = [
+        Bank(code=bank['code'], name=bank['name'], slug=bank.get('slug') or '', is_active=bool(bank.get('active', True)))
+        for bank in response.get('data') or []
+        if bank.get('code')
+    ]
+    if not banks:
+        return None
+
+    with db_transaction.atomic():
+        Bank.objects.bulk_create(
+            banks,
+            update_conflicts=True,
+            unique_fields=['code'],
+            update_fields=['name', 'slug', 'is_active'],
+        )
+        Bank.objects.exclude(code__in=[bank.code for bank in banks]).update(is_active=False)
+
+    bank_cache.invalidate()
+    return sum(bank.is_active for bank in banks)
+
+
+def _resolution_key(bank_code, account_number):
+    return f'{bank_code}:{account_number}'
+
+
+def get_cached_resolution(bank_code, account_number):
+    """Memoized account name, or None if not resolved recently"""
+    return resolution_cache.get(_resolution_key(bank_code, account_number))
+
+
+def resolve_account(bank_code, account_number):
+    """
+    Account name for a bank account, memoized for ACCOUNT_RESOLUTION_TTL.
+    Concurrent lookups of the same account share one Paystack call.
+
+    Returns:
+        str: account name, or None if Paystack couldn't resolve it
+    """
+    key = _resolution_key(bank_code, account_number)
+
+    def lookup():
+        response = paystack.verify_account_number(account_number, bank_code)
+        if response.get('status'):
+            return (response.get('data') or {}).get('account_name') or None
+        return None
+
+    account_name = resolution_cache.get_or_set(key, lookup)
+    if account_name is None:
+        # Don't remember failures: the account may be new or the gateway down
+        resolution_cache.delete(key)
+    return account_name
@@ -0,0 +1,56 @@
+"""
+Run the local Paystack simulator
+Usage: python manage.py paystack_simulator [--port 8765] [--latency-ms 80 --latency-sigma 0.5]
+       [--error-rate 0.01] [--duplicate-webhook-rate 0.1] [--webhook-url http://localhost:8000/payments/webhook/]
+Then start the app with PAYSTACK_BASE_URL=http://127.0.0.1:8765
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from payments.simulator import PaystackSimulator, SimulatorConfig
+
+
+class Command(BaseCommand):
+    help = 'Serve an in-memory Paystack stand-in with latency, error and webhook injection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--webhook-url', default=f'{settings.SITE_URL}/payments/webhook/',
+                            help='Where to POST signed webhooks (empty string disables them)')
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Median response latency')
+        parser.add_argument('--latency-sigma', type=float, default=0.0,
+                            help='Log-normal spread of latency (0 = constant)')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Share of API calls answered with a 5xx')
+        parser.add_argument('--charge-success-rate', type=float, default=1.0)
+        parser.add_argument('--transfer-success-rate', type=float, default=1.0)
+        parser.add_argument('--auto-pay', action='store_true',
+                            help='Settle charges at initialize instead of at /checkout')
+        parser.add_argument('--webhook-delay-ms', type=float, default=0.0)
+        parser.add_argument('--duplicate-webhook-rate', type=float, default=0.0,
+                            help='Share of webhooks delivered twice')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        config = SimulatorConfig(
+            webhook_url=options['webhook_url'],
+            latency_ms=options['latency_ms'],
+            latency_sigma=options['latency_sigma'],
+            error_rate=options['error_rate'],
+            charge_success_rate=options['charge_success_rate'],
+            transfer_success_rate=options['transfer_success_rate'],
+            auto_pay=options['auto_pay'],
+            webhook_delay_ms=options['webhook_delay_ms'],
+            duplicate_webhook_rate=options['duplicate_webhook_rate'],
+            seed=options['seed'],
+        )
+        simulator = PaystackSimulator(config, host=options['host'], port=options['port'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Paystack simulator listening on {simulator.url}'))
+        self.stdout.write(f'  Start the app with PAYSTACK_BASE_URL={simulator.url}')
+        try:
+            simulator.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Served {simulator.stats['requests']} requests, "
+                          f"{simulator.stats['webhooks_sent']} webhooks sent")
@@ -0,0 +1,66 @@
+"""
+Reconcile Paystack charges against Payment rows for a date range
+Usage: python manage.py reconcile_payments --since 2026-01-01 --until 2026-02-01 [--output report.csv] [--recording charges.jsonl]
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db import use_task_statement_timeout
+from payments.reconciliation import ReconciliationError, iter_recorded_transactions, reconcile
+
+
+def _parse_time(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f'Invalid datetime: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Write a discrepancy report (amounts in kobo) between Paystack and local payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', required=True, help='ISO datetime, inclusive')
+        parser.add_argument('--until', required=True, help='ISO datetime, exclusive')
+        parser.add_argument('--output', help='CSV report path (default: stdout)')
+        parser.add_argument('--recording', help='Read Paystack transactions from a JSON-lines recording')
+
+    def handle(self, *args, **options):
+        start = _parse_time(options['since'])
+        end = _parse_time(options['until'])
+        transactions = iter_recorded_transactions(options['recording']) if options['recording'] else None
+
+        # A long range is a batch job, not a web request
+        use_task_statement_timeout()
+
+        started = time.perf_counter()
+        report = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            summary = reconcile(start, end, report, transactions=transactions)
+        except ReconciliationError as e:
+            raise CommandError(f'Reconciliation aborted: {e}')
+        finally:
+            if report is not sys.stdout:
+                report.close()
+        elapsed = time.perf_counter() - started
+
+        issues = {key: value for key, value in summary.items()
+                  if key not in ('charges', 'payments', 'matched', 'charged_kobo', 'succeeded_kobo')}
+        self.stderr.write(
+            f"{summary['charges']} Paystack charges, {summary['payments']} payments, "
+            f"{summary['matched']} matched in {elapsed:.2f}s\n"
+            f"Charged {summary['charged_kobo']} kobo, recorded {summary['succeeded_kobo']} kobo "
+            f"(difference {summary['charged_kobo'] - summary['succeeded_kobo']} kobo)"
+        )
+        if any(issues.values()):
+            self.stderr.write(self.style.WARNING(
+                'Discrepancies: ' + ', '.join(f'{key}={value}' for key, value in issues.items() if value)
+            ))
+        else:
+            self.stderr.write(self.style.SUCCESS('✓ No discrepancies'))
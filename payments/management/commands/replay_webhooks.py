@@ -0,0 +1,71 @@
+"""
+Replay stored Paystack webhook events
+Usage: python manage.py replay_webhooks --since 2026-01-01T00:00 [--until ...] [--status FAILED] [--sync]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.db import use_task_statement_timeout
+from payments.models import WebhookEvent
+from payments.tasks import process_webhook_event
+from payments.webhooks import is_valid_signature, process_event, record_failure
+
+
+def _parse_time(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f'Invalid datetime: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Re-run stored webhook events received in a time range'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', required=True, help='ISO datetime, inclusive')
+        parser.add_argument('--until', help='ISO datetime, exclusive (default: now)')
+        parser.add_argument('--status', action='append', choices=[c[0] for c in WebhookEvent.STATUS_CHOICES],
+                            help='Only events in this status (repeatable; default: all)')
+        parser.add_argument('--event', help='Only this event type, e.g. charge.success')
+        parser.add_argument('--sync', action='store_true', help='Process in this process instead of queueing')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        use_task_statement_timeout()
+        events = WebhookEvent.objects.filter(received_at__gte=_parse_time(options['since']))
+        if options['until']:
+            events = events.filter(received_at__lt=_parse_time(options['until']))
+        if options['status']:
+            events = events.filter(status__in=options['status'])
+        if options['event']:
+            events = events.filter(event=options['event'])
+
+        replayed = skipped = failed = 0
+        for event_id, body, signature in events.order_by('received_at').values_list(
+            'event_id', 'body', 'signature'
+        ).iterator():
+            # Never replay something we couldn't have accepted
+            if not is_valid_signature(body.encode('utf-8'), signature):
+                self.stderr.write(f'Skipping {event_id}: signature mismatch')
+                skipped += 1
+                continue
+            if options['dry_run']:
+                self.stdout.write(event_id)
+            elif options['sync']:
+                try:
+                    process_event(event_id, force=True)
+                except Exception as e:
+                    record_failure(event_id, e)
+                    self.stderr.write(f'Failed {event_id}: {e}')
+                    failed += 1
+                    continue
+            else:
+                process_webhook_event.delay(event_id, force=True)
+            replayed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Replayed {replayed} events ({skipped} skipped, {failed} failed)'
+        ))
@@ -0,0 +1,39 @@
+"""
+Pay out eligible wallet balances now
+Usage: python manage.py run_payouts [--min-amount 1000] [--user ID ...] [--batch-size 100] [--dry-run]
+"""
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core.db import use_task_statement_timeout
+from payments.payouts import BULK_TRANSFER_BATCH_SIZE, eligible_wallets, run_payouts
+
+
+class Command(BaseCommand):
+    help = 'Sweep wallet balances to bank accounts with bulk transfers and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-amount', type=Decimal, default=None)
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only pay out this user (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=BULK_TRANSFER_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        use_task_statement_timeout()
+        if options['dry_run']:
+            count = eligible_wallets(options['min_amount'], options['user_ids']).count()
+            self.stdout.write(f'{count} wallets eligible for payout')
+            return
+
+        result = run_payouts(
+            min_amount=options['min_amount'],
+            user_ids=options['user_ids'],
+            batch_size=options['batch_size'],
+        )
+        per_minute = result['created'] / result['seconds'] * 60 if result['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Created {result['created']} payouts, {result['submitted']} accepted by Paystack "
+            f"in {result['seconds']:.2f}s ({per_minute:,.0f} payouts/min)"
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+# The banks previously hard-coded in BankDetailsForm, so the form works
+# before the first directory refresh from Paystack
+INITIAL_BANKS = [
+    ('044', 'Access Bank', 'access-bank'),
+    ('058', 'Guaranty Trust Bank', 'guaranty-trust-bank'),
+    ('011', 'First Bank of Nigeria', 'first-bank-of-nigeria'),
+    ('033', 'United Bank For Africa', 'united-bank-for-africa'),
+    ('057', 'Zenith Bank', 'zenith-bank'),
+    ('221', 'Stanbic IBTC Bank', 'stanbic-ibtc-bank'),
+    ('232', 'Sterling Bank', 'sterling-bank'),
+    ('076', 'Polaris Bank', 'polaris-bank'),
+    ('070', 'Fidelity Bank', 'fidelity-bank'),
+    ('214', 'First City Monument Bank', 'first-city-monument-bank'),
+    ('50211', 'Kuda Bank', 'kuda-bank'),
+    ('999992', 'OPay Digital Services Limited (OPay)', 'paycom'),
+    ('999991', 'PalmPay', 'palmpay'),
+]
+
+
+def seed_banks(apps, schema_editor):
+    Bank = apps.get_model('payments', 'Bank')
+    Bank.objects.bulk_create(
+        [Bank(code=code, name=name, slug=slug) for code, name, slug in INITIAL_BANKS],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.CharField(blank=True, max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Bank',
+                'verbose_name_plural': 'Banks',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(seed_banks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('payments', '0003_bank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bank_code', models.CharField(max_length=20)),
+                ('account_number', models.CharField(max_length=10)),
+                ('account_name', models.CharField(max_length=100)),
+                ('recipient_code', models.CharField(max_length=50)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfer_recipients', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transfer Recipient',
+                'verbose_name_plural': 'Transfer Recipients',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transferrecipient',
+            constraint=models.UniqueConstraint(fields=('user', 'bank_code', 'account_number'), name='unique_recipient_per_account'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_transferrecipient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='recipient_code',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(fields=['status', 'created_at'], name='payments_pa_status_2b7eb1_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 """
 Payment models for Paystack integration
 """
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 
@@ -73,6 +74,10 @@ class Payment(models.Model):
         verbose_name = 'Payment'
         verbose_name_plural = 'Payments'
         ordering = ['-created_at']
+        indexes = [
+            # Stale PENDING sweep (payments.sweeper)
+            models.Index(fields=['status', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.reference} - ₦{self.amount:,.2f} - {self.status}"
@@ -81,6 +86,39 @@ class Payment(models.Model):
         if not self.reference:
             self.reference = f"PAY-{uuid.uuid4().hex[:12].upper()}"
         super().save(*args, **kwargs)
+    
+    def confirm(self, paystack_data):
+        """
+        Record a successful charge and move funds into escrow, exactly once.
+        
+        The callback view and the charge.success webhook can arrive together;
+        both call this. The conditional UPDATE is the claim: the row lock makes
+        the loser wait, then it matches nothing and reuses the winner's outcome.
+        The transaction row is locked too, so a second payment for an already
+        funded transaction never credits escrow again.
+        
+        Returns:
+            bool: True if this call did the work
+        """
+        from transactions.models import Transaction
+        
+        verified_at = timezone.now()
+        authorization = paystack_data.get('authorization') or {}
+        
+        with db_transaction.atomic():
+            claimed = Payment.objects.filter(pk=self.pk).exclude(status='SUCCESS').update(
+                status='SUCCESS',
+                verified_at=verified_at,
+                paystack_response=paystack_data,
+                authorization_code=authorization.get('authorization_code', ''),
+            )
+            if claimed:
+                transaction = Transaction.objects.select_for_update().get(pk=self.transaction_id)
+                if not transaction.is_paid:
+                    transaction.mark_as_paid(self.reference)
+        
+        self.refresh_from_db(fields=['status', 'verified_at', 'paystack_response', 'authorization_code'])
+        return bool(claimed)
 
 
 class Payout(models.Model):
@@ -97,6 +135,7 @@ class Payout(models.Model):
     payout_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     reference = models.CharField(max_length=100, unique=True)
     transfer_code = models.CharField(max_length=100, blank=True)
+    recipient_code = models.CharField(max_length=50, blank=True)
     
     # User requesting payout
     user = models.ForeignKey(
@@ -132,11 +171,107 @@ class Payout(models.Model):
         verbose_name = 'Payout'
         verbose_name_plural = 'Payouts'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.reference} - {self.user} - ₦{self.amount:,.2f}"
     
+    @staticmethod
+    def generate_reference():
+        return f"OUT-{uuid.uuid4().hex[:12].upper()}"
+    
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = f"OUT-{uuid.uuid4().hex[:12].upper()}"
+            self.reference = self.generate_reference()
         super().save(*args, **kwargs)
+
+
+class Bank(models.Model):
+    """Paystack bank directory, refreshed by payments.tasks.refresh_bank_directory"""
+    
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    slug = models.CharField(max_length=100, blank=True)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Bank'
+        verbose_name_plural = 'Banks'
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} ({self.code})"
+
+class TransferRecipient(models.Model):
+    """
+    Paystack recipient code for one bank-account snapshot of a user.
+    Reused for every payout to that account; deactivated when the user
+    changes their bank details.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='transfer_recipients'
+    )
+    bank_code = models.CharField(max_length=20)
+    account_number = models.CharField(max_length=10)
+    account_name = models.CharField(max_length=100)
+    recipient_code = models.CharField(max_length=50)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Transfer Recipient'
+        verbose_name_plural = 'Transfer Recipients'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'bank_code', 'account_number'],
+                name='unique_recipient_per_account',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipient_code} - {self.user} - {self.account_number}"
+
+class WebhookEvent(models.Model):
+    """Raw Paystack webhook delivery, stored before processing"""
+    
+    STATUS_CHOICES = [
+        ('RECEIVED', 'Received'),
+        ('PROCESSED', 'Processed'),
+        ('IGNORED', 'Ignored'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    # "<event>:<data.id>" - Paystack redelivers the same event until it gets a 200
+    event_id = models.CharField(max_length=150, unique=True)
+    event = models.CharField(max_length=50, db_index=True)
+    
+    # Exactly what Paystack sent, so events can be re-verified and replayed
+    body = models.TextField()
+    signature = models.CharField(max_length=128)
+    
+    # Processing state
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='RECEIVED'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    
+    # Timestamps
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Webhook Event'
+        verbose_name_plural = 'Webhook Events'
+        ordering = ['-received_at']
+    
+    def __str__(self):
+        return f"{self.event_id} - {self.status}"
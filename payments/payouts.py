@@ -0,0 +1,245 @@
+"""
+Batched payout engine
+Sweeps wallet balances to providers' bank accounts:
+
+1. pick eligible wallets (verified bank details, balance >= PAYOUT_MIN_AMOUNT)
+2. get recipient codes (stored, or created in bulk)
+3. lock the wallets, debit them and create Payout rows in one transaction
+4. submit the chunk with one /transfer/bulk call
+
+Payouts then sit in PROCESSING until the transfer.* webhook resolves them
+(payments.webhooks). A failed or reversed transfer credits the wallet back.
+Payouts whose bulk call failed are resubmitted one transfer at a time.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from accounts.models import UserWallet
+from core.views import dashboard_cache
+
+from .models import Payout
+from .paystack import paystack
+from .recipients import get_recipient_codes
+
+logger = logging.getLogger(__name__)
+
+# Paystack's limit for /transfer/bulk
+BULK_TRANSFER_BATCH_SIZE = 100
+
+
+def eligible_wallets(min_amount=None, user_ids=None):
+    """Wallets that can be paid out now"""
+    min_amount = settings.PAYOUT_MIN_AMOUNT if min_amount is None else min_amount
+    wallets = UserWallet.objects.filter(
+        balance__gte=min_amount,
+        user__bank_account_verified=True,
+    ).exclude(user__bank_code='').exclude(user__account_number='')
+    if user_ids is not None:
+        wallets = wallets.filter(user_id__in=user_ids)
+    return wallets
+
+
+def create_payouts(wallet_ids, recipient_codes, min_amount=None):
+    """
+    Debit the wallets and create one PENDING Payout per wallet, atomically.
+    Balances are re-read under the row lock, and every other wallet writer
+    goes through UserWallet.adjust (an F() update, which waits for the
+    lock), so money credited or paid out concurrently is never lost or paid
+    twice.
+
+    Returns:
+        list: created Payout instances
+    """
+    min_amount = settings.PAYOUT_MIN_AMOUNT if min_amount is None else min_amount
+    now = timezone.now()
+
+    with db_transaction.atomic():
+        wallets = list(
+            UserWallet.objects.select_for_update(of=('self',))
+            .select_related('user')
+            .filter(pk__in=wallet_ids, user_id__in=list(recipient_codes))
+            .order_by('pk')
+        )
+        payouts = []
+        debited = []
+        for wallet in wallets:
+            if wallet.balance < min_amount:
+                continue
+            user = wallet.user
+            payouts.append(Payout(
+                reference=Payout.generate_reference(),
+                recipient_code=recipient_codes[user.pk],
+                user=user,
+                amount=wallet.balance,
+                bank_name=user.bank_name,
+                account_number=user.account_number,
+                account_name=user.account_name,
+            ))
+            wallet.balance = 0
+            wallet.updated_at = now
+            debited.append(wallet)
+
+        UserWallet.objects.bulk_update(debited, ['balance', 'updated_at'])
+        Payout.objects.bulk_create(payouts)
+
+        # bulk_update skips post_save, so drop the cached dashboards here
+        user_ids = [wallet.user_id for wallet in debited]
+        db_transaction.on_commit(lambda: [dashboard_cache.delete(user_id) for user_id in user_ids])
+
+    return payouts
+
+
+def submit_payouts(payouts):
+    """
+    Send PENDING payouts to Paystack in one bulk transfer call.
+    Payouts stay PENDING if the call fails; Paystack rejects a reused
+    reference, so resubmitting them can't pay twice.
+
+    Returns:
+        int: number of payouts accepted by Paystack
+    """
+    if not payouts:
+        return 0
+
+    response = paystack.initiate_bulk_transfer([
+        {
+            'amount': payout.amount - payout.fee,
+            'recipient': payout.recipient_code,
+            'reference': payout.reference,
+            'reason': f'{settings.SITE_NAME} payout {payout.reference}',
+        }
+        for payout in payouts
+    ])
+    if not response.get('status'):
+        logger.warning('Bulk transfer failed for %d payouts: %s', len(payouts), response.get('message'))
+        return 0
+
+    transfer_codes = {
+        item.get('reference'): item.get('transfer_code', '')
+        for item in response.get('data') or []
+    }
+    accepted = [payout for payout in payouts if payout.reference in transfer_codes]
+    for payout in accepted:
+        payout.transfer_code = transfer_codes[payout.reference]
+
+    Payout.objects.bulk_update(accepted, ['transfer_code'])
+    # Conditional: a fast webhook may already have resolved some of them
+    Payout.objects.filter(
+        pk__in=[payout.pk for payout in accepted],
+        status='PENDING',
+    ).update(status='PROCESSING')
+    return len(accepted)
+
+
+def run_payouts(min_amount=None, user_ids=None, batch_size=BULK_TRANSFER_BATCH_SIZE):
+    """
+    Sweep every eligible wallet, one chunk of `batch_size` wallets at a time.
+
+    Returns:
+        dict: created, submitted, seconds
+    """
+    started = time.perf_counter()
+    created = submitted = 0
+    last_pk = 0
+    wallets = eligible_wallets(min_amount, user_ids).order_by('pk').select_related('user')
+
+    while True:
+        chunk = list(wallets.filter(pk__gt=last_pk)[:batch_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        # Gateway calls stay outside the wallet lock
+        recipient_codes = get_recipient_codes([wallet.user for wallet in chunk])
+        payouts = create_payouts([wallet.pk for wallet in chunk], recipient_codes, min_amount)
+        created += len(payouts)
+        submitted += submit_payouts(payouts)
+
+    return {
+        'created': created,
+        'submitted': submitted,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def resubmit_pending_payouts(older_than_minutes=10):
+    """
+    Retry payouts whose bulk transfer call failed, one transfer each.
+
+    The bulk call may have timed out after Paystack accepted it, and
+    Paystack rejects the whole batch if any reference is reused. So each
+    reference is looked up first: one Paystack already has moves to
+    PROCESSING as it is, and only the others are sent again, individually.
+
+    Returns:
+        int: number of payouts now with Paystack
+    """
+    cutoff = timezone.now() - timedelta(minutes=older_than_minutes)
+    pending = Payout.objects.filter(status='PENDING', created_at__lt=cutoff).order_by('pk')
+    resubmitted = 0
+    for payout in pending.iterator():
+        response = paystack.verify_transfer(payout.reference)
+        if response.get('status'):
+            transfer_code = (response.get('data') or {}).get('transfer_code', '')
+            resubmitted += _claim_processing(payout, transfer_code)
+            continue
+
+        # Claimed before sending, so an overlapping run skips it
+        if not _claim_processing(payout, ''):
+            continue
+        response = paystack.initiate_transfer(
+            payout.amount - payout.fee,
+            payout.recipient_code,
+            reason=f'{settings.SITE_NAME} payout {payout.reference}',
+            reference=payout.reference,
+        )
+        if response.get('status'):
+            Payout.objects.filter(pk=payout.pk).update(
+                transfer_code=(response.get('data') or {}).get('transfer_code', ''),
+            )
+            resubmitted += 1
+        else:
+            logger.warning('Resubmitting payout %s failed: %s', payout.reference, response.get('message'))
+            # Back for the next run, unless a webhook resolved it meanwhile
+            Payout.objects.filter(pk=payout.pk, status='PROCESSING').update(status='PENDING')
+    return resubmitted
+
+
+def _claim_processing(payout, transfer_code):
+    """Move a PENDING payout to PROCESSING; False if something else moved it first"""
+    return bool(Payout.objects.filter(pk=payout.pk, status='PENDING').update(
+        status='PROCESSING',
+        transfer_code=transfer_code,
+    ))
+
+
+def resolve_transfer(data, succeeded):
+    """
+    Apply a transfer.success / transfer.failed / transfer.reversed event.
+    Idempotent: a payout is finalized once; a failed or reversed transfer
+    credits the wallet back exactly once.
+    """
+    payout = Payout.objects.select_for_update().filter(reference=data.get('reference')).first()
+    if payout is None:
+        logger.warning('Transfer event for unknown payout %s', data.get('reference'))
+        return False
+
+    if succeeded:
+        if payout.status in ('SUCCESS', 'FAILED'):
+            return True
+        payout.status = 'SUCCESS'
+    else:
+        if payout.status == 'FAILED':
+            return True
+        payout.status = 'FAILED'
+        UserWallet.adjust(payout.user_id, balance=payout.amount)
+
+    payout.processed_at = timezone.now()
+    payout.paystack_response = data
+    payout.save(update_fields=['status', 'processed_at', 'paystack_response'])
+    return True
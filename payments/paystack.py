@@ -1,11 +1,29 @@
 """
 Paystack API integration service
 Handles payment initialization and verification
+
+All calls share one pooled keep-alive session per process. Idempotent
+GETs are retried with jittered exponential backoff, and every call's
+latency is reported to `latency_observers`.
 """
+import logging
+import os
+import random
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from decimal import Decimal
 
+logger = logging.getLogger(__name__)
+
+# Callables notified after every API call as observer(operation, seconds, ok)
+latency_observers = []
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 class PaystackService:
     """Service class for Paystack API integration"""
@@ -13,12 +31,88 @@ class PaystackService:
     BASE_URL = "https://api.paystack.co"
     
     def __init__(self):
+        # PAYSTACK_BASE_URL points the client at a stand-in (payments.simulator)
+        self.base_url = (settings.PAYSTACK_BASE_URL or self.BASE_URL).rstrip('/')
         self.secret_key = settings.PAYSTACK_SECRET_KEY
         self.public_key = settings.PAYSTACK_PUBLIC_KEY
         self.headers = {
             'Authorization': f'Bearer {self.secret_key}',
             'Content-Type': 'application/json',
         }
+        self.timeout = (settings.PAYSTACK_CONNECT_TIMEOUT, settings.PAYSTACK_READ_TIMEOUT)
+        self.pool_size = settings.PAYSTACK_POOL_SIZE
+        self.max_retries = settings.PAYSTACK_MAX_RETRIES
+        self.retry_backoff = settings.PAYSTACK_RETRY_BACKOFF
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Keep-alive session, created lazily so forked workers don't share sockets"""
+        if self._session_pid != os.getpid():
+            with self._session_lock:
+                if self._session_pid != os.getpid():
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._session_pid = os.getpid()
+        return self._session
+    
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff in seconds"""
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+    
+    def _record(self, operation, started, ok):
+        elapsed = time.perf_counter() - started
+        logger.debug('paystack %s took %.1fms (ok=%s)', operation, elapsed * 1000, ok)
+        for observer in latency_observers:
+            try:
+                observer(operation, elapsed, ok)
+            except Exception:
+                logger.exception('Paystack latency observer failed')
+    
+    def _request(self, operation, method, path, error_message, retry=False, **kwargs):
+        """
+        Call the Paystack API and decode the JSON body
+        
+        Args:
+            operation: Name used for latency reporting
+            method: HTTP method
+            path: API path, e.g. '/transaction/initialize'
+            error_message: Prefix for the message returned on failure
+            retry: Retry connection errors and 429/5xx responses (idempotent calls only)
+            **kwargs: Passed to requests (json, params)
+        
+        Returns:
+            dict: Response from Paystack API, or {'status': False, 'message': ...}
+        """
+        url = f"{self.base_url}{path}"
+        attempts = 1 + (self.max_retries if retry else 0)
+        
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.RequestException as e:
+                self._record(operation, started, ok=False)
+                status_code = getattr(e.response, 'status_code', None)
+                retryable = status_code is None or status_code in RETRY_STATUS_CODES
+                if retryable and attempt + 1 < attempts:
+                    time.sleep(self._backoff(attempt))
+                    continue
+                return {
+                    'status': False,
+                    'message': f'{error_message}: {str(e)}'
+                }
+            
+            self._record(operation, started, ok=True)
+            return data
     
     def initialize_payment(self, email, amount, reference, callback_url=None):
         """
@@ -33,8 +127,6 @@ class PaystackService:
         Returns:
             dict: Response from Paystack API
         """
-        url = f"{self.BASE_URL}/transaction/initialize"
-        
         # Convert amount to kobo (smallest currency unit)
         amount_in_kobo = int(Decimal(amount) * 100)
         
@@ -54,15 +146,10 @@ class PaystackService:
             }
         }
         
-        try:
-            response = requests.post(url, json=data, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                'status': False,
-                'message': f'Payment initialization failed: {str(e)}'
-            }
+        return self._request(
+            'initialize_payment', 'POST', '/transaction/initialize',
+            'Payment initialization failed', json=data
+        )
     
     def verify_payment(self, reference):
         """
@@ -74,19 +161,37 @@ class PaystackService:
         Returns:
             dict: Verification response from Paystack
         """
-        url = f"{self.BASE_URL}/transaction/verify/{reference}"
+        return self._request(
+            'verify_payment', 'GET', f'/transaction/verify/{reference}',
+            'Payment verification failed', retry=True
+        )
+    
+    def list_transactions(self, start, end, page=1, per_page=100):
+        """
+        List transactions created in a date range, one page at a time
         
-        try:
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                'status': False,
-                'message': f'Payment verification failed: {str(e)}'
-            }
+        Args:
+            start: datetime, inclusive
+            end: datetime, exclusive
+            page: 1-based page number
+            per_page: Page size (Paystack allows up to 100)
+        
+        Returns:
+            dict: Response with data (transactions) and meta (page, pageCount, total)
+        """
+        params = {
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'page': page,
+            'perPage': per_page,
+        }
+        
+        return self._request(
+            'list_transactions', 'GET', '/transaction',
+            'Failed to list transactions', retry=True, params=params
+        )
     
-    def initiate_transfer(self, amount, recipient_code, reason='Withdrawal'):
+    def initiate_transfer(self, amount, recipient_code, reason='Withdrawal', reference=None):
         """
         Initiate a transfer (payout) to a recipient
         
@@ -94,12 +199,11 @@ class PaystackService:
             amount: Amount in kobo
             recipient_code: Paystack recipient code
             reason: Reason for transfer
+            reference: Our reference; Paystack rejects a transfer that reuses one
         
         Returns:
             dict: Response from Paystack API
         """
-        url = f"{self.BASE_URL}/transfer"
-        
         amount_in_kobo = int(Decimal(amount) * 100)
         
         data = {
@@ -108,16 +212,57 @@ class PaystackService:
             'recipient': recipient_code,
             'reason': reason,
         }
+        if reference:
+            data['reference'] = reference
         
-        try:
-            response = requests.post(url, json=data, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                'status': False,
-                'message': f'Transfer initiation failed: {str(e)}'
-            }
+        return self._request(
+            'initiate_transfer', 'POST', '/transfer',
+            'Transfer initiation failed', json=data
+        )
+    
+    def verify_transfer(self, reference):
+        """
+        Look up a transfer by our reference
+        
+        Args:
+            reference: Reference the transfer was initiated with
+        
+        Returns:
+            dict: Response with the transfer (transfer_code, status), or status False if Paystack doesn't have it
+        """
+        return self._request(
+            'verify_transfer', 'GET', f'/transfer/verify/{reference}',
+            'Transfer verification failed', retry=True
+        )
+    
+    def initiate_bulk_transfer(self, transfers):
+        """
+        Initiate up to 100 transfers in one call
+        
+        Args:
+            transfers: list of dicts with amount (naira), recipient, reference, reason
+        
+        Returns:
+            dict: Response with one entry per transfer (reference, transfer_code, status)
+        """
+        data = {
+            'currency': 'NGN',
+            'source': 'balance',
+            'transfers': [
+                {
+                    'amount': int(Decimal(transfer['amount']) * 100),
+                    'recipient': transfer['recipient'],
+                    'reference': transfer['reference'],
+                    'reason': transfer.get('reason', 'Withdrawal'),
+                }
+                for transfer in transfers
+            ],
+        }
+        
+        return self._request(
+            'initiate_bulk_transfer', 'POST', '/transfer/bulk',
+            'Bulk transfer initiation failed', json=data
+        )
     
     def create_transfer_recipient(self, name, account_number, bank_code):
         """
@@ -131,8 +276,6 @@ class PaystackService:
         Returns:
             dict: Response with recipient code
         """
-        url = f"{self.BASE_URL}/transferrecipient"
-        
         data = {
             'type': 'nuban',
             'name': name,
@@ -141,15 +284,38 @@ class PaystackService:
             'currency': 'NGN',
         }
         
-        try:
-            response = requests.post(url, json=data, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                'status': False,
-                'message': f'Recipient creation failed: {str(e)}'
-            }
+        return self._request(
+            'create_transfer_recipient', 'POST', '/transferrecipient',
+            'Recipient creation failed', json=data
+        )
+    
+    def create_transfer_recipients_bulk(self, recipients):
+        """
+        Create up to 100 transfer recipients in one call
+        
+        Args:
+            recipients: list of dicts with name, account_number, bank_code
+        
+        Returns:
+            dict: Response with data.success (created recipients) and data.errors
+        """
+        data = {
+            'batch': [
+                {
+                    'type': 'nuban',
+                    'name': recipient['name'],
+                    'account_number': recipient['account_number'],
+                    'bank_code': recipient['bank_code'],
+                    'currency': 'NGN',
+                }
+                for recipient in recipients
+            ],
+        }
+        
+        return self._request(
+            'create_transfer_recipients_bulk', 'POST', '/transferrecipient/bulk',
+            'Bulk recipient creation failed', json=data
+        )
     
     def verify_account_number(self, account_number, bank_code):
         """
@@ -162,22 +328,15 @@ class PaystackService:
         Returns:
             dict: Account details if valid
         """
-        url = f"{self.BASE_URL}/bank/resolve"
-        
         params = {
             'account_number': account_number,
             'bank_code': bank_code,
         }
         
-        try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                'status': False,
-                'message': f'Account verification failed: {str(e)}'
-            }
+        return self._request(
+            'verify_account_number', 'GET', '/bank/resolve',
+            'Account verification failed', retry=True, params=params
+        )
     
     def get_banks(self):
         """
@@ -186,22 +345,15 @@ class PaystackService:
         Returns:
             dict: List of banks with codes
         """
-        url = f"{self.BASE_URL}/bank"
-        
         params = {
             'country': 'nigeria',
             'use_cursor': False,
         }
         
-        try:
-            response = requests.get(url, params=params, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {
-                'status': False,
-                'message': f'Failed to fetch banks: {str(e)}'
-            }
+        return self._request(
+            'get_banks', 'GET', '/bank',
+            'Failed to fetch banks', retry=True, params=params
+        )
 
 
 # Singleton instance
@@ -0,0 +1,77 @@
+"""
+Async Paystack API client for ASGI deployments
+Same surface as PaystackService, but every method is awaited:
+
+    response = await async_paystack.verify_payment(reference)
+
+The public methods are inherited unchanged: they build the payload and
+return self._request(...), which here is a coroutine running on a pooled
+httpx.AsyncClient, so one worker can hold hundreds of gateway calls in
+flight without blocking.
+"""
+import asyncio
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+
+from .paystack import PaystackService, RETRY_STATUS_CODES
+
+
+class AsyncPaystackService(PaystackService):
+    """Async service class for Paystack API integration"""
+
+    def __init__(self):
+        super().__init__()
+        self.async_pool_size = settings.PAYSTACK_ASYNC_POOL_SIZE
+        # One client per event loop: under WSGI each async view gets its own loop
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        """Pooled keep-alive client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(
+                    max_connections=self.async_pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _request(self, operation, method, path, error_message, retry=False, **kwargs):
+        """Async counterpart of PaystackService._request"""
+        url = f"{self.base_url}{path}"
+        attempts = 1 + (self.max_retries if retry else 0)
+
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                response.raise_for_status()
+                data = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                self._record(operation, started, ok=False)
+                response = getattr(e, 'response', None)
+                status_code = response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                retryable = isinstance(e, httpx.TransportError) or status_code in RETRY_STATUS_CODES
+                if retryable and attempt + 1 < attempts:
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+                return {
+                    'status': False,
+                    'message': f'{error_message}: {str(e)}'
+                }
+
+            self._record(operation, started, ok=True)
+            return data
+
+
+# Singleton instance
+async_paystack = AsyncPaystackService()
@@ -0,0 +1,113 @@
+"""
+Transfer-recipient codes for payouts
+Paystack needs a recipient code before it will transfer to an account.
+Codes are stored per (user, bank_code, account_number), so repeat payouts
+skip the create call, and new accounts are created in bulk.
+"""
+import logging
+
+from .models import TransferRecipient
+from .paystack import paystack
+
+logger = logging.getLogger(__name__)
+
+# Paystack's limit for /transferrecipient/bulk
+BULK_RECIPIENT_BATCH_SIZE = 100
+
+
+def deactivate_stale_recipients(user):
+    """Retire codes for bank accounts the user no longer uses"""
+    return TransferRecipient.objects.filter(user=user, is_active=True).exclude(
+        bank_code=user.bank_code,
+        account_number=user.account_number,
+    ).update(is_active=False)
+
+
+def _save_recipients(rows):
+    """Upsert (user_id, bank_code, account_number, account_name, recipient_code) rows"""
+    TransferRecipient.objects.bulk_create(
+        [
+            TransferRecipient(
+                user_id=user_id,
+                bank_code=bank_code,
+                account_number=account_number,
+                account_name=account_name,
+                recipient_code=recipient_code,
+                is_active=True,
+            )
+            for user_id, bank_code, account_number, account_name, recipient_code in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'bank_code', 'account_number'],
+        update_fields=['account_name', 'recipient_code', 'is_active'],
+    )
+
+
+def get_recipient_codes(users):
+    """
+    Recipient codes for the users' current bank details.
+
+    Stored codes are reused; users without one are created with Paystack's
+    bulk endpoint, 100 at a time.
+
+    Args:
+        users: User instances with bank_code, account_number and account_name
+
+    Returns:
+        dict: user id -> recipient code (users Paystack rejected are absent)
+    """
+    users = [user for user in users if user.bank_code and user.account_number]
+    if not users:
+        return {}
+
+    codes = {}
+    stored = TransferRecipient.objects.filter(
+        user_id__in=[user.pk for user in users],
+        is_active=True,
+    ).values_list('user_id', 'bank_code', 'account_number', 'recipient_code')
+    current = {user.pk: (user.bank_code, user.account_number) for user in users}
+    for user_id, bank_code, account_number, recipient_code in stored:
+        if current[user_id] == (bank_code, account_number):
+            codes[user_id] = recipient_code
+
+    missing = [user for user in users if user.pk not in codes]
+    for start in range(0, len(missing), BULK_RECIPIENT_BATCH_SIZE):
+        batch = missing[start:start + BULK_RECIPIENT_BATCH_SIZE]
+        response = paystack.create_transfer_recipients_bulk([
+            {
+                'name': user.account_name or user.get_full_name(),
+                'account_number': user.account_number,
+                'bank_code': user.bank_code,
+            }
+            for user in batch
+        ])
+        if not response.get('status'):
+            logger.warning('Bulk recipient creation failed: %s', response.get('message'))
+            continue
+
+        data = response.get('data') or {}
+        created = {
+            (item['details']['bank_code'], item['details']['account_number']): item['recipient_code']
+            for item in data.get('success') or []
+        }
+        for error in data.get('errors') or []:
+            logger.warning('Paystack rejected recipient: %s', error)
+
+        rows = []
+        for user in batch:
+            recipient_code = created.get((user.bank_code, user.account_number))
+            if recipient_code:
+                codes[user.pk] = recipient_code
+                rows.append((
+                    user.pk, user.bank_code, user.account_number,
+                    user.account_name, recipient_code,
+                ))
+        if rows:
+            _save_recipients(rows)
+
+    return codes
+
+
+def get_recipient_code(user):
+    """Recipient code for one user's current bank details, or None"""
+    return get_recipient_codes([user]).get(user.pk)
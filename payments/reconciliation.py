@@ -0,0 +1,227 @@
+"""
+Settlement reconciliation between Paystack and Payment rows
+Checks, for a date range, that every successful Paystack charge has a
+SUCCESS Payment whose Transaction is paid, and that every local SUCCESS
+Payment is a successful charge at Paystack, for the same amount.
+
+Both sides are streamed into temporary on-disk SQLite tables and read
+back ordered by reference: Paystack page by page, Payment rows in pk
+order, one short keyset query per chunk (no server-side cursor, so it
+works behind PgBouncer, and no sort in the database). A merge join over
+the two sorted streams keeps memory constant however many charges the
+range holds.
+"""
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+from decimal import Decimal
+
+from .models import Payment
+from .paystack import paystack
+
+REPORT_FIELDS = [
+    'issue', 'reference', 'paystack_status', 'paystack_amount_kobo',
+    'local_status', 'local_amount_kobo', 'transaction_paid',
+]
+
+# Issues written to the report
+MISSING_LOCALLY = 'missing_locally'            # charged at Paystack, no Payment row
+NOT_MARKED_SUCCESS = 'not_marked_success'      # charged, Payment not SUCCESS
+TRANSACTION_NOT_PAID = 'transaction_not_paid'  # Payment SUCCESS, Transaction.is_paid False
+AMOUNT_MISMATCH = 'amount_mismatch'
+NOT_CHARGED = 'not_charged'                    # Payment SUCCESS, no successful charge at Paystack
+
+
+class ReconciliationError(Exception):
+    """Paystack could not be read; the report would be incomplete"""
+
+
+def iter_paystack_transactions(start, end, per_page=100, service=None):
+    """Yield Paystack transactions created in [start, end), page by page"""
+    service = service or paystack
+    page = 1
+    while True:
+        response = service.list_transactions(start, end, page=page, per_page=per_page)
+        if not response.get('status'):
+            raise ReconciliationError(response.get('message', 'Failed to list transactions'))
+        transactions = response.get('data') or []
+        yield from transactions
+        page_count = (response.get('meta') or {}).get('pageCount')
+        if not transactions or (page_count is not None and page >= page_count):
+            return
+        page += 1
+
+
+def iter_recorded_transactions(path):
+    """
+    Yield transactions from a recording: a JSON-lines file holding either one
+    transaction per line or whole list-API pages ({"data": [...]})
+    """
+    with open(path, encoding='utf-8') as recording:
+        for line in recording:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, dict) and isinstance(item.get('data'), list):
+                yield from item['data']
+            else:
+                yield item
+
+
+def _charges(transactions):
+    """(reference, status, amount_kobo) for each Paystack transaction"""
+    for transaction in transactions:
+        yield (
+            str(transaction.get('reference') or ''),
+            transaction.get('status') or '',
+            int(transaction.get('amount') or 0),
+        )
+
+
+def _sorted_by_reference(rows, batch_size=5000):
+    """
+    External sort by reference (the first item of each row) through a
+    temporary SQLite file. A repeated reference keeps its last row.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    columns = ', '.join(f'c{i}' for i in range(1, len(first)))
+    placeholders = ', '.join('?' * len(first))
+
+    with tempfile.TemporaryDirectory(prefix='reconcile-') as spill_dir:
+        db = sqlite3.connect(os.path.join(spill_dir, 'spill.sqlite3'))
+        try:
+            db.execute(f'CREATE TABLE spill (reference TEXT PRIMARY KEY, {columns})')
+            batch = [first]
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    db.executemany(f'INSERT OR REPLACE INTO spill VALUES ({placeholders})', batch)
+                    batch = []
+            if batch:
+                db.executemany(f'INSERT OR REPLACE INTO spill VALUES ({placeholders})', batch)
+            db.commit()
+
+            # SQLite's BINARY collation orders like Python str comparison
+            yield from db.execute(f'SELECT reference, {columns} FROM spill ORDER BY reference')
+        finally:
+            db.close()
+
+
+def _local_payments(start, end, chunk_size=2000):
+    """Payments created in [start, end), in pk order; yields (reference, status, kobo, paid)"""
+    payments = Payment.objects.filter(created_at__gte=start, created_at__lt=end).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(
+            payments.filter(pk__gt=last_pk)
+            .values_list('pk', 'reference', 'status', 'amount', 'transaction__is_paid')[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+        for _, reference, status, amount, paid in chunk:
+            yield reference, status, int(Decimal(amount) * 100), paid
+
+
+def _merge(charges, payments):
+    """Full outer merge join of two reference-ordered streams"""
+    charge = next(charges, None)
+    payment = next(payments, None)
+    while charge is not None or payment is not None:
+        if payment is None or (charge is not None and charge[0] < payment[0]):
+            yield charge, None
+            charge = next(charges, None)
+        elif charge is None or payment[0] < charge[0]:
+            yield None, payment
+            payment = next(payments, None)
+        else:
+            yield charge, payment
+            charge = next(charges, None)
+            payment = next(payments, None)
+
+
+def _issues(charge, payment):
+    """Discrepancies for one joined pair"""
+    charged = charge is not None and charge[1] == 'success'
+    succeeded = payment is not None and payment[1] == 'SUCCESS'
+
+    if charged and payment is None:
+        return [MISSING_LOCALLY]
+    if charged and not succeeded:
+        return [NOT_MARKED_SUCCESS]
+    if succeeded and not charged:
+        return [NOT_CHARGED]
+    if not succeeded:
+        return []
+
+    issues = []
+    if charge[2] != payment[2]:
+        issues.append(AMOUNT_MISMATCH)
+    if not payment[3]:
+        issues.append(TRANSACTION_NOT_PAID)
+    return issues
+
+
+def reconcile(start, end, report, transactions=None):
+    """
+    Reconcile [start, end) and write discrepancies as CSV rows to `report`.
+
+    Args:
+        start, end: aware datetimes
+        report: text file object for the CSV report
+        transactions: iterable of Paystack transactions (e.g. a recording);
+            defaults to streaming the list API
+
+    Returns:
+        dict: charges, payments, matched, per-issue counts and
+            charged_kobo / succeeded_kobo totals
+    """
+    if transactions is None:
+        transactions = iter_paystack_transactions(start, end)
+
+    writer = csv.DictWriter(report, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+
+    summary = {
+        'charges': 0, 'payments': 0, 'matched': 0,
+        'charged_kobo': 0, 'succeeded_kobo': 0,
+        MISSING_LOCALLY: 0, NOT_MARKED_SUCCESS: 0, TRANSACTION_NOT_PAID: 0,
+        AMOUNT_MISMATCH: 0, NOT_CHARGED: 0,
+    }
+
+    payments = (
+        (reference, status, kobo, bool(paid))
+        for reference, status, kobo, paid in _sorted_by_reference(_local_payments(start, end))
+    )
+    pairs = _merge(iter(_sorted_by_reference(_charges(transactions))), payments)
+    for charge, payment in pairs:
+        if charge is not None:
+            summary['charges'] += 1
+            if charge[1] == 'success':
+                summary['charged_kobo'] += charge[2]
+        if payment is not None:
+            summary['payments'] += 1
+            if payment[1] == 'SUCCESS':
+                summary['succeeded_kobo'] += payment[2]
+
+        issues = _issues(charge, payment)
+        if charge is not None and payment is not None and not issues:
+            summary['matched'] += 1
+        for issue in issues:
+            summary[issue] += 1
+            writer.writerow({
+                'issue': issue,
+                'reference': (charge or payment)[0],
+                'paystack_status': charge[1] if charge else '',
+                'paystack_amount_kobo': charge[2] if charge else '',
+                'local_status': payment[1] if payment else '',
+                'local_amount_kobo': payment[2] if payment else '',
+                'transaction_paid': payment[3] if payment else '',
+            })
+
+    return summary
@@ -0,0 +1,503 @@
+"""
+Local Paystack simulator
+An in-memory stand-in for the parts of the Paystack API this project uses,
+with configurable latency, error injection and signed webhooks, so the
+payment path can be load-tested and benchmarked offline.
+
+Run it as a server and point the app at it:
+
+    python manage.py paystack_simulator --port 8765 --webhook-url http://localhost:8000/payments/webhook/
+    PAYSTACK_BASE_URL=http://127.0.0.1:8765 python manage.py runserver
+
+or embed it, e.g. as a pytest fixture:
+
+    @pytest.fixture
+    def paystack_sim(monkeypatch):
+        with PaystackSimulator(SimulatorConfig(latency_ms=20)) as sim:
+            monkeypatch.setattr(paystack, 'base_url', sim.url)
+            yield sim
+
+Endpoints: transaction/initialize, transaction/verify/<ref>, transaction
+(list), transfer, transfer/bulk, transfer/verify/<ref>, transferrecipient, transferrecipient/bulk,
+bank, bank/resolve, plus GET /checkout/<ref> which plays the customer:
+it settles the charge, fires charge.success and redirects to the callback.
+"""
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BANKS = [
+    {'name': 'Access Bank', 'code': '044', 'slug': 'access-bank'},
+    {'name': 'Fidelity Bank', 'code': '070', 'slug': 'fidelity-bank'},
+    {'name': 'First Bank of Nigeria', 'code': '011', 'slug': 'first-bank-of-nigeria'},
+    {'name': 'First City Monument Bank', 'code': '214', 'slug': 'first-city-monument-bank'},
+    {'name': 'Guaranty Trust Bank', 'code': '058', 'slug': 'guaranty-trust-bank'},
+    {'name': 'Kuda Bank', 'code': '50211', 'slug': 'kuda-bank'},
+    {'name': 'OPay Digital Services Limited (OPay)', 'code': '999992', 'slug': 'paycom'},
+    {'name': 'PalmPay', 'code': '999991', 'slug': 'palmpay'},
+    {'name': 'Polaris Bank', 'code': '076', 'slug': 'polaris-bank'},
+    {'name': 'Stanbic IBTC Bank', 'code': '221', 'slug': 'stanbic-ibtc-bank'},
+    {'name': 'Sterling Bank', 'code': '232', 'slug': 'sterling-bank'},
+    {'name': 'United Bank For Africa', 'code': '033', 'slug': 'united-bank-for-africa'},
+    {'name': 'Zenith Bank', 'code': '057', 'slug': 'zenith-bank'},
+]
+
+FIRST_NAMES = ['ADAEZE', 'CHINEDU', 'FUNMI', 'IBRAHIM', 'KEMI', 'NGOZI', 'OLUMIDE', 'TUNDE', 'UCHE', 'YUSUF']
+LAST_NAMES = ['ADEYEMI', 'BELLO', 'EZE', 'LAWAL', 'NWOSU', 'OKAFOR', 'OKONKWO', 'OLADIPO', 'SANI', 'UMEH']
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour knobs; every rate is a probability between 0 and 1"""
+    secret_key: str = ''  # defaults to PAYSTACK_SECRET_KEY
+    webhook_url: str = ''
+
+    # Response latency: log-normal around latency_ms (sigma 0 = constant)
+    latency_ms: float = 0.0
+    latency_sigma: float = 0.0
+
+    # Injected failures: the request gets one of error_statuses instead of a response
+    error_rate: float = 0.0
+    error_statuses: tuple = (500, 502, 503)
+
+    # Outcomes
+    charge_success_rate: float = 1.0
+    transfer_success_rate: float = 1.0
+    auto_pay: bool = False  # settle charges at initialize, without /checkout
+
+    # Webhooks
+    webhook_delay_ms: float = 0.0
+    duplicate_webhook_rate: float = 0.0
+    webhook_workers: int = 8
+
+    seed: int = None
+    exempt_paths: tuple = field(default=('/checkout/',))
+
+
+class PaystackSimulator:
+    """Threaded HTTP server holding simulated Paystack state"""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or SimulatorConfig()
+        # Sign webhooks the way the app will check them
+        self.config.secret_key = self.config.secret_key or settings.PAYSTACK_SECRET_KEY
+        self.random = random.Random(self.config.seed)
+        self._random_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.transactions = {}   # reference -> transaction dict, in creation order
+        self.transfers = {}      # reference -> transfer dict
+        self.recipients = {}     # (bank_code, account_number) -> recipient dict
+        self.ids = itertools.count(1000001)
+        self.stats = {'requests': 0, 'errors_injected': 0, 'webhooks_sent': 0, 'webhooks_failed': 0}
+        self._webhooks = ThreadPoolExecutor(
+            max_workers=self.config.webhook_workers,
+            thread_name_prefix='paystack-sim-webhook',
+        )
+
+        simulator = self
+
+        class Handler(_Handler):
+            sim = simulator
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='paystack-sim', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._webhooks.shutdown(wait=True)
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self._webhooks.shutdown(wait=False)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Randomness (shared between handler threads)
+
+    def chance(self, rate):
+        with self._random_lock:
+            return self.random.random() < rate
+
+    def latency(self):
+        if self.config.latency_ms <= 0:
+            return 0.0
+        with self._random_lock:
+            if self.config.latency_sigma > 0:
+                return self.random.lognormvariate(0, self.config.latency_sigma) * self.config.latency_ms / 1000
+        return self.config.latency_ms / 1000
+
+    def count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    # Webhooks
+
+    def send_webhook(self, event, data):
+        """Sign and POST an event to webhook_url, possibly twice"""
+        if not self.config.webhook_url:
+            return
+        body = json.dumps({'event': event, 'data': data}).encode('utf-8')
+        deliveries = 2 if self.chance(self.config.duplicate_webhook_rate) else 1
+        for _ in range(deliveries):
+            self._webhooks.submit(self._deliver, body)
+
+    def _deliver(self, body):
+        if self.config.webhook_delay_ms:
+            time.sleep(self.config.webhook_delay_ms / 1000)
+        signature = hmac.new(self.config.secret_key.encode('utf-8'), body, hashlib.sha512).hexdigest()
+        try:
+            response = requests.post(
+                self.config.webhook_url,
+                data=body,
+                headers={'Content-Type': 'application/json', 'X-Paystack-Signature': signature},
+                timeout=10,
+            )
+            response.raise_for_status()
+            self.count('webhooks_sent')
+        except requests.exceptions.RequestException:
+            logger.warning('Simulated webhook delivery failed', exc_info=True)
+            self.count('webhooks_failed')
+
+    # State changes
+
+    def settle_charge(self, reference):
+        """Customer completes (or fails) checkout; returns the transaction"""
+        with self.lock:
+            transaction = self.transactions.get(reference)
+            if transaction is None or transaction['status'] != 'ongoing':
+                return transaction
+            succeeded = self.chance(self.config.charge_success_rate)
+            transaction['status'] = 'success' if succeeded else 'failed'
+            transaction['paid_at'] = _now()
+            transaction['gateway_response'] = 'Successful' if succeeded else 'Declined'
+        if succeeded:
+            self.send_webhook('charge.success', transaction)
+        return transaction
+
+    def settle_transfer(self, transfer):
+        succeeded = self.chance(self.config.transfer_success_rate)
+        with self.lock:
+            transfer['status'] = 'success' if succeeded else 'failed'
+        self.send_webhook('transfer.success' if succeeded else 'transfer.failed', dict(transfer))
+
+
+def _now():
+    return datetime.now(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    sim = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+    # Plumbing
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _ok(self, message, data, **extra):
+        self._send(200, {'status': True, 'message': message, 'data': data, **extra})
+
+    def _error(self, status, message):
+        self._send(status, {'status': False, 'message': message})
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _dispatch(self, method):
+        self.sim.count('requests')
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        is_api = not path.startswith(self.sim.config.exempt_paths)
+
+        delay = self.sim.latency()
+        if delay:
+            time.sleep(delay)
+
+        if is_api:
+            if not self.headers.get('Authorization', '').startswith('Bearer '):
+                return self._error(401, 'Invalid key')
+            if self.sim.chance(self.sim.config.error_rate):
+                self.sim.count('errors_injected')
+                with self.sim._random_lock:
+                    status = self.sim.random.choice(self.sim.config.error_statuses)
+                return self._error(status, 'Simulated gateway error')
+
+        body = self._body() if method == 'POST' else {}
+        if body is None:
+            return self._error(400, 'Invalid JSON')
+
+        for route_method, prefix, handler in ROUTES:
+            if route_method == method and (path == prefix or (prefix.endswith('/') and path.startswith(prefix))):
+                return handler(self, path[len(prefix):] if prefix.endswith('/') else '', query, body)
+        return self._error(404, 'Not found')
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    # Transactions
+
+    def initialize(self, _, query, body):
+        if not body.get('email') or not body.get('amount'):
+            return self._error(400, 'Email and amount are required')
+        reference = body.get('reference') or uuid.uuid4().hex[:12]
+        with self.sim.lock:
+            if reference in self.sim.transactions:
+                return self._error(400, 'Duplicate Transaction Reference')
+            transaction = {
+                'id': next(self.sim.ids),
+                'reference': reference,
+                'amount': int(body['amount']),
+                'currency': 'NGN',
+                'status': 'ongoing',
+                'gateway_response': '',
+                'channel': 'card',
+                'created_at': _now(),
+                'paid_at': None,
+                'callback_url': body.get('callback_url', ''),
+                'customer': {'email': body['email']},
+                'metadata': body.get('metadata'),
+                'authorization': {
+                    'authorization_code': f'AUTH_{uuid.uuid4().hex[:10]}',
+                    'card_type': 'visa',
+                    'last4': '4081',
+                },
+            }
+            self.sim.transactions[reference] = transaction
+        if self.sim.config.auto_pay:
+            self.sim.settle_charge(reference)
+        access_code = uuid.uuid4().hex[:15]
+        self._ok('Authorization URL created', {
+            'authorization_url': f'{self.sim.url}/checkout/{reference}',
+            'access_code': access_code,
+            'reference': reference,
+        })
+
+    def verify(self, reference, query, body):
+        with self.sim.lock:
+            transaction = self.sim.transactions.get(reference)
+            transaction = dict(transaction) if transaction else None
+        if transaction is None:
+            return self._error(400, 'Transaction reference not found')
+        if transaction['status'] == 'ongoing':
+            transaction['status'] = 'abandoned'
+        self._ok('Verification successful', transaction)
+
+    def list_transactions(self, _, query, body):
+        start, end = _parse_time(query.get('from')), _parse_time(query.get('to'))
+        page = max(int(query.get('page') or 1), 1)
+        per_page = min(max(int(query.get('perPage') or 50), 1), 100)
+        with self.sim.lock:
+            transactions = [
+                dict(transaction) for transaction in reversed(self.sim.transactions.values())
+                if (start is None or _parse_time(transaction['created_at']) >= start)
+                and (end is None or _parse_time(transaction['created_at']) < end)
+            ]
+        page_count = max((len(transactions) + per_page - 1) // per_page, 1)
+        offset = (page - 1) * per_page
+        self._ok('Transactions retrieved', transactions[offset:offset + per_page], meta={
+            'total': len(transactions),
+            'perPage': per_page,
+            'page': page,
+            'pageCount': page_count,
+        })
+
+    def checkout(self, reference, query, body):
+        transaction = self.sim.settle_charge(reference)
+        if transaction is None:
+            return self._error(404, 'Transaction not found')
+        callback = transaction['callback_url']
+        if not callback:
+            return self._ok('Charge settled', {'reference': reference, 'status': transaction['status']})
+        separator = '&' if '?' in callback else '?'
+        if 'reference=' not in callback:
+            callback = f"{callback}{separator}{urlencode({'reference': reference})}"
+        self._send(302, headers={'Location': callback})
+
+    # Transfers
+
+    def _create_transfer(self, item):
+        reference = item.get('reference') or uuid.uuid4().hex[:12]
+        with self.sim.lock:
+            if reference in self.sim.transfers:
+                return None, 'Duplicate Transfer Reference'
+            transfer = {
+                'id': next(self.sim.ids),
+                'reference': reference,
+                'amount': int(item.get('amount') or 0),
+                'currency': 'NGN',
+                'recipient': item.get('recipient'),
+                'reason': item.get('reason', ''),
+                'transfer_code': f'TRF_{uuid.uuid4().hex[:12]}',
+                'status': 'pending',
+                'created_at': _now(),
+            }
+            self.sim.transfers[reference] = transfer
+        return transfer, None
+
+    def transfer(self, _, query, body):
+        transfer, error = self._create_transfer(body)
+        if error:
+            return self._error(400, error)
+        self.sim.settle_transfer(transfer)
+        self._ok('Transfer has been queued', transfer)
+
+    def verify_transfer(self, reference, query, body):
+        with self.sim.lock:
+            transfer = self.sim.transfers.get(reference)
+            transfer = dict(transfer) if transfer else None
+        if transfer is None:
+            return self._error(400, 'Transfer not found')
+        self._ok('Transfer retrieved', transfer)
+
+    def bulk_transfer(self, _, query, body):
+        items = body.get('transfers') or []
+        if not items or len(items) > 100:
+            return self._error(400, 'Provide between 1 and 100 transfers')
+        created = []
+        for item in items:
+            transfer, error = self._create_transfer(item)
+            if error:
+                return self._error(400, error)
+            created.append(transfer)
+        for transfer in created:
+            self.sim.settle_transfer(transfer)
+        self._ok(f'{len(created)} transfers queued.', [
+            {key: transfer[key] for key in ('reference', 'recipient', 'amount', 'transfer_code', 'currency', 'status')}
+            for transfer in created
+        ])
+
+    # Recipients and banks
+
+    def _recipient(self, item):
+        key = (item.get('bank_code'), item.get('account_number'))
+        with self.sim.lock:
+            recipient = self.sim.recipients.get(key)
+            if recipient is None:
+                recipient = {
+                    'id': next(self.sim.ids),
+                    'recipient_code': f'RCP_{uuid.uuid4().hex[:12]}',
+                    'type': item.get('type', 'nuban'),
+                    'name': item.get('name', ''),
+                    'currency': 'NGN',
+                    'active': True,
+                    'details': {'account_number': key[1], 'bank_code': key[0]},
+                }
+                self.sim.recipients[key] = recipient
+        return recipient
+
+    def transfer_recipient(self, _, query, body):
+        if not body.get('account_number') or not body.get('bank_code'):
+            return self._error(400, 'Account number and bank code are required')
+        self._ok('Transfer recipient created successfully', self._recipient(body))
+
+    def bulk_transfer_recipient(self, _, query, body):
+        batch = body.get('batch') or []
+        success, errors = [], []
+        for item in batch:
+            if _resolve_name(item.get('account_number'), item.get('bank_code')):
+                success.append(self._recipient(item))
+            else:
+                errors.append({'message': 'Could not resolve account', 'details': item})
+        self._ok('Recipients added successfully', {'success': success, 'errors': errors})
+
+    def banks(self, _, query, body):
+        self._ok('Banks retrieved', [dict(bank, id=i, active=True) for i, bank in enumerate(BANKS, 1)])
+
+    def resolve(self, _, query, body):
+        account_number, bank_code = query.get('account_number'), query.get('bank_code')
+        account_name = _resolve_name(account_number, bank_code)
+        if not account_name:
+            return self._error(422, 'Could not resolve account name. Check parameters or try again.')
+        self._ok('Account number resolved', {
+            'account_number': account_number,
+            'account_name': account_name,
+            'bank_id': 1,
+        })
+
+
+def _resolve_name(account_number, bank_code):
+    """Deterministic fake name for any 10-digit account at a known bank"""
+    if not (account_number and account_number.isdigit() and len(account_number) == 10):
+        return None
+    if bank_code not in {bank['code'] for bank in BANKS}:
+        return None
+    digest = int(hashlib.sha256(f'{bank_code}:{account_number}'.encode()).hexdigest(), 16)
+    return f'{FIRST_NAMES[digest % len(FIRST_NAMES)]} {LAST_NAMES[(digest // 10) % len(LAST_NAMES)]}'
+
+
+# (method, path or prefix ending in '/', handler)
+ROUTES = [
+    ('POST', '/transaction/initialize', _Handler.initialize),
+    ('GET', '/transaction/verify/', _Handler.verify),
+    ('GET', '/transaction', _Handler.list_transactions),
+    ('GET', '/checkout/', _Handler.checkout),
+    ('GET', '/transfer/verify/', _Handler.verify_transfer),
+    ('POST', '/transfer/bulk', _Handler.bulk_transfer),
+    ('POST', '/transfer', _Handler.transfer),
+    ('POST', '/transferrecipient/bulk', _Handler.bulk_transfer_recipient),
+    ('POST', '/transferrecipient', _Handler.transfer_recipient),
+    ('GET', '/bank/resolve', _Handler.resolve),
+    ('GET', '/bank', _Handler.banks),
+]
@@ -0,0 +1,80 @@
+"""
+Sweeper for stuck PENDING payments
+A payment stays PENDING if the user closes the Paystack tab before the
+callback and the webhook is lost. The sweeper re-verifies stale PENDING
+payments in bounded batches: gateway calls run concurrently on a thread
+pool sharing the pooled Paystack session, results are applied one by one
+through apply_verification (idempotent, so racing a late webhook is safe).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Payment
+from .paystack import paystack
+from .verification import apply_verification, verify_reference
+
+logger = logging.getLogger(__name__)
+
+
+def stale_pending_payments(older_than_minutes=None, max_age_hours=None):
+    """PENDING payments old enough to sweep; served by the (status, created_at) index"""
+    now = timezone.now()
+    older_than_minutes = older_than_minutes or settings.PAYMENT_SWEEP_AFTER_MINUTES
+    max_age_hours = max_age_hours or settings.PAYMENT_SWEEP_MAX_AGE_HOURS
+    return Payment.objects.filter(
+        status='PENDING',
+        created_at__lt=now - timedelta(minutes=older_than_minutes),
+        created_at__gte=now - timedelta(hours=max_age_hours),
+    ).exclude(paystack_reference='')
+
+
+def sweep_pending_payments(older_than_minutes=None, max_age_hours=None, batch_size=50, workers=None):
+    """
+    Re-verify stale PENDING payments with Paystack.
+
+    Payments still unresolved after PAYMENT_ABANDON_HOURS that Paystack
+    reports as abandoned are CANCELLED; gateway errors leave them PENDING.
+
+    Returns:
+        dict: count of payments per resulting status, plus 'checked'
+    """
+    # More threads than pooled connections would just queue on the pool
+    workers = min(workers or settings.PAYMENT_SWEEP_WORKERS, paystack.pool_size)
+    abandon_before = timezone.now() - timedelta(hours=settings.PAYMENT_ABANDON_HOURS)
+    payments = stale_pending_payments(older_than_minutes, max_age_hours).order_by('created_at', 'pk')
+
+    results = {'checked': 0, 'SUCCESS': 0, 'FAILED': 0, 'CANCELLED': 0, 'PENDING': 0}
+    last = None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='payment-sweeper') as pool:
+        while True:
+            batch = payments
+            if last is not None:
+                # Keyset pagination: resolved payments drop out of the filter anyway
+                batch = batch.filter(created_at__gte=last[0]).exclude(created_at=last[0], pk__lte=last[1])
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last = (batch[-1].created_at, batch[-1].pk)
+
+            responses = pool.map(lambda payment: verify_reference(payment.reference), batch)
+            for payment, response in zip(batch, responses):
+                status = apply_verification(payment, response)
+                data = response.get('data') or {}
+                if (status == 'PENDING' and data.get('status') == 'abandoned'
+                        and payment.created_at < abandon_before):
+                    if Payment.objects.filter(pk=payment.pk, status='PENDING').update(
+                        status='CANCELLED',
+                        paystack_response=data,
+                    ):
+                        status = 'CANCELLED'
+                results['checked'] += 1
+                results[status] = results.get(status, 0) + 1
+
+    if results['checked']:
+        logger.info('Payment sweep: %s', results)
+    return results
@@ -0,0 +1,78 @@
+"""
+Celery tasks for payments
+- Webhook event processing (dedicated `webhooks` queue)
+- Bank directory refresh and account resolution
+- Payout sweeps
+- Stuck PENDING payment sweeps
+"""
+from celery import shared_task
+from django.contrib.auth import get_user_model
+
+from .banks import refresh_banks, resolve_account
+from .payouts import resubmit_pending_payouts, run_payouts as run_payout_sweep
+from .sweeper import sweep_pending_payments as sweep_payments
+from .webhooks import process_event, record_failure
+
+
+@shared_task(bind=True, max_retries=5)
+def process_webhook_event(self, event_id, force=False):
+    """
+    Process one stored Paystack webhook event
+    Retried with exponential backoff; the event row records the last error
+    """
+    try:
+        return process_event(event_id, force=force)
+    except Exception as exc:
+        record_failure(event_id, exc)
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries * 30)
+
+
+@shared_task
+def refresh_bank_directory():
+    """
+    Sync the bank list with Paystack
+    Runs daily via Celery Beat
+    """
+    return refresh_banks()
+
+
+@shared_task
+def resolve_bank_account(user_id):
+    """
+    Confirm a user's account name with Paystack after they save bank details
+    Only applied if the details haven't changed again in the meantime
+    """
+    User = get_user_model()
+    details = User.objects.filter(pk=user_id).values('bank_code', 'account_number').first()
+    if not details or not details['bank_code'] or not details['account_number']:
+        return False
+
+    account_name = resolve_account(details['bank_code'], details['account_number'])
+    if account_name is None:
+        return False
+
+    return bool(User.objects.filter(pk=user_id, **details).update(
+        account_name=account_name,
+        bank_account_verified=True,
+    ))
+
+
+@shared_task
+def run_payouts():
+    """
+    Pay out eligible wallet balances and retry failed submissions
+    Runs daily via Celery Beat
+    """
+    resubmitted = resubmit_pending_payouts()
+    result = run_payout_sweep()
+    result['resubmitted'] = resubmitted
+    return result
+
+
+@shared_task
+def sweep_pending_payments():
+    """
+    Re-verify payments stuck in PENDING (lost callback and webhook)
+    Runs every 10 minutes via Celery Beat
+    """
+    return sweep_payments()
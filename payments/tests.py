@@ -0,0 +1,314 @@
+"""
+Tests for payments app
+"""
+import asyncio
+import io
+import itertools
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User, UserWallet
+from transactions.models import Transaction
+
+from .models import Payment, Payout, WebhookEvent
+from .payouts import resubmit_pending_payouts, run_payouts
+from .reconciliation import AMOUNT_MISMATCH, MISSING_LOCALLY, NOT_CHARGED, reconcile
+from .verification import averify_reference, verification_cache, verify_reference
+from .webhooks import compute_signature, process_event
+
+_phones = itertools.count(1)
+
+
+def make_user(name, **fields):
+    return User.objects.create_user(
+        username=name,
+        email=f'{name}@example.com',
+        phone_number=f'081{next(_phones):08d}',
+        password='x-secret-1',
+        **fields,
+    )
+
+
+def wallet(user):
+    return UserWallet.objects.get(user=user)
+
+
+class EscrowPaymentTestCase(TestCase):
+    """A client, a provider and an unpaid escrow with one PENDING payment"""
+
+    def setUp(self):
+        self.client_user = make_user('client')
+        self.provider = make_user('provider')
+        self.transaction = Transaction.objects.create(
+            client=self.client_user,
+            service_provider=self.provider,
+            amount=Decimal('5000.00'),
+            service_description='Website copy',
+        )
+        self.payment = Payment.objects.create(
+            transaction=self.transaction,
+            user=self.client_user,
+            amount=self.transaction.amount,
+            paystack_reference='PSK-REF-1',
+        )
+
+    def charge(self, status='success'):
+        return {'id': 4001, 'reference': self.payment.paystack_reference, 'status': status}
+
+
+class ConfirmTests(EscrowPaymentTestCase):
+
+    def test_second_confirm_does_not_credit_twice(self):
+        stale = Payment.objects.get(pk=self.payment.pk)
+
+        self.assertTrue(self.payment.confirm(self.charge()))
+        self.assertFalse(stale.confirm(self.charge()))
+
+        self.assertEqual(stale.status, 'SUCCESS')
+        client_wallet = wallet(self.client_user)
+        self.assertEqual(client_wallet.escrow_balance, self.transaction.amount)
+        self.assertEqual(client_wallet.total_spent, self.transaction.amount)
+
+    def test_second_payment_for_a_funded_escrow_does_not_credit(self):
+        other = Payment.objects.create(
+            transaction=self.transaction,
+            user=self.client_user,
+            amount=self.transaction.amount,
+        )
+        self.payment.confirm(self.charge())
+        self.assertTrue(other.confirm(self.charge()))
+
+        self.assertEqual(wallet(self.client_user).escrow_balance, self.transaction.amount)
+
+
+@override_settings(PAYSTACK_SECRET_KEY='sk_test_webhook')
+class WebhookTests(EscrowPaymentTestCase):
+
+    def deliver(self, payload):
+        body = json.dumps(payload).encode()
+        return self.client.post(
+            reverse('payments:webhook'),
+            body,
+            content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE=compute_signature(body),
+            secure=True,
+        )
+
+    @mock.patch('payments.views.process_webhook_event.delay')
+    def test_redelivery_is_acknowledged_without_work(self, delay):
+        payload = {'event': 'charge.success', 'data': self.charge()}
+
+        self.assertEqual(self.deliver(payload).status_code, 200)
+        self.assertEqual(self.deliver(payload).status_code, 200)
+
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+        delay.assert_called_once_with('charge.success:4001')
+
+    @mock.patch('payments.views.process_webhook_event.delay')
+    def test_bad_signature_is_rejected(self, delay):
+        response = self.client.post(
+            reverse('payments:webhook'),
+            b'{"event": "charge.success"}',
+            content_type='application/json',
+            HTTP_X_PAYSTACK_SIGNATURE='forged',
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+        delay.assert_not_called()
+
+    @mock.patch('payments.views.process_webhook_event.delay')
+    def test_processing_and_replay_credit_escrow_once(self, delay):
+        self.deliver({'event': 'charge.success', 'data': self.charge()})
+
+        self.assertEqual(process_event('charge.success:4001'), 'PROCESSED')
+        self.assertEqual(process_event('charge.success:4001'), 'PROCESSED')
+        self.assertEqual(process_event('charge.success:4001', force=True), 'PROCESSED')
+
+        self.assertEqual(WebhookEvent.objects.get().attempts, 2)
+        self.assertEqual(wallet(self.client_user).escrow_balance, self.transaction.amount)
+
+
+class VerificationTests(TestCase):
+
+    def setUp(self):
+        verification_cache.invalidate()
+
+    @mock.patch('payments.verification.paystack.verify_payment')
+    def test_final_status_is_reused(self, verify_payment):
+        verify_payment.return_value = {'status': True, 'data': {'status': 'success'}}
+
+        verify_reference('PAY-FINAL')
+        verify_reference('PAY-FINAL')
+
+        verify_payment.assert_called_once_with('PAY-FINAL')
+
+    @mock.patch('payments.verification.paystack.verify_payment')
+    def test_pending_charge_and_gateway_error_are_asked_again(self, verify_payment):
+        verify_payment.side_effect = [
+            {'status': True, 'data': {'status': 'ongoing'}},
+            {'status': False, 'message': 'Payment verification failed: timeout'},
+            {'status': True, 'data': {'status': 'success'}},
+        ]
+
+        self.assertEqual(verify_reference('PAY-LATER')['data']['status'], 'ongoing')
+        self.assertFalse(verify_reference('PAY-LATER')['status'])
+        self.assertEqual(verify_reference('PAY-LATER')['data']['status'], 'success')
+        self.assertEqual(verify_payment.call_count, 3)
+
+    async def test_async_callers_share_one_call(self):
+        calls = []
+
+        async def verify_payment(reference):
+            calls.append(reference)
+            await asyncio.sleep(0.05)
+            return {'status': True, 'data': {'status': 'success'}}
+
+        with mock.patch('payments.verification.async_paystack.verify_payment', verify_payment):
+            responses = await asyncio.gather(*[averify_reference('PAY-ASYNC') for _ in range(5)])
+            await averify_reference('PAY-ASYNC')
+
+        self.assertEqual(calls, ['PAY-ASYNC'])
+        self.assertEqual({response['data']['status'] for response in responses}, {'success'})
+
+
+def accept_bulk(transfers):
+    """initiate_bulk_transfer as Paystack answers when it takes every transfer"""
+    return {'status': True, 'data': [
+        {'reference': transfer['reference'], 'transfer_code': f"TRF_{transfer['reference']}"}
+        for transfer in transfers
+    ]}
+
+
+@override_settings(PAYOUT_MIN_AMOUNT=Decimal('100.00'))
+class PayoutTests(TestCase):
+
+    def setUp(self):
+        self.providers = [
+            make_user(
+                f'payee{n}',
+                bank_name='Test Bank',
+                bank_code='058',
+                account_number=f'00000000{n:02d}',
+                account_name=f'Payee {n}',
+                bank_account_verified=True,
+            )
+            for n in range(3)
+        ]
+        for provider in self.providers:
+            UserWallet.adjust(provider.pk, balance=Decimal('2500.00'))
+
+        patcher = mock.patch(
+            'payments.payouts.get_recipient_codes',
+            side_effect=lambda users: {user.pk: f'RCP_{user.pk}' for user in users},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch('payments.payouts.paystack.initiate_bulk_transfer', side_effect=accept_bulk)
+    def test_batch_zeroes_balances_exactly_once(self, bulk):
+        result = run_payouts()
+        again = run_payouts()
+
+        self.assertEqual(result['created'], 3)
+        self.assertEqual(result['submitted'], 3)
+        self.assertEqual(again['created'], 0)
+        bulk.assert_called_once()
+        for provider in self.providers:
+            self.assertEqual(wallet(provider).balance, 0)
+            payout = Payout.objects.get(user=provider)
+            self.assertEqual(payout.amount, Decimal('2500.00'))
+            self.assertEqual(payout.status, 'PROCESSING')
+
+    @mock.patch('payments.payouts.paystack.initiate_transfer')
+    @mock.patch('payments.payouts.paystack.verify_transfer')
+    @mock.patch('payments.payouts.paystack.initiate_bulk_transfer')
+    def test_resubmit_after_a_failed_bulk_call(self, bulk, verify_transfer, initiate_transfer):
+        # The bulk call timed out, but Paystack had taken the first transfer
+        bulk.return_value = {'status': False, 'message': 'Bulk transfer initiation failed: timeout'}
+        run_payouts()
+        payouts = list(Payout.objects.order_by('pk'))
+        self.assertEqual({payout.status for payout in payouts}, {'PENDING'})
+
+        known = payouts[0].reference
+        verify_transfer.side_effect = lambda reference: (
+            {'status': True, 'data': {'reference': reference, 'transfer_code': 'TRF_KNOWN'}}
+            if reference == known else {'status': False, 'message': 'Transfer not found'}
+        )
+        initiate_transfer.side_effect = lambda amount, recipient, reason, reference: (
+            {'status': True, 'data': {'reference': reference, 'transfer_code': f'TRF_{reference}'}}
+        )
+
+        self.assertEqual(resubmit_pending_payouts(older_than_minutes=0), 3)
+
+        sent = [call.kwargs['reference'] for call in initiate_transfer.call_args_list]
+        self.assertEqual(sorted(sent), sorted(payout.reference for payout in payouts[1:]))
+        for payout in Payout.objects.all():
+            self.assertEqual(payout.status, 'PROCESSING')
+            self.assertTrue(payout.transfer_code)
+        self.assertEqual(Payout.objects.get(reference=known).transfer_code, 'TRF_KNOWN')
+        # Balances were debited once, when the payouts were created
+        for provider in self.providers:
+            self.assertEqual(wallet(provider).balance, 0)
+
+    @mock.patch('payments.payouts.paystack.initiate_transfer')
+    @mock.patch('payments.payouts.paystack.verify_transfer')
+    @mock.patch('payments.payouts.paystack.initiate_bulk_transfer')
+    def test_failed_resubmit_stays_pending(self, bulk, verify_transfer, initiate_transfer):
+        bulk.return_value = {'status': False, 'message': 'Bulk transfer initiation failed: 503'}
+        verify_transfer.return_value = {'status': False, 'message': 'Transfer not found'}
+        initiate_transfer.return_value = {'status': False, 'message': 'Transfer initiation failed: 503'}
+        run_payouts()
+
+        self.assertEqual(resubmit_pending_payouts(older_than_minutes=0), 0)
+        self.assertEqual(set(Payout.objects.values_list('status', flat=True)), {'PENDING'})
+
+    @mock.patch('payments.payouts.paystack.initiate_bulk_transfer', side_effect=accept_bulk)
+    def test_failed_transfer_credits_back_once(self, bulk):
+        from .payouts import resolve_transfer
+
+        run_payouts()
+        payout = Payout.objects.get(user=self.providers[0])
+        data = {'reference': payout.reference, 'status': 'failed'}
+
+        self.assertTrue(resolve_transfer(data, succeeded=False))
+        self.assertTrue(resolve_transfer(data, succeeded=False))
+
+        self.assertEqual(wallet(self.providers[0]).balance, payout.amount)
+        self.assertEqual(Payout.objects.get(pk=payout.pk).status, 'FAILED')
+
+
+class ReconciliationTests(EscrowPaymentTestCase):
+
+    def test_report_lists_each_discrepancy(self):
+        self.payment.confirm(self.charge())
+        payments = [self.payment] + [
+            Payment.objects.create(
+                transaction=self.transaction, user=self.client_user, amount=Decimal('100.00'), status='SUCCESS',
+            )
+            for _ in range(4)
+        ]
+        charges = [
+            {'reference': payment.reference, 'status': 'success', 'amount': int(payment.amount * 100)}
+            for payment in payments[:3]
+        ]
+        charges[1]['amount'] += 1
+        charges.append({'reference': 'PAY-ONLY-AT-PAYSTACK', 'status': 'success', 'amount': 500})
+        now = timezone.now()
+        report = io.StringIO()
+
+        summary = reconcile(now - timedelta(hours=1), now + timedelta(hours=1), report, transactions=charges)
+
+        self.assertEqual(summary['charges'], 4)
+        self.assertEqual(summary['payments'], 5)
+        self.assertEqual(summary['matched'], 2)
+        self.assertEqual(summary[AMOUNT_MISMATCH], 1)
+        self.assertEqual(summary[MISSING_LOCALLY], 1)
+        self.assertEqual(summary[NOT_CHARGED], 2)
+        self.assertEqual(len(report.getvalue().splitlines()), 1 + 4)
@@ -1,14 +1,20 @@
 """
 URL patterns for payments app
 """
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.PAYSTACK_ASYNC_VIEWS:
+    from . import async_views as gateway_views
+else:
+    gateway_views = views
+
 app_name = 'payments'
 
 urlpatterns = [
-    path('initiate/<int:transaction_id>/', views.initiate_payment, name='initiate'),
-    path('verify/', views.verify_payment, name='verify'),
+    path('initiate/<int:transaction_id>/', gateway_views.initiate_payment, name='initiate'),
+    path('verify/', gateway_views.verify_payment, name='verify'),
     path('webhook/', views.paystack_webhook, name='webhook'),
     path('history/', views.payment_history, name='history'),
 ]
@@ -0,0 +1,71 @@
+"""
+Single-flight payment verification
+The browser callback can be retried (refresh, back button) while the
+charge.success webhook lands; only one Paystack verify call per reference
+is made at a time and the others reuse its response. Only final answers
+are kept afterwards: a charge still in progress is asked about again.
+"""
+from asgiref.sync import sync_to_async
+
+from core.cache import CacheNamespace
+
+from .models import Payment
+from .paystack import paystack
+from .paystack_async import async_paystack
+
+# Short-lived: long enough to cover a callback/refresh burst
+verification_cache = CacheNamespace('payment_verification', timeout=30)
+
+# Paystack charge statuses that will never turn into a success
+FAILED_CHARGE_STATUSES = {'failed', 'reversed'}
+
+# Charge statuses that won't change again (abandoned can still be paid)
+FINAL_CHARGE_STATUSES = FAILED_CHARGE_STATUSES | {'success'}
+
+
+def _is_final(response):
+    return bool(response.get('status')) and (response.get('data') or {}).get('status') in FINAL_CHARGE_STATUSES
+
+
+def verify_reference(reference):
+    """Verify with Paystack, sharing one in-flight call per reference across processes"""
+    response = verification_cache.get_or_set(reference, lambda: paystack.verify_payment(reference))
+    if not _is_final(response):
+        # Don't pin a transient gateway error or a pending charge for the whole timeout
+        verification_cache.delete(reference)
+    return response
+
+
+async def averify_reference(reference):
+    """verify_reference for the async views, on the async Paystack client"""
+    response = await verification_cache.aget_or_set(reference, lambda: async_paystack.verify_payment(reference))
+    if not _is_final(response):
+        await sync_to_async(verification_cache.delete)(reference)
+    return response
+
+
+def apply_verification(payment, response):
+    """
+    Apply a verify response to a payment, idempotently.
+
+    A gateway error (status False) changes nothing: the payment stays
+    PENDING for the sweeper rather than being marked FAILED. Charges
+    still in progress or abandoned stay PENDING too.
+
+    Returns:
+        str: the payment's status afterwards
+    """
+    if not response.get('status'):
+        return payment.status
+
+    data = response.get('data') or {}
+    charge_status = data.get('status')
+    if charge_status == 'success':
+        payment.confirm(data)
+    elif charge_status in FAILED_CHARGE_STATUSES:
+        Payment.objects.filter(pk=payment.pk, status='PENDING').update(
+            status='FAILED',
+            paystack_response=data,
+        )
+        payment.refresh_from_db(fields=['status'])
+    return payment.status
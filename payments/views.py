@@ -1,16 +1,24 @@
 """
 Views for payment processing with Paystack
 """
+import json
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from django.utils import timezone
+from django.db import IntegrityError, transaction as db_transaction
 from transactions.models import Transaction
-from .models import Payment
+from .models import Payment, WebhookEvent
 from .paystack import paystack
+from .tasks import process_webhook_event
+from .verification import apply_verification, verify_reference
+from .webhooks import event_id_for, is_valid_signature
+
+logger = logging.getLogger(__name__)
 
 
 @login_required
@@ -82,33 +90,24 @@ def verify_payment(request):
         messages.error(request, 'Payment record not found.')
         return redirect('core:dashboard')
     
-    # Verify with Paystack
-    response = paystack.verify_payment(reference)
+    # Already confirmed (usually by the webhook): no need to ask Paystack again
+    if payment.status != 'SUCCESS':
+        apply_verification(payment, verify_reference(reference))
     
-    if response.get('status') and response['data']['status'] == 'success':
-        # Payment successful
-        payment.status = 'SUCCESS'
-        payment.verified_at = timezone.now()
-        payment.paystack_response = response['data']
-        payment.authorization_code = response['data'].get('authorization', {}).get('authorization_code', '')
-        payment.save()
-        
-        # Mark transaction as paid
-        payment.transaction.mark_as_paid(reference)
-        
+    if payment.status == 'SUCCESS':
         messages.success(
             request,
             f'Payment successful! ₦{payment.amount:,.2f} is now safely held in escrow.'
         )
-        return redirect('transactions:detail', transaction_id=payment.transaction.id)
+    elif payment.status == 'PENDING':
+        messages.info(
+            request,
+            "We haven't received confirmation of your payment yet. "
+            "This transaction will update automatically once Paystack confirms it."
+        )
     else:
-        # Payment failed
-        payment.status = 'FAILED'
-        payment.paystack_response = response.get('data', {})
-        payment.save()
-        
         messages.error(request, 'Payment verification failed. Please try again.')
-        return redirect('transactions:detail', transaction_id=payment.transaction.id)
+    return redirect('transactions:detail', transaction_id=payment.transaction_id)
 
 
 @csrf_exempt
@@ -116,51 +115,46 @@ def paystack_webhook(request):
     """
     Webhook endpoint for Paystack events
     This allows Paystack to notify us about payment events
+    
+    The event is verified, stored and acknowledged; processing happens on
+    the `webhooks` Celery queue (payments.tasks.process_webhook_event).
+    Redeliveries of an already stored event are acknowledged without work.
     """
-    if request.method == 'POST':
-        import json
-        import hmac
-        import hashlib
-        
-        # Verify webhook signature
-        paystack_signature = request.headers.get('X-Paystack-Signature')
-        body = request.body
-        
-        # Compute hash
-        computed_signature = hmac.new(
-            settings.PAYSTACK_SECRET_KEY.encode('utf-8'),
-            body,
-            hashlib.sha512
-        ).hexdigest()
-        
-        if paystack_signature != computed_signature:
-            return JsonResponse({'status': 'error', 'message': 'Invalid signature'}, status=400)
-        
-        # Process event
-        try:
-            data = json.loads(body)
-            event = data.get('event')
-            event_data = data.get('data', {})
-            
-            if event == 'charge.success':
-                # Handle successful payment
-                reference = event_data.get('reference')
-                try:
-                    payment = Payment.objects.get(paystack_reference=reference)
-                    if payment.status != 'SUCCESS':
-                        payment.status = 'SUCCESS'
-                        payment.verified_at = timezone.now()
-                        payment.paystack_response = event_data
-                        payment.save()
-                        payment.transaction.mark_as_paid(reference)
-                except Payment.DoesNotExist:
-                    pass
-            
-            return JsonResponse({'status': 'success'})
-        except Exception as e:
-            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
-    
-    return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    
+    # Verify webhook signature
+    signature = request.headers.get('X-Paystack-Signature', '')
+    body = request.body
+    if not is_valid_signature(body, signature):
+        return JsonResponse({'status': 'error', 'message': 'Invalid signature'}, status=400)
+    
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    
+    event_id = event_id_for(payload, body)
+    try:
+        # Savepoint: the duplicate insert mustn't break an enclosing transaction
+        with db_transaction.atomic():
+            WebhookEvent.objects.create(
+                event_id=event_id,
+                event=str(payload.get('event', ''))[:50],
+                body=body.decode('utf-8'),
+                signature=signature,
+            )
+    except IntegrityError:
+        # Redelivery: already stored (and queued or processed)
+        return JsonResponse({'status': 'success'})
+    
+    try:
+        process_webhook_event.delay(event_id)
+    except Exception:
+        # Broker down: the event stays RECEIVED and can be replayed
+        logger.exception('Could not enqueue webhook event %s', event_id)
+    
+    return JsonResponse({'status': 'success'})
 
 
 @login_required
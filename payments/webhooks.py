@@ -0,0 +1,117 @@
+"""
+Paystack webhook ingestion and event handlers
+The view only verifies the signature and stores the raw event; handlers run
+later on the `webhooks` Celery queue. Every handler must be idempotent:
+Paystack redelivers, and stored events can be replayed.
+"""
+import hashlib
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Payment, WebhookEvent
+from .payouts import resolve_transfer
+
+logger = logging.getLogger(__name__)
+
+
+def compute_signature(body):
+    """HMAC-SHA512 of the raw request body, as sent in X-Paystack-Signature"""
+    return hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode('utf-8'),
+        body,
+        hashlib.sha512
+    ).hexdigest()
+
+
+def is_valid_signature(body, signature):
+    return bool(signature) and hmac.compare_digest(compute_signature(body), signature)
+
+
+def event_id_for(payload, body):
+    """
+    Stable ID for a delivery. Paystack has no envelope ID, so use the event
+    name plus the object's ID; fall back to a hash of the body.
+    """
+    event = payload.get('event', '')
+    data = payload.get('data') or {}
+    object_id = data.get('id') if isinstance(data, dict) else None
+    if object_id is None:
+        object_id = hashlib.sha256(body).hexdigest()
+    return f"{event}:{object_id}"[:150]
+
+
+def handle_charge_success(data):
+    """Confirm the payment and move funds into escrow (Payment.confirm is once-only)"""
+    reference = data.get('reference')
+    payment = Payment.objects.filter(paystack_reference=reference).first()
+    if payment is None:
+        logger.warning('charge.success for unknown reference %s', reference)
+        return False
+
+    if payment.status != 'SUCCESS':
+        payment.confirm(data)
+    return True
+
+
+def handle_transfer_success(data):
+    return resolve_transfer(data, succeeded=True)
+
+
+def handle_transfer_failed(data):
+    """Failed and reversed transfers credit the provider's wallet back"""
+    return resolve_transfer(data, succeeded=False)
+
+
+# event name -> handler(data); events without a handler are stored as IGNORED
+HANDLERS = {
+    'charge.success': handle_charge_success,
+    'transfer.success': handle_transfer_success,
+    'transfer.failed': handle_transfer_failed,
+    'transfer.reversed': handle_transfer_failed,
+}
+
+
+def process_event(event_id, force=False):
+    """
+    Run the handler for a stored event inside one database transaction,
+    so the handler's writes and the PROCESSED mark commit together.
+
+    Args:
+        event_id: WebhookEvent.event_id
+        force: process again even if already PROCESSED / IGNORED (replay)
+
+    Returns:
+        str: resulting status
+    """
+    with db_transaction.atomic():
+        event = WebhookEvent.objects.select_for_update().get(event_id=event_id)
+        if event.status in ('PROCESSED', 'IGNORED') and not force:
+            return event.status
+
+        event.attempts += 1
+        handler = HANDLERS.get(event.event)
+        if handler is None:
+            event.status = 'IGNORED'
+        else:
+            payload = json.loads(event.body)
+            handler(payload.get('data') or {})
+            event.status = 'PROCESSED'
+        event.error = ''
+        event.processed_at = timezone.now()
+        event.save(update_fields=['status', 'attempts', 'error', 'processed_at'])
+        return event.status
+
+
+def record_failure(event_id, exc):
+    """Keep the error on the event for the admin and the replay command"""
+    WebhookEvent.objects.filter(event_id=event_id).update(
+        status='FAILED',
+        attempts=F('attempts') + 1,
+        error=f'{type(exc).__name__}: {exc}',
+    )
@@ -2,12 +2,14 @@
 Transaction models for escrow system
 Handles the entire escrow workflow
 """
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 
+from accounts.models import UserWallet
+
 
 class Transaction(models.Model):
     """Main transaction model for escrow"""
@@ -116,6 +118,13 @@ class Transaction(models.Model):
     def __str__(self):
         return f"{self.reference} - {self.client} → {self.service_provider}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Status as loaded, so post_save receivers can tell a transition from a re-save
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
     def save(self, *args, **kwargs):
         # Generate reference if not exists
         if not self.reference:
@@ -141,9 +150,7 @@ class Transaction(models.Model):
         self.save()
         
         # Update client wallet escrow balance
-        self.client.wallet.escrow_balance += self.amount
-        self.client.wallet.total_spent += self.amount
-        self.client.wallet.save()
+        UserWallet.adjust(self.client_id, escrow_balance=self.amount, total_spent=self.amount)
     
     def start_work(self):
         """Service provider accepts and starts work"""
@@ -158,81 +165,97 @@ class Transaction(models.Model):
         self.auto_release_date = timezone.now() + timedelta(days=settings.AUTO_RELEASE_DAYS)
         self.save()
     
+    def _claim_status(self, expected, status):
+        """
+        Move the row to `status` only if it is still in one of `expected`.
+        The conditional UPDATE is the claim: of two racing transitions
+        (approve vs auto-release, dispute vs auto-release) the row lock makes
+        the loser wait, then it matches nothing and moves no money.
+        """
+        claimed = Transaction.objects.filter(pk=self.pk, status__in=expected).update(status=status)
+        if claimed:
+            self.status = status
+        return bool(claimed)
+    
     def approve_payment(self):
         """Client approves payment release"""
-        self.status = 'APPROVED'
-        self.approved_at = timezone.now()
-        self.save()
-        self.release_payment()
+        with db_transaction.atomic():
+            if not self._claim_status(['COMPLETED'], 'APPROVED'):
+                return False
+            self.approved_at = timezone.now()
+            self.save()
+            return self.release_payment()
     
     def release_payment(self):
         """Release payment to service provider"""
         if self.status not in ['APPROVED', 'COMPLETED']:
             return False
         
-        # Update status
-        self.status = 'RELEASED'
+        with db_transaction.atomic():
+            # Update status
+            if not self._claim_status(['APPROVED', 'COMPLETED'], 'RELEASED'):
+                return False
+            self._release_to_provider()
+            self.save()
+        return True
+    
+    def _release_to_provider(self):
+        """Move the escrow to the provider; the caller has claimed RELEASED"""
         self.released_at = timezone.now()
         
         # Transfer from escrow to provider's wallet
-        self.client.wallet.escrow_balance -= self.amount
-        self.client.wallet.save()
-        
-        self.service_provider.wallet.balance += self.service_provider_amount
-        self.service_provider.wallet.total_earned += self.service_provider_amount
-        self.service_provider.wallet.save()
-        
-        # Update user stats
-        self.client.total_completed_transactions += 1
-        self.client.save()
+        UserWallet.adjust(self.client_id, escrow_balance=-self.amount)
+        UserWallet.adjust(
+            self.service_provider_id,
+            balance=self.service_provider_amount,
+            total_earned=self.service_provider_amount,
+        )
         
-        self.service_provider.total_completed_transactions += 1
-        self.service_provider.update_trust_score()
-        
-        self.save()
-        return True
+        # Update user stats (trust scores are recomputed in batch)
+        self.client.update_trust_score(completed=1)
+        self.service_provider.update_trust_score(completed=1)
     
     def raise_dispute(self, reason):
         """Client raises a dispute"""
-        self.is_disputed = True
-        self.status = 'DISPUTED'
-        self.dispute_reason = reason
-        self.dispute_raised_at = timezone.now()
-        self.save()
-        
-        # Update stats
-        self.service_provider.total_disputes += 1
-        self.service_provider.update_trust_score()
+        with db_transaction.atomic():
+            # Only while the money is still in escrow
+            if not self._claim_status(['PAID', 'IN_PROGRESS', 'COMPLETED'], 'DISPUTED'):
+                return False
+            self.is_disputed = True
+            self.dispute_reason = reason
+            self.dispute_raised_at = timezone.now()
+            self.save()
+            
+            # Update stats
+            self.service_provider.update_trust_score(disputes=1)
+        return True
     
     def resolve_dispute(self, resolution, refund_percentage=0):
         """Admin resolves dispute"""
-        self.is_disputed = False
-        self.dispute_resolved_at = timezone.now()
-        
-        if refund_percentage == 100:
-            # Full refund to client
-            self.status = 'REFUNDED'
-            self.client.wallet.escrow_balance -= self.amount
-            self.client.wallet.balance += self.amount
-            self.client.wallet.save()
-        elif refund_percentage == 0:
-            # Full payment to provider
-            self.approve_payment()
-        else:
-            # Partial refund
-            refund_amount = (self.amount * refund_percentage) / 100
-            provider_amount = self.amount - refund_amount
+        with db_transaction.atomic():
+            self.is_disputed = False
+            self.dispute_resolved_at = timezone.now()
             
-            self.client.wallet.escrow_balance -= self.amount
-            self.client.wallet.balance += refund_amount
-            self.client.wallet.save()
+            if not self._claim_status(['DISPUTED'], 'REFUNDED' if refund_percentage == 100 else 'RELEASED'):
+                return False
             
-            self.service_provider.wallet.balance += provider_amount
-            self.service_provider.wallet.save()
+            if refund_percentage == 0:
+                # Full payment to provider
+                self.approved_at = timezone.now()
+                self._release_to_provider()
+            elif refund_percentage == 100:
+                # Full refund to client
+                UserWallet.adjust(self.client_id, escrow_balance=-self.amount, balance=self.amount)
+            else:
+                # Partial refund
+                refund_amount = (self.amount * refund_percentage) / 100
+                provider_amount = self.amount - refund_amount
+                
+                UserWallet.adjust(self.client_id, escrow_balance=-self.amount, balance=refund_amount)
+                UserWallet.adjust(self.service_provider_id, balance=provider_amount)
             
-            self.status = 'RELEASED'
-        
-        self.save()
+            self.save()
+        return True
 
 
 class TransactionMessage(models.Model):
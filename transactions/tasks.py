@@ -10,6 +10,11 @@ from django.conf import settings
 from .models import Transaction
 
 
+def _tally(emails, sent):
+    """Count a send_mail(fail_silently=True) result, which is 0 when delivery failed"""
+    emails['emails_sent' if sent else 'emails_failed'] += 1
+
+
 @shared_task
 def check_auto_release():
     """
@@ -35,17 +40,18 @@ def check_auto_release():
             # Send notifications
             send_auto_release_notification.delay(transaction.id)
     
-    return f"Auto-released {count} transactions"
+    return {'released': count}
 
 
 @shared_task
 def send_auto_release_notification(transaction_id):
     """Send email notification for auto-released payment"""
+    emails = {'emails_sent': 0, 'emails_failed': 0}
     try:
         transaction = Transaction.objects.get(id=transaction_id)
         
         # Email to client
-        send_mail(
+        _tally(emails, send_mail(
             subject=f'Payment Auto-Released - {transaction.reference}',
             message=f'''
 Dear {transaction.client.get_full_name()},
@@ -65,10 +71,10 @@ The SafeRelease Team
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[transaction.client.email],
             fail_silently=True,
-        )
+        ))
         
         # Email to provider
-        send_mail(
+        _tally(emails, send_mail(
             subject=f'Payment Received - {transaction.reference}',
             message=f'''
 Dear {transaction.service_provider.get_full_name()},
@@ -89,10 +95,12 @@ The SafeRelease Team
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[transaction.service_provider.email],
             fail_silently=True,
-        )
+        ))
         
     except Transaction.DoesNotExist:
         pass
+    
+    return emails
 
 
 @shared_task
@@ -101,6 +109,7 @@ def send_pending_notifications():
     Send reminder notifications for pending actions
     Runs every 15 minutes
     """
+    emails = {'emails_sent': 0, 'emails_failed': 0}
     now = timezone.now()
     
     # Remind clients about pending approvals
@@ -114,7 +123,7 @@ def send_pending_notifications():
         
         # Send reminder 2 days before auto-release
         if days_remaining == 2:
-            send_mail(
+            _tally(emails, send_mail(
                 subject=f'Action Required - {transaction.reference}',
                 message=f'''
 Dear {transaction.client.get_full_name()},
@@ -135,7 +144,9 @@ The SafeRelease Team
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[transaction.client.email],
                 fail_silently=True,
-            )
+            ))
+    
+    return emails
 
 
 @shared_task
@@ -144,12 +155,13 @@ def send_transaction_notification(transaction_id, event_type):
     Send notification for various transaction events
     event_type: 'created', 'paid', 'started', 'completed', 'disputed', 'released'
     """
+    emails = {'emails_sent': 0, 'emails_failed': 0}
     try:
         transaction = Transaction.objects.get(id=transaction_id)
         
         if event_type == 'created':
             # Notify provider about new job
-            send_mail(
+            _tally(emails, send_mail(
                 subject=f'New Job Request - {transaction.reference}',
                 message=f'''
 Dear {transaction.service_provider.get_full_name()},
@@ -168,11 +180,11 @@ The SafeRelease Team
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[transaction.service_provider.email],
                 fail_silently=True,
-            )
+            ))
         
         elif event_type == 'paid':
             # Notify both parties
-            send_mail(
+            _tally(emails, send_mail(
                 subject=f'Payment Secured - {transaction.reference}',
                 message=f'''
 Dear {transaction.client.get_full_name()},
@@ -189,11 +201,11 @@ The SafeRelease Team
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[transaction.client.email],
                 fail_silently=True,
-            )
+            ))
         
         elif event_type == 'completed':
             # Notify client to review
-            send_mail(
+            _tally(emails, send_mail(
                 subject=f'Work Completed - Action Required - {transaction.reference}',
                 message=f'''
 Dear {transaction.client.get_full_name()},
@@ -214,7 +226,9 @@ The SafeRelease Team
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[transaction.client.email],
                 fail_silently=True,
-            )
+            ))
         
     except Transaction.DoesNotExist:
         pass
+    
+    return emails
@@ -0,0 +1,123 @@
+"""
+Tests for transactions app
+"""
+import itertools
+from decimal import Decimal
+
+from django.test import TestCase
+
+from accounts.models import User, UserWallet
+
+from .models import Transaction
+
+_phones = itertools.count(1)
+
+
+def make_user(name):
+    return User.objects.create_user(
+        username=name,
+        email=f'{name}@example.com',
+        phone_number=f'080{next(_phones):08d}',
+        password='x-secret-1',
+    )
+
+
+class StatusClaimTests(TestCase):
+    """Escrow transitions move money once, whatever instance they're called on"""
+
+    def setUp(self):
+        self.client_user = make_user('client')
+        self.provider = make_user('provider')
+        self.transaction = Transaction.objects.create(
+            client=self.client_user,
+            service_provider=self.provider,
+            amount=Decimal('10000.00'),
+            service_description='Logo design',
+        )
+        self.transaction.mark_as_paid('PAY-TEST')
+
+    def complete(self):
+        self.transaction.start_work()
+        self.transaction.complete_work()
+
+    def fresh(self):
+        return Transaction.objects.get(pk=self.transaction.pk)
+
+    def wallet(self, user):
+        return UserWallet.objects.get(user=user)
+
+    def test_approve_releases_once(self):
+        self.complete()
+        stale = self.fresh()
+
+        self.assertTrue(self.transaction.approve_payment())
+        self.assertFalse(stale.approve_payment())
+        self.assertFalse(self.transaction.approve_payment())
+
+        self.assertEqual(self.fresh().status, 'RELEASED')
+        self.assertEqual(self.wallet(self.provider).balance, self.transaction.service_provider_amount)
+        self.assertEqual(self.wallet(self.client_user).escrow_balance, 0)
+
+    def test_approve_needs_completed_work(self):
+        self.assertFalse(self.transaction.approve_payment())
+        self.assertEqual(self.fresh().status, 'PAID')
+        self.assertEqual(self.wallet(self.provider).balance, 0)
+
+    def test_auto_release_and_approve_release_once(self):
+        self.complete()
+        stale = self.fresh()
+
+        self.assertTrue(self.transaction.release_payment())
+        self.assertFalse(stale.approve_payment())
+        self.assertEqual(self.wallet(self.provider).balance, self.transaction.service_provider_amount)
+
+    def test_no_dispute_after_release(self):
+        self.complete()
+        stale = self.fresh()
+        self.transaction.approve_payment()
+
+        self.assertFalse(stale.raise_dispute('Too late'))
+        self.assertEqual(self.fresh().status, 'RELEASED')
+
+    def test_resolving_a_released_escrow_moves_nothing(self):
+        self.complete()
+        stale = self.fresh()
+        self.transaction.approve_payment()
+
+        # A 0% resolution used to go through approve_payment and release again
+        self.assertFalse(stale.resolve_dispute('release', 0))
+        self.assertEqual(self.wallet(self.provider).balance, self.transaction.service_provider_amount)
+
+    def test_dispute_resolution_releases_to_provider(self):
+        self.assertTrue(self.transaction.raise_dispute('Not delivered'))
+        stale = self.fresh()
+
+        self.assertTrue(self.transaction.resolve_dispute('release', 0))
+        self.assertFalse(stale.resolve_dispute('release', 0))
+
+        self.assertEqual(self.fresh().status, 'RELEASED')
+        self.assertEqual(self.wallet(self.provider).balance, self.transaction.service_provider_amount)
+        self.assertEqual(self.wallet(self.client_user).escrow_balance, 0)
+
+    def test_dispute_refund_happens_once(self):
+        self.transaction.raise_dispute('Not delivered')
+        stale = self.fresh()
+
+        self.assertTrue(self.transaction.resolve_dispute('refund', 100))
+        self.assertFalse(stale.resolve_dispute('refund', 100))
+
+        client_wallet = self.wallet(self.client_user)
+        self.assertEqual(client_wallet.balance, self.transaction.amount)
+        self.assertEqual(client_wallet.escrow_balance, 0)
+        self.assertEqual(self.wallet(self.provider).balance, 0)
+
+    def test_counters_survive_stale_instances(self):
+        self.complete()
+        stale_provider = User.objects.get(pk=self.provider.pk)
+        self.transaction.approve_payment()
+        stale_provider.update_trust_score(disputes=1)
+
+        provider = User.objects.get(pk=self.provider.pk)
+        self.assertEqual(provider.total_completed_transactions, 1)
+        self.assertEqual(provider.total_disputes, 1)
+        self.assertTrue(provider.trust_score_dirty)
@@ -168,13 +168,14 @@ def approve_payment(request, transaction_id):
         return redirect('transactions:detail', transaction_id=transaction.id)
     
     # Approve and release payment
-    if transaction.status == 'COMPLETED':
-        transaction.approve_payment()
+    if transaction.status == 'COMPLETED' and transaction.approve_payment():
         messages.success(
             request,
             f'Payment of ₦{transaction.service_provider_amount:,.2f} released to {transaction.service_provider.get_full_name()}!'
         )
     else:
+        # Possibly auto-released or disputed since the page loaded
+        transaction.refresh_from_db(fields=['status'])
         messages.error(request, f'Cannot approve payment. Current status: {transaction.get_status_display()}')
     
     return redirect('transactions:detail', transaction_id=transaction.id)
@@ -194,12 +195,15 @@ def raise_dispute(request, transaction_id):
         form = DisputeForm(request.POST)
         if form.is_valid():
             reason = form.cleaned_data['reason']
-            transaction.raise_dispute(reason)
-            send_transaction_notification.delay(transaction.id, 'disputed')
-            messages.warning(
-                request,
-                'Dispute raised. Our admin team will review and resolve within 3-5 business days.'
-            )
+            if transaction.raise_dispute(reason):
+                send_transaction_notification.delay(transaction.id, 'disputed')
+                messages.warning(
+                    request,
+                    'Dispute raised. Our admin team will review and resolve within 3-5 business days.'
+                )
+            else:
+                transaction.refresh_from_db(fields=['status'])
+                messages.error(request, f'Cannot raise a dispute. Current status: {transaction.get_status_display()}')
             return redirect('transactions:detail', transaction_id=transaction.id)
     else:
         form = DisputeForm()